@@ -0,0 +1,253 @@
+"""Admission control for heavy routes.
+
+Routes are sorted into priority classes: interactive API calls (login,
+registration, single-record reads and writes) are never limited, dashboards
+share one pool of slots and exports get a smaller pool of their own. An
+export must hold a dashboard slot as well, so dashboards and exports
+together can never occupy more than the dashboard limit and the remaining
+worker threads stay free for interactive traffic. Waiting requests hold a
+worker thread too, so limits plus queues must stay below the thread count.
+
+A request that finds its pool full waits for a slot, up to the pool's wait
+limit. If too many requests are already waiting it is refused at once with
+429; if the wait runs out it gets 503. Both carry a Retry-After estimated
+from recent service times.
+
+With ADMISSION_DIR set, slots are flock()ed files in that directory, so the
+limits hold across all gunicorn workers, and a crashed worker's slots free
+themselves when the kernel closes its files. The holder writes its pid into
+the slot file, so stats can count busy slots without taking locks that
+would turn requests away. Without it (or without fcntl)
+each process enforces the limits with semaphores on its own.
+"""
+import math
+import os
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # per-process limits only
+    fcntl = None
+
+# Seconds between attempts to take a slot held by another worker
+POLL_INTERVAL = 0.02
+# Weight of the newest sample in the average slot hold time
+EWMA_WEIGHT = 0.2
+
+
+class Rejected(Exception):
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _FileSlots:
+    """Slots held as flock()s on files, shared by every process using the directory"""
+
+    def __init__(self, directory, name, count):
+        self.paths = [os.path.join(directory, f"{name}.{index}.slot") for index in range(count)]
+
+    def try_acquire(self):
+        """Return an fd holding a free slot, or None"""
+        start = random.randrange(len(self.paths)) if self.paths else 0
+        for offset in range(len(self.paths)):
+            fd = os.open(self.paths[(start + offset) % len(self.paths)], os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, str(os.getpid()).encode(), 0)
+            return fd
+        return None
+
+    def release(self, fd):
+        os.ftruncate(fd, 0)
+        os.close(fd)
+
+    def in_use(self):
+        """Count slots currently held by any process, from the holders' pids"""
+        return sum(1 for path in self.paths if _holder_alive(path))
+
+
+def _holder_alive(path):
+    # Read without locking: a flock here, however brief, would make a
+    # concurrent try_acquire see the slot as taken
+    try:
+        with open(path, 'rb') as f:
+            pid = int(f.read() or 0)
+    except (OSError, ValueError):
+        return False
+    if not pid:
+        return False
+    try:
+        # A worker that crashed left its pid behind but no lock
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class _LocalSlots:
+    """Per-process equivalent of _FileSlots"""
+
+    def __init__(self, count):
+        self.count = count
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self._used >= self.count:
+                return None
+            self._used += 1
+            return True
+
+    def release(self, token):
+        with self._lock:
+            self._used -= 1
+
+    def in_use(self):
+        return self._used
+
+
+class Pool:
+    def __init__(self, name, limit, queue, wait, shared_dir=''):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.wait = wait
+        if shared_dir and fcntl:
+            os.makedirs(shared_dir, exist_ok=True)
+            self.slots = _FileSlots(shared_dir, name, limit)
+            self.waiters = _FileSlots(shared_dir, f"{name}.queue", queue)
+        else:
+            self.slots = _LocalSlots(limit)
+            self.waiters = _LocalSlots(queue)
+        self._lock = threading.Lock()
+        self.hold_seconds = None
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: the queue ahead drained at the recent service rate"""
+        hold = self.hold_seconds or 1.0
+        return max(1, math.ceil(hold * (self.queue + 1) / max(self.limit, 1)))
+
+    def acquire(self, deadline):
+        """Return a slot token, waiting until deadline (monotonic), or raise Rejected"""
+        token = self.slots.try_acquire()
+        if token is not None:
+            with self._lock:
+                self.admitted += 1
+            return token
+
+        waiter = self.waiters.try_acquire()
+        if waiter is None:
+            with self._lock:
+                self.rejected_full += 1
+            raise Rejected(429, self.retry_after(), f"Too many {self.name} requests waiting")
+
+        started = time.monotonic()
+        try:
+            while True:
+                token = self.slots.try_acquire()
+                if token is not None:
+                    waited = time.monotonic() - started
+                    with self._lock:
+                        self.admitted += 1
+                        self.queued += 1
+                        self.wait_seconds += waited
+                        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+                    return token
+                if time.monotonic() >= deadline:
+                    with self._lock:
+                        self.rejected_timeout += 1
+                    raise Rejected(503, self.retry_after(), f"Timed out waiting for a {self.name} slot")
+                time.sleep(POLL_INTERVAL)
+        finally:
+            self.waiters.release(waiter)
+
+    def release(self, token, held=None):
+        self.slots.release(token)
+        if held is None:
+            return
+        with self._lock:
+            if self.hold_seconds is None:
+                self.hold_seconds = held
+            else:
+                self.hold_seconds += EWMA_WEIGHT * (held - self.hold_seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'queue_limit': self.queue,
+                'wait_limit_seconds': self.wait,
+                'active': self.slots.in_use(),
+                'queue_depth': self.waiters.in_use(),
+                'admitted': self.admitted,
+                'queued': self.queued,
+                'rejected_queue_full': self.rejected_full,
+                'rejected_timeout': self.rejected_timeout,
+                'avg_wait_ms': round(self.wait_seconds / self.queued * 1000, 1) if self.queued else 0.0,
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 1),
+                'avg_hold_ms': round(self.hold_seconds * 1000, 1) if self.hold_seconds is not None else None,
+            }
+
+
+class Ticket:
+    """Slots held by one admitted request; release() hands them back"""
+
+    def __init__(self, held):
+        self._held = held
+        self._started = time.monotonic()
+
+    def release(self, record=True):
+        held = time.monotonic() - self._started if record else None
+        while self._held:
+            pool, token = self._held.pop()
+            pool.release(token, held)
+
+
+class AdmissionController:
+    """Admit requests of a priority class against its chain of pools.
+
+    classes maps a class name to the pool names it must hold, acquired in
+    order; a class with no pools is always admitted.
+    """
+
+    def __init__(self, pools, classes):
+        self.pools = {pool.name: pool for pool in pools}
+        self.classes = classes
+
+    def admit(self, priority_class):
+        """Return a Ticket for priority_class, or raise Rejected"""
+        chain = [self.pools[name] for name in self.classes.get(priority_class, ())]
+        held = []
+        deadline = time.monotonic() + (chain[0].wait if chain else 0)
+        try:
+            for pool in chain:
+                held.append((pool, pool.acquire(deadline)))
+        except Rejected:
+            Ticket(held).release(record=False)
+            raise
+        return Ticket(held)
+
+    def stats(self):
+        return {
+            'shared': any(isinstance(pool.slots, _FileSlots) for pool in self.pools.values()),
+            'classes': {name: list(chain) for name, chain in self.classes.items()},
+            'pools': {name: pool.stats() for name, pool in self.pools.items()},
+        }
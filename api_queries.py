@@ -0,0 +1,84 @@
+"""Statements behind the read-only /api/* endpoints and the hot app.py reads.
+
+The Flask app (app.py) and the asyncio service (async_api.py) both build
+their queries here, so the two tiers always return the same rows for the
+same request, and `migrate.py --check-plans` EXPLAINs these same
+definitions.
+"""
+import archive
+import listing
+
+# Sort order of each list endpoint
+LIST_ORDER = {
+    'users': 'id DESC',
+    'professionals': 'name',
+    'trainees': 'name',
+    'trainings': 'training_date DESC',
+}
+
+# Column naming the professional who owns a record
+OWNER_COLUMNS = {
+    'trainees': 'registered_by',
+    'trainings': 'conducted_by',
+}
+
+# Order of the trainees/trainings exports
+EXPORT_ORDER = 'created_at DESC'
+
+# Change versions of every table, for the live-update stream
+TABLE_VERSIONS_QUERY = "SELECT table_name, version FROM table_versions ORDER BY table_name"
+
+# Sign-in lookup, with only the columns the login route uses
+LOGIN_QUERY = "SELECT id, username, name, role, district, password FROM users WHERE username = %s AND role = %s"
+
+# Store a rehashed password, unless it was changed since it was read
+REHASH_PASSWORD_QUERY = "UPDATE users SET password = %s WHERE id = %s AND password = %s"
+
+# Names of every user, to label the owners of shard rows
+USER_NAMES_QUERY = "SELECT id, name FROM users"
+
+
+def user_list_query(name, fields=None):
+    """SELECT for /api/users or /api/professionals with ?fields= applied"""
+    columns = listing.select_columns('users', fields)
+    where = " WHERE role = 'professional'" if name == 'professionals' else ''
+    return f"SELECT {columns} FROM users{where} ORDER BY {LIST_ORDER[name]}"
+
+
+def owner_totals_query(table):
+    """Rows per owner of one shard's trainees or trainings"""
+    owner = OWNER_COLUMNS[table]
+    return f"SELECT {owner}, COUNT(*) FROM {table} GROUP BY {owner}"
+
+
+def owner_filter(table, user_role, user_id):
+    """(conditions, params) limiting a trainees/trainings list to one owner unless user_role is admin"""
+    if user_role == 'admin':
+        return [], []
+    return [f"{OWNER_COLUMNS[table]} = %s"], [user_id]
+
+
+def merge_select(columns, order_by, shard_count):
+    """Plan a list read on shard_count shards whose rows are merged by order_by.
+
+    Returns (select, order_column, descending, extra): extra is True when
+    the sort column is not among columns and select fetches it for the
+    merge, to be dropped again afterwards.
+    """
+    order_column, _, direction = order_by.partition(' ')
+    selected = [name.strip() for name in columns.split(',')]
+    extra = shard_count > 1 and columns != '*' and order_column not in selected
+    select = f"{columns}, {order_column}" if extra else columns
+    return select, order_column, direction.strip().upper() == 'DESC', extra
+
+
+def list_query(table, select, conditions, params, date_from, date_to, with_archive):
+    """(query, params) for one shard's part of a trainees/trainings list"""
+    return archive.build_range_query(table, select, conditions, params, date_from=date_from,
+                                     date_to=date_to, order_by=LIST_ORDER[table], with_archive=with_archive)
+
+
+def record_queries(table):
+    """Lookups of one trainee/training by id: the live table, then its archive"""
+    return [f"SELECT * FROM {table} WHERE id = %s",
+            f"SELECT * FROM {archive.ARCHIVE_TABLES[table]} WHERE id = %s"]
@@ -1,18 +1,34 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, send_from_directory, abort, g
+from markupsafe import Markup
 import mysql.connector
-from werkzeug.security import check_password_hash, generate_password_hash
 import os
+import mimetypes
 from datetime import datetime
 import json
+import heapq
+import zlib
 from decimal import Decimal
-import pandas as pd
 from io import BytesIO
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 from config import Config
+from db import get_db_connection, get_table_versions, bump_table_versions, run_statement
+from fragment_cache import FragmentCache, Fragment
+from singleflight import SingleFlight
+from query_cache import QueryCache, QueryResult
+from admission import AdmissionController, Pool, Rejected
+import assets
+from compression import CompressionMiddleware
+import exports
+import cascade_delete
+import archive
+import reports
+import certificate_jobs
+import trainee_sync
+import checkins
+import passwords
+import listing
+import api_queries
+import shards
+from trainee_snapshot import ShardedSnapshot, FLAGS as TRAINEE_FLAGS
 
 # Custom JSON encoder for handling datetime, timedelta, and Decimal objects
 class CustomJSONEncoder(json.JSONEncoder):
@@ -59,6 +75,15 @@ app.config['PREFERRED_URL_SCHEME'] = 'http'
 
 app.json_encoder = CustomJSONEncoder
 
+# Compress HTML/JSON responses as they stream out
+if config.COMPRESSION_ENABLED:
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=config.COMPRESSION_MIN_SIZE,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY
+    )
+
 # Add date filter for templates
 @app.template_filter('datetime')
 def datetime_filter(date_obj):
@@ -77,23 +102,258 @@ def date_filter(date_obj):
 def inject_now():
     return {'now': datetime.now()}
 
-# Database configuration
-DB_CONFIG = {
-    'host': config.DB_HOST,
-    'user': config.DB_USER,
-    'password': config.DB_PASSWORD,
-    'database': config.DB_NAME,
-    'charset': 'utf8mb4',
-    'use_unicode': True
+# Resolve static files to their fingerprinted build output when available
+@app.template_global()
+def asset_url(path):
+    hashed = assets.load_manifest().get(path)
+    if hashed:
+        return url_for('serve_asset', filename=hashed)
+    return url_for('static', filename=path)
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    return assets.send_asset(filename)
+
+# Identical concurrent reads (same query, parameters and table versions) run once
+flights = SingleFlight(
+    shared_dir=config.SINGLEFLIGHT_DIR,
+    wait_timeout=config.SINGLEFLIGHT_WAIT_TIMEOUT
+)
+
+# Concurrency limits for heavy routes. Exports also hold a dashboard slot, so
+# the two classes together never use more than the dashboard limit; routes
+# not listed in ADMISSION_CLASSES (login, registration, APIs) are never queued
+admission_control = AdmissionController(
+    pools=[
+        Pool('dashboard', config.ADMISSION_DASHBOARD_LIMIT, config.ADMISSION_DASHBOARD_QUEUE,
+             config.ADMISSION_DASHBOARD_WAIT, shared_dir=config.ADMISSION_DIR),
+        Pool('export', config.ADMISSION_EXPORT_LIMIT, config.ADMISSION_EXPORT_QUEUE,
+             config.ADMISSION_EXPORT_WAIT, shared_dir=config.ADMISSION_DIR),
+    ],
+    classes={'dashboard': ('dashboard',), 'export': ('export', 'dashboard')}
+)
+
+ADMISSION_CLASSES = {
+    'admin_dashboard': 'dashboard',
+    'professional_dashboard': 'dashboard',
+    'data_viewer': 'dashboard',
+    'trainee_analytics': 'dashboard',
+    'export_excel': 'export',
+    'export_pdf': 'export',
+    'export_report': 'export',
 }
 
-def get_db_connection():
+@app.before_request
+def admit_request():
+    # Anonymous requests are turned away by the view itself and must not
+    # take slots from signed-in users
+    priority_class = ADMISSION_CLASSES.get(request.endpoint)
+    if not config.ADMISSION_ENABLED or priority_class is None or 'user_id' not in session:
+        return None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG, autocommit=True)
-        return connection
-    except mysql.connector.Error as e:
-        print(f"Database connection error: {e}")
+        g.admission_ticket = admission_control.admit(priority_class)
+    except Rejected as e:
+        if request.path.startswith(('/api/', '/export/')):
+            response = jsonify({'error': e.reason, 'retry_after': e.retry_after})
+        else:
+            response = app.response_class(
+                f"{e.reason}. Please try again in {e.retry_after} seconds.", mimetype='text/plain'
+            )
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return None
+
+@app.teardown_request
+def release_admission(exc):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        ticket.release()
+
+# Attendance check-ins, group-committed by one flusher thread per worker
+checkin_queue = checkins.CheckinQueue(
+    batch_size=config.CHECKIN_BATCH_SIZE,
+    flush_interval=config.CHECKIN_FLUSH_INTERVAL,
+    max_pending=config.CHECKIN_MAX_PENDING,
+    ack_timeout=config.CHECKIN_ACK_TIMEOUT
+)
+
+# Failed logins per account and client address, refused before hashing once locked
+login_throttle = passwords.LoginThrottle(
+    max_failures=config.LOGIN_MAX_FAILURES,
+    window=config.LOGIN_FAILURE_WINDOW,
+    lockout=config.LOGIN_LOCKOUT_SECONDS
+)
+
+# Columnar copy of every shard's trainees for /api/analytics/trainees, loaded on first use
+trainee_snapshot = ShardedSnapshot(
+    refresh_interval=config.TRAINEE_SNAPSHOT_REFRESH_SECONDS,
+    max_age=config.TRAINEE_SNAPSHOT_MAX_AGE
+)
+
+# Rendered dashboard card lists, keyed by owner and table change versions
+fragment_cache = FragmentCache(
+    max_entries=config.FRAGMENT_CACHE_ENTRIES,
+    max_bytes=config.FRAGMENT_CACHE_MAX_BYTES,
+    flights=flights
+)
+
+# Results of repeated list queries, keyed by statement, parameters and table versions
+query_cache = QueryCache(
+    max_entries=config.QUERY_CACHE_ENTRIES,
+    max_bytes=config.QUERY_CACHE_MAX_BYTES,
+    shared_dir=config.QUERY_CACHE_DIR,
+    shared_max_bytes=config.QUERY_CACHE_SHARED_MAX_BYTES,
+    flights=flights
+)
+
+def render_rows(rows, template, name):
+    """Render rows through a card-list partial"""
+    rows = serialize_data(rows)
+    html = Markup(render_template(template, **{name: rows}))
+    return Fragment(rows, html)
+
+def render_fragment(cursor, query, params, template, name):
+    """Query rows and render them through a card-list partial"""
+    cursor.execute(query, params)
+    return render_rows(cursor.fetchall(), template, name)
+
+# District -> shard routing, refreshed from the districts table
+district_map = shards.DistrictMap(ttl=config.DISTRICT_MAP_TTL)
+
+def shard_versions(*tables, shard_list=None, connections=None):
+    """((shard, versions of tables there), ...) for the fragment cache, or None if any is unknown.
+
+    Rows cached under these versions must be read on the same connections
+    (shards.open_connections), so they are never older than the versions.
+    """
+    results = shards.scatter(lambda connection, shard: get_table_versions(connection, *tables), shard_list,
+                             connections=connections)
+    if any(versions is None for _, versions in results):
+        return None
+    return tuple(results)
+
+def pick_versions(sharded, index):
+    """One table's versions out of shard_versions()"""
+    return sharded and tuple((shard, versions[index]) for shard, versions in sharded)
+
+def gather_rows(table, columns, order_by, conditions=(), params=(), date_from=None, date_to=None,
+                shard_list=None, cached=True, connections=None):
+    """A trainees/trainings SELECT run on each shard and merged in order_by order.
+
+    order_by is one column, optionally DESC. Each shard builds its own
+    archive.range_query (archive cutoffs are per shard) and, when cached,
+    reads through query_cache. If the sort column is not selected it is
+    fetched for the merge and dropped again. connections, if given, are
+    the shards.open_connections() to read on.
+    """
+    shard_list = shards.shard_names() if shard_list is None else shard_list
+    select, order_column, descending, extra = api_queries.merge_select(columns, order_by, len(shard_list))
+    
+    def fetch(connection, shard):
+        query, query_params = archive.range_query(connection, table, select, conditions, params,
+                                                  date_from=date_from, date_to=date_to, order_by=order_by)
+        if not cached:
+            statement = run_statement(connection, query, query_params)
+            return QueryResult(statement.columns, statement.rows)
+        return query_cache.fetch(connection, query, query_params, (table,), scope=shard)
+    
+    results = [result for _, result in shards.scatter(fetch, shard_list, connections=connections)]
+    rows = shards.merge_sorted([result.rows for result in results], shards.sort_key(order_column),
+                               reverse=descending)
+    columns = results[0].columns
+    if extra:
+        columns = columns[:-1]
+        rows = [{name: row[name] for name in columns} for row in rows]
+    return QueryResult(columns, rows)
+
+def stream_rows(table, columns, order_by, date_from=None, date_to=None):
+    """Like gather_rows over every shard, but yielding rows as unbuffered cursors fetch them.
+
+    The shards' streams are merged lazily in this thread, so a read
+    connection to each shard stays open until the generator finishes.
+    """
+    shard_list = shards.shard_names()
+    select, order_column, descending, extra = api_queries.merge_select(columns, order_by, len(shard_list))
+    
+    connections, cursors, streams = [], [], []
+    try:
+        for shard in shard_list:
+            connection = get_db_connection(read_only=True, shard=shard)
+            if not connection:
+                raise mysql.connector.errors.InterfaceError(f"Shard {shard} connection failed")
+            connections.append(connection)
+            cursor = connection.cursor(dictionary=True)
+            cursors.append(cursor)
+            query, params = archive.range_query(connection, table, select, date_from=date_from,
+                                                date_to=date_to, order_by=order_by)
+            cursor.execute(query, params)
+            streams.append(exports.iter_rows(cursor))
+        
+        # A single shard's rows are already in order, and its SELECT does
+        # not fetch the sort column unless asked for (see merge_select)
+        if len(streams) == 1:
+            rows = streams[0]
+        else:
+            rows = heapq.merge(*streams, key=shards.sort_key(order_column), reverse=descending)
+        for row in rows:
+            if extra:
+                del row[order_column]
+            yield row
+    finally:
+        for cursor in cursors:
+            cursor.close()
+        for connection in connections:
+            connection.close()
+
+def owner_totals(connections=None):
+    """{user id: (trainings conducted, trainees registered)} summed over every shard"""
+    def count(connection, shard):
+        return (
+            run_statement(connection, api_queries.owner_totals_query('trainings'), dictionary=False).rows,
+            run_statement(connection, api_queries.owner_totals_query('trainees'), dictionary=False).rows,
+        )
+    
+    totals = {}
+    for _, (trainings, trainees) in shards.scatter(count, connections=connections):
+        for owner, rows in trainings:
+            conducted, registered = totals.get(owner, (0, 0))
+            totals[owner] = (conducted + rows, registered)
+        for owner, rows in trainees:
+            conducted, registered = totals.get(owner, (0, 0))
+            totals[owner] = (conducted, registered + rows)
+    return totals
+
+def with_owner_names(rows, owner, label, names):
+    """Copies of rows with the owner's name from the primary's users under label"""
+    return [dict(row, **{label: names.get(row[owner])}) for row in rows]
+
+def user_names(connection):
+    """{id: name} for every user, read on the primary through query_cache"""
+    return dict(query_cache.fetch(connection, api_queries.USER_NAMES_QUERY, (), ('users',), dictionary=False).rows)
+
+def request_district(data):
+    """District a new record belongs to: a professional's home district, else the one given"""
+    if session.get('role') != 'admin' and session.get('district'):
+        return session['district']
+    return data.get('district') or config.DEFAULT_DISTRICT
+
+def list_response(name, result):
+    """Respond with a QueryResult's rows as objects, or as parallel arrays with ?format=columnar"""
+    if request.args.get('format') == 'columnar':
+        return jsonify({'success': True, name: listing.columnar(result.rows, result.columns)})
+    return jsonify({'success': True, name: result.rows})
+
+def fragment_key(name, owner, versions):
+    if versions is None:
         return None
+    return (name, owner, versions)
+
+def flight_key(name, query, params, versions):
+    """Coalescing key for a read; None (run alone) when the data version is unknown"""
+    if versions is None:
+        return None
+    return (name, ' '.join(query.split()), tuple(params), versions)
 
 @app.route('/')
 def index():
@@ -110,44 +370,69 @@ def login():
             flash('All fields are required', 'error')
             return render_template('login.html')
         
+        # Refuse locked accounts before any database or hashing work. Not keyed
+        # by address: behind nginx every client is 127.0.0.1, so one shared
+        # key would let anyone lock out every login
+        throttle_key = ('account', username, role)
+        retry_after = login_throttle.locked(throttle_key)
+        if retry_after:
+            flash(f'Too many failed attempts. Please try again in {retry_after} seconds.', 'error')
+            return render_template('login.html'), 429
+        
         connection = get_db_connection()
         if not connection:
             flash('Database connection failed', 'error')
             return render_template('login.html')
         
         try:
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM users WHERE username = %s AND role = %s", (username, role))
-            user = cursor.fetchone()
-            
-            # Check both hashed and plain text passwords for compatibility
-            password_valid = False
-            if user:
-                if user['password'].startswith('$') or user['password'].startswith('pbkdf2'):
-                    # Hashed password
-                    password_valid = check_password_hash(user['password'], password)
-                else:
-                    # Plain text password (for backward compatibility)
-                    password_valid = (user['password'] == password)
-            
-            if user and password_valid:
-                session['user_id'] = user['id']
-                session['username'] = user['username']
-                session['role'] = user['role']
-                session['name'] = user['name']
-                
-                if user['role'] == 'admin':
-                    return redirect(url_for('admin_dashboard'))
-                else:
-                    return redirect(url_for('professional_dashboard'))
-            else:
-                flash('Invalid credentials', 'error')
-                
+            rows = run_statement(connection, api_queries.LOGIN_QUERY, (username, role)).rows
         except mysql.connector.Error as e:
             flash(f'Login error: {e}', 'error')
+            return render_template('login.html')
         finally:
-            cursor.close()
+            # Not held while the password is hashed
             connection.close()
+        user = rows[0] if rows else None
+        
+        try:
+            password_valid, new_hash = passwords.verify(user['password'], password) if user else (False, None)
+        except passwords.Busy:
+            flash('The server is busy. Please try again in a moment.', 'error')
+            return render_template('login.html'), 503
+        
+        if not password_valid:
+            login_throttle.failed(throttle_key)
+            flash('Invalid credentials', 'error')
+            return render_template('login.html')
+        
+        login_throttle.succeeded(throttle_key)
+        if new_hash:
+            # Plaintext or outdated hash: store the current kind. Only if the
+            # password has not changed meanwhile; a failure here is retried
+            # at the next login
+            connection = get_db_connection()
+            if connection:
+                try:
+                    statement = run_statement(
+                        connection, api_queries.REHASH_PASSWORD_QUERY, (new_hash, user['id'], user['password'])
+                    )
+                    if statement.rowcount:
+                        bump_table_versions(connection, 'users')
+                except mysql.connector.Error as e:
+                    print(f"Password rehash error for user {user['id']}: {e}")
+                finally:
+                    connection.close()
+        
+        session['user_id'] = user['id']
+        session['username'] = user['username']
+        session['role'] = user['role']
+        session['name'] = user['name']
+        session['district'] = user['district']
+        
+        if user['role'] == 'admin':
+            return redirect(url_for('admin_dashboard'))
+        else:
+            return redirect(url_for('professional_dashboard'))
     
     return render_template('login.html')
 
@@ -161,63 +446,64 @@ def admin_dashboard():
     if 'user_id' not in session or session.get('role') != 'admin':
         return redirect(url_for('login'))
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         flash('Database connection failed', 'error')
         return redirect(url_for('login'))
     
     try:
         cursor = connection.cursor(dictionary=True)
-        
-        # Get all professionals with training counts
-        professionals_query = """
-            SELECT 
-                u.*, 
-                COUNT(DISTINCT t.id) as total_trainings,
-                COUNT(DISTINCT tr.id) as total_trainees_trained
-            FROM users u
-            LEFT JOIN trainings t ON u.id = t.conducted_by
-            LEFT JOIN trainees tr ON u.id = tr.registered_by
-            WHERE u.role = 'professional'
-            GROUP BY u.id
-            ORDER BY u.name
-        """
-        cursor.execute(professionals_query)
-        professionals = cursor.fetchall()
-        
-        # Get all trainees with professional names
-        trainees_query = """
-            SELECT 
-                tr.*,
-                u.name as registered_by_name
-            FROM trainees tr
-            LEFT JOIN users u ON tr.registered_by = u.id
-            ORDER BY tr.name
-        """
-        cursor.execute(trainees_query)
-        trainees = cursor.fetchall()
-        
-        # Get all trainings with professional names
-        trainings_query = """
-            SELECT 
-                t.*,
-                u.name as conducted_by_name
-            FROM trainings t
-            LEFT JOIN users u ON t.conducted_by = u.id
-            ORDER BY t.training_date DESC
-        """
-        cursor.execute(trainings_query)
-        trainings = cursor.fetchall()
-        
-        # Serialize data for JSON usage in templates
-        professionals_serialized = serialize_data(professionals)
-        trainees_serialized = serialize_data(trainees)
-        trainings_serialized = serialize_data(trainings)
+        user_versions = get_table_versions(connection, 'users')
+        # Versions and rows of each shard are read on one connection
+        with shards.open_connections() as shard_connections:
+            sharded = shard_versions('trainees', 'trainings', connections=shard_connections)
+            trainee_versions = pick_versions(sharded, 0)
+            training_versions = pick_versions(sharded, 1)
+            
+            # Get all professionals with training counts, summed over every shard
+            def load_professionals():
+                cursor.execute(api_queries.user_list_query('professionals'))
+                totals = owner_totals(shard_connections)
+                rows = [dict(row,
+                             total_trainings=totals.get(row['id'], (0, 0))[0],
+                             total_trainees_trained=totals.get(row['id'], (0, 0))[1])
+                        for row in cursor.fetchall()]
+                return render_rows(rows, 'partials/admin_professional_cards.html', 'professionals')
+            
+            professionals = fragment_cache.get_or_render(
+                fragment_key('admin_professionals', None, sharded and user_versions and (user_versions, sharded)),
+                load_professionals
+            )
+            
+            # Get all trainees with professional names
+            trainees = fragment_cache.get_or_render(
+                fragment_key('admin_trainees', None,
+                             trainee_versions and user_versions and (user_versions, trainee_versions)),
+                lambda: render_rows(
+                    with_owner_names(gather_rows('trainees', '*', 'name', cached=False,
+                                                 connections=shard_connections).rows,
+                                     'registered_by', 'registered_by_name', user_names(connection)),
+                    'partials/admin_trainee_cards.html', 'trainees')
+            )
+            
+            # Get all trainings with professional names
+            trainings = fragment_cache.get_or_render(
+                fragment_key('admin_trainings', None,
+                             training_versions and user_versions and (user_versions, training_versions)),
+                lambda: render_rows(
+                    with_owner_names(gather_rows('trainings', '*', 'training_date DESC', cached=False,
+                                                 connections=shard_connections).rows,
+                                     'conducted_by', 'conducted_by_name', user_names(connection)),
+                    'partials/admin_training_cards.html', 'trainings')
+            )
         
         return render_template('admin_dashboard.html', 
-                             professionals=professionals_serialized, 
-                             trainees=trainees_serialized, 
-                             trainings=trainings_serialized)
+                             professionals=professionals.rows, 
+                             trainees=trainees.rows, 
+                             trainings=trainings.rows,
+                             professional_cards=professionals.html,
+                             trainee_cards=trainees.html,
+                             training_cards=trainings.html)
         
     except mysql.connector.Error as e:
         flash(f'Database error: {e}', 'error')
@@ -231,46 +517,90 @@ def professional_dashboard():
     if 'user_id' not in session or session.get('role') != 'professional':
         return redirect(url_for('login'))
     
-    connection = get_db_connection()
-    if not connection:
-        flash('Database connection failed', 'error')
-        return redirect(url_for('login'))
-    
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get trainees registered by this professional
-        trainees_query = """
-            SELECT * FROM trainees 
-            WHERE registered_by = %s 
-            ORDER BY name
-        """
-        cursor.execute(trainees_query, (session['user_id'],))
-        trainees = cursor.fetchall()
-        
-        # Get trainings conducted by this professional
-        trainings_query = """
-            SELECT * FROM trainings 
-            WHERE conducted_by = %s 
-            ORDER BY training_date DESC
-        """
-        cursor.execute(trainings_query, (session['user_id'],))
-        trainings = cursor.fetchall()
-        
-        # Serialize data for JSON usage in templates
-        trainees_serialized = serialize_data(trainees)
-        trainings_serialized = serialize_data(trainings)
+        user_id = session['user_id']
+        shard_list = district_map.shards_for(session.get('district'))
+        # Versions and rows of each shard are read on one connection
+        with shards.open_connections(shard_list) as shard_connections:
+            sharded = shard_versions('trainees', 'trainings', shard_list=shard_list,
+                                     connections=shard_connections)
+            
+            # Get trainees registered by this professional
+            trainees = fragment_cache.get_or_render(
+                fragment_key('professional_trainees', user_id, pick_versions(sharded, 0)),
+                lambda: render_rows(gather_rows('trainees', '*', 'name', ('registered_by = %s',), (user_id,),
+                                                shard_list=shard_list, connections=shard_connections).rows,
+                                    'partials/professional_trainee_cards.html', 'trainees')
+            )
+            
+            # Get trainings conducted by this professional
+            trainings = fragment_cache.get_or_render(
+                fragment_key('professional_trainings', user_id, pick_versions(sharded, 1)),
+                lambda: render_rows(gather_rows('trainings', '*', 'training_date DESC', ('conducted_by = %s',),
+                                                (user_id,), shard_list=shard_list,
+                                                connections=shard_connections).rows,
+                                    'partials/professional_training_cards.html', 'trainings')
+            )
         
         return render_template('professional_dashboard.html', 
-                             trainees=trainees_serialized, 
-                             trainings=trainings_serialized)
+                             trainees=trainees.rows, 
+                             trainings=trainings.rows,
+                             trainee_cards=trainees.html,
+                             training_cards=trainings.html)
         
-    except mysql.connector.Error as e:
+    except (mysql.connector.Error, shards.UnknownDistrict) as e:
         flash(f'Database error: {e}', 'error')
         return redirect(url_for('login'))
-    finally:
-        cursor.close()
-        connection.close()
+
+# Viewer tables; trainees and trainings live on the shards, so their owner
+# column is labelled with the name from the primary's users
+DATA_VIEWER_TABLES = {
+    'users': None,
+    'trainees': ('registered_by', 'registered_by_name'),
+    'trainings': ('conducted_by', 'conducted_by_name'),
+}
+
+def count_sharded(*tables):
+    """Row counts of tables summed over every shard, through query_cache"""
+    def count(connection, shard):
+        return [
+            query_cache.fetch(connection, f"SELECT COUNT(*) FROM {table}", (), (table,),
+                              dictionary=False, scope=shard).rows[0][0]
+            for table in tables
+        ]
+    
+    totals = [0] * len(tables)
+    for _, counts in shards.scatter(count):
+        totals = [total + rows for total, rows in zip(totals, counts)]
+    return totals
+
+def load_data_viewer(connection, table, user_versions):
+    """Rows of the selected table plus the counts and professionals the viewer shows.
+
+    Every query goes through query_cache: users on the primary at
+    user_versions, trainees and trainings on each shard at that shard's
+    versions.
+    """
+    def fetch(query):
+        if user_versions is None:
+            return query_cache.fetch(connection, query).rows
+        return query_cache.fetch(connection, query, (), ('users',), user_versions).rows
+    
+    if DATA_VIEWER_TABLES[table] is None:
+        rows = fetch("SELECT * FROM users ORDER BY id DESC")
+    else:
+        owner, label = DATA_VIEWER_TABLES[table]
+        rows = with_owner_names(gather_rows(table, '*', 'id DESC').rows, owner, label, user_names(connection))
+    tables_data = {table: rows}
+    
+    # Get table counts for dashboard
+    users_count = fetch("SELECT COUNT(*) as count FROM users")[0]['count']
+    trainees_count, trainings_count = count_sharded('trainees', 'trainings')
+    
+    # Get professionals for the training edit form
+    professionals = fetch(api_queries.user_list_query('professionals', 'id,name'))
+    
+    return tables_data, users_count, trainees_count, trainings_count, professionals
 
 @app.route('/expdata')
 def data_viewer():
@@ -281,55 +611,21 @@ def data_viewer():
     # Get the table parameter from URL
     table = request.args.get('table', 'users')
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         flash('Database connection failed', 'error')
         return redirect(url_for('login'))
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        # Get all table data based on selected table
-        tables_data = {}
-        
-        if table == 'users':
-            cursor.execute("SELECT * FROM users ORDER BY id DESC")
-            tables_data['users'] = cursor.fetchall()
-        elif table == 'trainees':
-            cursor.execute("""
-                SELECT t.*, u.name as registered_by_name 
-                FROM trainees t 
-                LEFT JOIN users u ON t.registered_by = u.id 
-                ORDER BY t.id DESC
-            """)
-            tables_data['trainees'] = cursor.fetchall()
-        elif table == 'trainings':
-            cursor.execute("""
-                SELECT tr.*, u.name as conducted_by_name 
-                FROM trainings tr 
-                LEFT JOIN users u ON tr.conducted_by = u.id 
-                ORDER BY tr.id DESC
-            """)
-            tables_data['trainings'] = cursor.fetchall()
-        else:
+        if table not in DATA_VIEWER_TABLES:
             # Default to users table
-            cursor.execute("SELECT * FROM users ORDER BY id DESC")
-            tables_data['users'] = cursor.fetchall()
             table = 'users'
+        user_versions = get_table_versions(connection, 'users')
         
-        # Get table counts for dashboard
-        cursor.execute("SELECT COUNT(*) as count FROM users")
-        users_count = cursor.fetchone()['count']
-        
-        cursor.execute("SELECT COUNT(*) as count FROM trainees")
-        trainees_count = cursor.fetchone()['count']
-        
-        cursor.execute("SELECT COUNT(*) as count FROM trainings")
-        trainings_count = cursor.fetchone()['count']
-        
-        # Get professionals for the training edit form
-        cursor.execute("SELECT id, name FROM users WHERE role = 'professional' ORDER BY name")
-        professionals = cursor.fetchall()
+        # Repeat views at the same data versions are served from query_cache,
+        # and concurrent misses share one execution
+        data = load_data_viewer(connection, table, user_versions)
+        tables_data, users_count, trainees_count, trainings_count, professionals = data
         
         return render_template('data_viewer.html', 
                              tables_data=tables_data,
@@ -343,29 +639,48 @@ def data_viewer():
         flash(f'Database error: {e}', 'error')
         return redirect(url_for('login'))
     finally:
-        cursor.close()
         connection.close()
 
 # API Endpoints (same as React backend)
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({
+        'success': True,
+        'fragments': fragment_cache.stats(),
+        'queries': query_cache.stats(),
+        'singleflight': flights.stats()
+    })
+
+@app.route('/api/admission/stats', methods=['GET'])
+def admission_stats():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({'success': True, 'enabled': config.ADMISSION_ENABLED, **admission_control.stats(),
+                    'login': login_throttle.stats()})
+
 @app.route('/api/users', methods=['GET'])
 def get_users():
     if 'user_id' not in session or session.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users ORDER BY id DESC")
-        users = cursor.fetchall()
-        return jsonify({'success': True, 'users': users})
+        query = api_queries.user_list_query('users', request.args.get('fields'))
+        result = query_cache.fetch(connection, query, (), ('users',))
+        return list_response('users', result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
 @app.route('/api/users', methods=['POST'])
@@ -379,22 +694,19 @@ def add_user():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
         # Check if username already exists
-        cursor.execute("SELECT id FROM users WHERE username = %s", (data['username'],))
-        if cursor.fetchone():
+        if run_statement(connection, "SELECT id FROM users WHERE username = %s", (data['username'],)).rows:
             return jsonify({'error': 'Username already exists'}), 400
         
         # Hash the password
-        hashed_password = generate_password_hash(data['password'])
+        hashed_password = passwords.hash_password(data['password'])
         
         query = """
             INSERT INTO users (name, username, password, mobile_number, gender, age, 
                              designation, department, role)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(query, (
+        run_statement(connection, query, (
             data['name'],
             data['username'],
             hashed_password,
@@ -406,12 +718,13 @@ def add_user():
             data['role']
         ))
         
+        bump_table_versions(connection, 'users')
+        
         return jsonify({'success': True, 'message': 'User added successfully'})
         
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
 @app.route('/api/users/<int:user_id>', methods=['DELETE'])
@@ -423,25 +736,7 @@ def delete_user(user_id):
     if user_id == session['user_id']:
         return jsonify({'error': 'Cannot delete your own account'}), 400
     
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor()
-        
-        # Delete related data first
-        cursor.execute("DELETE FROM trainings WHERE conducted_by = %s", (user_id,))
-        cursor.execute("UPDATE trainees SET registered_by = NULL WHERE registered_by = %s", (user_id,))
-        cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
-        
-        return jsonify({'success': True, 'message': 'User deleted successfully'})
-        
-    except mysql.connector.Error as e:
-        return jsonify({'error': f'Database error: {e}'}), 500
-    finally:
-        cursor.close()
-        connection.close()
+    return cascade_delete_response(user_id, None, 'User')
 
 # Individual record endpoints for editing
 @app.route('/api/users/<int:user_id>', methods=['GET'])
@@ -449,7 +744,7 @@ def get_user(user_id):
     if 'user_id' not in session or session.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
@@ -488,7 +783,8 @@ def update_user(user_id):
         update_fields = []
         values = []
         
-        for field in ['name', 'username', 'mobile_number', 'role', 'gender', 'age', 'department', 'designation']:
+        for field in ['name', 'username', 'mobile_number', 'role', 'gender', 'age', 'department', 'designation',
+                      'district']:
             if field in data:
                 update_fields.append(f"{field} = %s")
                 values.append(data[field])
@@ -496,7 +792,7 @@ def update_user(user_id):
         # Handle password separately
         if 'password' in data and data['password']:
             update_fields.append("password = %s")
-            values.append(data['password'])
+            values.append(passwords.hash_password(data['password']))
         
         if not update_fields:
             return jsonify({'error': 'No valid fields to update'}), 400
@@ -507,6 +803,8 @@ def update_user(user_id):
         cursor.execute(query, values)
         connection.commit()
         
+        bump_table_versions(connection, 'users')
+        
         return jsonify({'success': True, 'message': 'User updated successfully'})
         
     except mysql.connector.Error as e:
@@ -520,14 +818,24 @@ def get_trainee(trainee_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    # The id range says which district shard holds the record
+    shard = shards.shard_for_id(trainee_id)
+    if shard is None:
+        return jsonify({'error': 'Trainee not found'}), 404
+    
+    connection = get_db_connection(read_only=True, shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM trainees WHERE id = %s", (trainee_id,))
-        trainee = cursor.fetchone()
+        # Falls back to cold storage for archived records
+        trainee = None
+        for query in api_queries.record_queries('trainees'):
+            cursor.execute(query, (trainee_id,))
+            trainee = cursor.fetchone()
+            if trainee:
+                break
         
         if not trainee:
             return jsonify({'error': 'Trainee not found'}), 404
@@ -548,13 +856,25 @@ def update_trainee(trainee_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    connection = get_db_connection()
+    shard = shards.shard_for_id(trainee_id)
+    if shard is None:
+        return jsonify({'error': 'Trainee not found'}), 404
+    
+    connection = get_db_connection(shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
         cursor = connection.cursor()
         
+        # The block must belong to the trainee's district; moving a record
+        # to another district is not an update
+        cursor.execute("SELECT district FROM trainees WHERE id = %s", (trainee_id,))
+        trainee = cursor.fetchone()
+        if not trainee:
+            return jsonify({'error': 'Trainee not found'}), 404
+        district_map.route(trainee[0], data.get('block'))
+        
         cursor.execute("""
             UPDATE trainees SET 
                 name = %s, mobile_number = %s, gender = %s, age = %s,
@@ -571,8 +891,11 @@ def update_trainee(trainee_id):
         ))
         
         connection.commit()
+        bump_table_versions(connection, 'trainees')
         return jsonify({'success': True, 'message': 'Trainee updated successfully'})
         
+    except shards.UnknownDistrict as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
@@ -584,14 +907,24 @@ def get_training(training_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    # The id range says which district shard holds the record
+    shard = shards.shard_for_id(training_id)
+    if shard is None:
+        return jsonify({'error': 'Training not found'}), 404
+    
+    connection = get_db_connection(read_only=True, shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
         cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM trainings WHERE id = %s", (training_id,))
-        training = cursor.fetchone()
+        # Falls back to cold storage for archived records
+        training = None
+        for query in api_queries.record_queries('trainings'):
+            cursor.execute(query, (training_id,))
+            training = cursor.fetchone()
+            if training:
+                break
         
         if not training:
             return jsonify({'error': 'Training not found'}), 404
@@ -612,13 +945,25 @@ def update_training(training_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    connection = get_db_connection()
+    shard = shards.shard_for_id(training_id)
+    if shard is None:
+        return jsonify({'error': 'Training not found'}), 404
+    
+    connection = get_db_connection(shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
         cursor = connection.cursor()
         
+        # The block must belong to the training's district; moving a record
+        # to another district is not an update
+        cursor.execute("SELECT district FROM trainings WHERE id = %s", (training_id,))
+        training = cursor.fetchone()
+        if not training:
+            return jsonify({'error': 'Training not found'}), 404
+        district_map.route(training[0], data.get('block'))
+        
         cursor.execute("""
             UPDATE trainings SET 
                 title = %s, training_topic = %s, description = %s, address = %s,
@@ -633,32 +978,48 @@ def update_training(training_id):
         ))
         
         connection.commit()
+        bump_table_versions(connection, 'trainings')
         return jsonify({'success': True, 'message': 'Training updated successfully'})
         
+    except shards.UnknownDistrict as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
         cursor.close()
         connection.close()
 
+@app.route('/api/districts', methods=['GET'])
+def get_districts():
+    """Districts with their blocks, for the registration forms"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        districts = [{'code': code, 'name': info['name'], 'blocks': info['blocks']}
+                     for code, info in district_map.districts().items()]
+        return jsonify({'success': True, 'data': districts})
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+
 @app.route('/api/professionals', methods=['GET'])
 def get_professionals():
     if 'user_id' not in session or session.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    connection = get_db_connection(read_only=True)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users WHERE role = 'professional' ORDER BY name")
-        professionals = cursor.fetchall()
-        return jsonify({'success': True, 'professionals': professionals})
+        query = api_queries.user_list_query('professionals', request.args.get('fields'))
+        result = query_cache.fetch(connection, query, (), ('users',))
+        return list_response('professionals', result)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
 @app.route('/api/professionals', methods=['POST'])
@@ -672,22 +1033,24 @@ def add_professional():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
         # Check if username already exists
-        cursor.execute("SELECT id FROM users WHERE username = %s", (data['username'],))
-        if cursor.fetchone():
+        if run_statement(connection, "SELECT id FROM users WHERE username = %s", (data['username'],)).rows:
             return jsonify({'error': 'Username already exists'}), 400
         
+        # The home district decides which shard the professional's records go to
+        if data.get('district'):
+            district_map.shard_for(data['district'])
+        
         # Hash the mobile number as password
-        hashed_password = generate_password_hash(data['mobile_number'])
+        hashed_password = passwords.hash_password(data['mobile_number'])
         
         query = """
             INSERT INTO users (name, username, password, mobile_number, gender, age, 
-                             designation, department, specialization, experience_years, role)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'professional')
+                             designation, department, specialization, experience_years,
+                             district, role)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'professional')
         """
-        cursor.execute(query, (
+        run_statement(connection, query, (
             data['name'],
             data['username'],
             hashed_password,
@@ -697,16 +1060,19 @@ def add_professional():
             data.get('designation', ''),
             data.get('department', ''),
             data.get('specialization', ''),
-            data.get('experience_years', 0)
+            data.get('experience_years', 0),
+            data.get('district') or None
         ))
         
         connection.commit()
+        bump_table_versions(connection, 'users')
         return jsonify({'success': True, 'message': 'Professional added successfully'})
         
+    except shards.UnknownDistrict as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
 @app.route('/api/professionals/<int:prof_id>', methods=['PUT'])
@@ -721,10 +1087,13 @@ def update_professional(prof_id):
     
     try:
         cursor = connection.cursor()
+        if data.get('district'):
+            district_map.shard_for(data['district'])
         query = """
             UPDATE users SET name = %s, username = %s, mobile_number = %s, 
                            gender = %s, age = %s, designation = %s, 
-                           department = %s, specialization = %s, experience_years = %s
+                           department = %s, specialization = %s, experience_years = %s,
+                           district = %s
             WHERE id = %s AND role = 'professional'
         """
         cursor.execute(query, (
@@ -737,11 +1106,16 @@ def update_professional(prof_id):
             data.get('department', ''),
             data.get('specialization', ''),
             data.get('experience_years', 0),
+            data.get('district') or None,
             prof_id
         ))
         
+        bump_table_versions(connection, 'users')
+        
         return jsonify({'success': True, 'message': 'Professional updated successfully'})
         
+    except shards.UnknownDistrict as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
@@ -753,75 +1127,229 @@ def delete_professional(prof_id):
     if 'user_id' not in session or session.get('role') != 'admin':
         return jsonify({'error': 'Unauthorized'}), 401
     
+    return cascade_delete_response(prof_id, 'professional', 'Professional')
+
+def cascade_delete_response(user_id, role, label):
+    """Delete an owner and their records in batches, in the background for large owners"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
-        # Delete related data first
-        cursor.execute("DELETE FROM trainings WHERE conducted_by = %s", (prof_id,))
-        cursor.execute("UPDATE trainees SET registered_by = NULL WHERE registered_by = %s", (prof_id,))
-        cursor.execute("DELETE FROM users WHERE id = %s AND role = 'professional'", (prof_id,))
+        job_id, owned_rows = cascade_delete.create_job(connection, user_id, role)
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+    finally:
+        connection.close()
+    
+    if owned_rows > config.CASCADE_BACKGROUND_THRESHOLD:
+        cascade_delete.start_job(job_id)
+        return jsonify({'success': True, 'job_id': job_id,
+                        'message': f'{label} deletion started in the background'}), 202
+    
+    if not cascade_delete.run_job(job_id):
+        return jsonify({'error': f'{label} deletion failed', 'job_id': job_id}), 500
+    
+    return jsonify({'success': True, 'message': f'{label} deleted successfully'})
+
+@app.route('/api/jobs/delete/<int:job_id>', methods=['GET'])
+def get_delete_job(job_id):
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        job = cascade_delete.get_job(connection, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
         
-        return jsonify({'success': True, 'message': 'Professional deleted successfully'})
+        # Pick up jobs orphaned by a recycled worker
+        if cascade_delete.is_stale(job):
+            cascade_delete.start_job(job_id)
         
+        return jsonify({'success': True, 'data': job})
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
-@app.route('/api/trainees', methods=['GET'])
-def get_trainees():
+@app.route('/api/certificates/jobs', methods=['POST'])
+def create_certificate_job():
+    """Start a bulk certificate job; returns its id for progress polling"""
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    user_id = request.args.get('user_id')
-    user_role = request.args.get('user_role')
+    data = request.get_json() or {}
+    mode = data.get('mode', 'trainee')
+    if mode not in ('trainee', 'training'):
+        return jsonify({'error': 'Invalid mode'}), 400
+    
+    filters = {key: data[key] for key in ('training_id', 'from', 'to', 'block', 'district') if data.get(key)}
+    if session.get('role') != 'admin':
+        # Professionals only certify the trainees they registered
+        filters['owner'] = session['user_id']
     
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        if user_role == 'admin':
-            cursor.execute("SELECT * FROM trainees ORDER BY name")
-        else:
-            cursor.execute("SELECT * FROM trainees WHERE registered_by = %s ORDER BY name", (user_id,))
+        job_id = certificate_jobs.create_job(connection, session['user_id'], mode, filters)
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+    finally:
+        connection.close()
+    
+    certificate_jobs.start_job(job_id)
+    return jsonify({'success': True, 'job_id': job_id,
+                    'message': 'Certificate generation started'}), 202
+
+def get_owned_certificate_job(connection, job_id):
+    job = certificate_jobs.get_job(connection, job_id)
+    if job and session.get('role') != 'admin' and job['requested_by'] != session['user_id']:
+        return None
+    return job
+
+@app.route('/api/certificates/jobs/<int:job_id>', methods=['GET'])
+def get_certificate_job(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        job = get_owned_certificate_job(connection, job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
         
-        trainees = cursor.fetchall()
-        return jsonify({'success': True, 'trainees': trainees})
+        # Pick up jobs orphaned by a recycled worker
+        if certificate_jobs.is_stale(job):
+            certificate_jobs.start_job(job_id)
         
+        return jsonify({'success': True, 'data': job})
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
+@app.route('/api/certificates/jobs/<int:job_id>/download', methods=['GET'])
+def download_certificates(job_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        job = get_owned_certificate_job(connection, job_id)
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+    finally:
+        connection.close()
+    
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'completed' or not os.path.exists(certificate_jobs.zip_path(job_id)):
+        return jsonify({'error': 'Certificates are not ready'}), 409
+    
+    return send_file(
+        certificate_jobs.zip_path(job_id),
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=f"suraksha_certificates_{job_id}.zip"
+    )
+
+@app.route('/api/trainees', methods=['GET'])
+def get_trainees():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    user_id = request.args.get('user_id')
+    user_role = request.args.get('user_role')
+    
+    try:
+        # Admins read every district shard, professionals their own district's
+        shard_list = None if session.get('role') == 'admin' else district_map.shards_for(session.get('district'))
+        # Archived history is only read when the requested range reaches it;
+        # archiving moves rows out of trainees and bumps its version, so its
+        # version covers the archive half of each shard's query too
+        conditions, params = api_queries.owner_filter('trainees', user_role, user_id)
+        result = gather_rows(
+            'trainees', listing.select_columns('trainees', request.args.get('fields')),
+            api_queries.LIST_ORDER['trainees'],
+            conditions, params,
+            date_from=request.args.get('from'), date_to=request.args.get('to'),
+            shard_list=shard_list
+        )
+        
+        return list_response('trainees', result)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+
+@app.route('/api/analytics/trainees', methods=['GET'])
+def trainee_analytics():
+    """Count trainees by any mix of filters, optionally grouped, from the in-memory snapshot"""
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    args = request.args
+    filters = {
+        name: [value.strip() for value in args[name].split(',') if value.strip()]
+        for name in ('block', 'district', 'gender', 'department', 'registered_by') if args.get(name)
+    }
+    for name in ('age_min', 'age_max'):
+        if args.get(name):
+            filters[name] = args[name]
+    filters['date_from'] = args.get('from')
+    filters['date_to'] = args.get('to')
+    for flag in TRAINEE_FLAGS:
+        if args.get(flag):
+            filters[flag] = args[flag].lower() in ('1', 'true', 'yes')
+    group_by = [name.strip() for name in args.get('group_by', '').split(',') if name.strip()]
+    
+    try:
+        result = trainee_snapshot.query(filters, group_by)
+        return jsonify({'success': True, **result})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+
 @app.route('/api/trainees', methods=['POST'])
 def register_trainee():
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
     data = request.get_json()
-    connection = get_db_connection()
+    district = request_district(data)
+    try:
+        shard = district_map.route(district, data['block'])
+    except shards.UnknownDistrict as e:
+        return jsonify({'error': str(e)}), 400
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+    
+    connection = get_db_connection(shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
         query = """
             INSERT INTO trainees (name, mobile_number, gender, age, department, designation,
-                                address, block, training_date, cpr_training, first_aid_kit_given,
-                                life_saving_skills, registered_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                address, block, district, training_date, cpr_training,
+                                first_aid_kit_given, life_saving_skills, registered_by)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(query, (
+        run_statement(connection, query, (
             data['name'],
             data.get('mobile_number', ''),
             data['gender'],
@@ -830,6 +1358,7 @@ def register_trainee():
             data.get('designation', ''),
             data['address'],
             data['block'],
+            district,
             data['training_date'],
             data.get('cpr_training', False),
             data.get('first_aid_kit_given', False),
@@ -838,20 +1367,140 @@ def register_trainee():
         ))
         
         connection.commit()
+        bump_table_versions(connection, 'trainees')
         return jsonify({'success': True, 'message': 'Trainee registered successfully'})
         
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
+@app.route('/api/trainees/batch', methods=['POST'])
+def sync_trainees():
+    """Register a batch of offline-captured trainees, deduplicated by client_key"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        body = trainee_sync.decode_body(request.get_data(), request.headers.get('Content-Encoding'))
+        data = json.loads(body)
+    except trainee_sync.BodyTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except (ValueError, zlib.error) as e:
+        return jsonify({'error': f'Invalid request body: {e}'}), 400
+    
+    entries = data.get('entries') if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        return jsonify({'error': 'Expected {"entries": [...]}'}), 400
+    if len(entries) > config.SYNC_MAX_BATCH:
+        return jsonify({'error': f'At most {config.SYNC_MAX_BATCH} entries per batch'}), 413
+    
+    try:
+        district_blocks = {code: info['blocks'] for code, info in district_map.districts().items()}
+        
+        # Split the batch by the shard of each entry's district; entries
+        # that are not objects fail validation wherever they land
+        results = [None] * len(entries)
+        groups = {}
+        for index, entry in enumerate(entries):
+            shard = shards.DEFAULT_SHARD
+            if isinstance(entry, dict):
+                entry = dict(entry, district=request_district(entry))
+                try:
+                    shard = district_map.shard_for(entry['district'])
+                except shards.UnknownDistrict as e:
+                    results[index] = {'client_key': entry.get('client_key'), 'status': 'invalid', 'error': str(e)}
+                    continue
+            groups.setdefault(shard, []).append((index, entry))
+        
+        # Each shard commits its part on its own; a failure part-way leaves
+        # earlier parts stored, which a retry of the batch acknowledges as
+        # duplicates
+        created = 0
+        for shard, group in groups.items():
+            connection = get_db_connection(shard=shard)
+            if not connection:
+                return jsonify({'error': 'Database connection failed'}), 500
+            try:
+                shard_results, shard_created = trainee_sync.sync_trainees(
+                    connection, [entry for _, entry in group], session['user_id'], district_blocks,
+                    allow_owner_override=session.get('role') == 'admin'
+                )
+                if shard_created:
+                    bump_table_versions(connection, 'trainees')
+            finally:
+                connection.close()
+            for (index, _), result in zip(group, shard_results):
+                results[index] = result
+            created += shard_created
+        return jsonify({'success': True, 'created': created, 'results': results})
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+
+@app.route('/api/checkins', methods=['POST'])
+def record_checkins():
+    """Check trainees in to a training: one event, or {"checkins": [...]}.
+
+    Responds once the valid events are committed, with one
+    {"status": "stored"|"invalid"} result per event in request order.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    data = request.get_json(silent=True)
+    events = data.get('checkins', [data]) if isinstance(data, dict) else None
+    if not isinstance(events, list) or not events:
+        return jsonify({'error': 'Expected a check-in or {"checkins": [...]}'}), 400
+    if len(events) > config.CHECKIN_MAX_REQUEST:
+        return jsonify({'error': f'At most {config.CHECKIN_MAX_REQUEST} check-ins per request'}), 413
+    
+    results, rows, positions = [], [], []
+    for event in events:
+        row, error = checkins.parse_event(event)
+        if error:
+            results.append({'status': 'invalid', 'error': error})
+        else:
+            results.append({'status': 'stored'})
+            positions.append(len(results) - 1)
+            rows.append(row)
+    
+    # Professionals may only check trainees in to trainings they conduct
+    conducted_by = None if session.get('role') == 'admin' else session['user_id']
+    try:
+        errors = checkin_queue.submit(rows, session['user_id'], conducted_by)
+    except checkins.QueueFull as e:
+        response = jsonify({'error': f'Check-in queue full: {e}', 'retry_after': 1})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    except TimeoutError as e:
+        return jsonify({'error': str(e)}), 504
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+    
+    for position, error in zip(positions, errors):
+        if error:
+            results[position] = {'status': 'invalid', 'error': error}
+    stored = sum(1 for result in results if result['status'] == 'stored')
+    return jsonify({'success': True, 'stored': stored, 'results': results})
+
+@app.route('/api/checkins/stats', methods=['GET'])
+def checkin_stats():
+    if 'user_id' not in session or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify({'success': True, **checkin_queue.stats()})
+
 @app.route('/api/trainees/<int:trainee_id>', methods=['DELETE'])
 def delete_trainee(trainee_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    shard = shards.shard_for_id(trainee_id)
+    if shard is None:
+        return jsonify({'error': 'Trainee not found'}), 404
+    
+    connection = get_db_connection(shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
@@ -867,6 +1516,8 @@ def delete_trainee(trainee_id):
         
         cursor.execute("DELETE FROM trainees WHERE id = %s", (trainee_id,))
         
+        bump_table_versions(connection, 'trainees')
+        
         return jsonify({'success': True, 'message': 'Trainee deleted successfully'})
         
     except mysql.connector.Error as e:
@@ -883,26 +1534,27 @@ def get_trainings():
     user_id = request.args.get('user_id')
     user_role = request.args.get('user_role')
     
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
     try:
-        cursor = connection.cursor(dictionary=True)
-        
-        if user_role == 'admin':
-            cursor.execute("SELECT * FROM trainings ORDER BY training_date DESC")
-        else:
-            cursor.execute("SELECT * FROM trainings WHERE conducted_by = %s ORDER BY training_date DESC", (user_id,))
+        # Admins read every district shard, professionals their own district's
+        shard_list = None if session.get('role') == 'admin' else district_map.shards_for(session.get('district'))
+        # Archived history is only read when the requested range reaches it;
+        # archiving moves rows out of trainings and bumps its version, so its
+        # version covers the archive half of each shard's query too
+        conditions, params = api_queries.owner_filter('trainings', user_role, user_id)
+        result = gather_rows(
+            'trainings', listing.select_columns('trainings', request.args.get('fields')),
+            api_queries.LIST_ORDER['trainings'],
+            conditions, params,
+            date_from=request.args.get('from'), date_to=request.args.get('to'),
+            shard_list=shard_list
+        )
         
-        trainings = cursor.fetchall()
-        return jsonify({'success': True, 'trainings': trainings})
+        return list_response('trainings', result)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
-    finally:
-        cursor.close()
-        connection.close()
 
 @app.route('/api/trainings', methods=['POST'])
 def create_training():
@@ -910,25 +1562,32 @@ def create_training():
         return jsonify({'error': 'Unauthorized'}), 401
     
     data = request.get_json()
-    connection = get_db_connection()
+    district = request_district(data)
+    try:
+        shard = district_map.route(district, data['block'])
+    except shards.UnknownDistrict as e:
+        return jsonify({'error': str(e)}), 400
+    except mysql.connector.Error as e:
+        return jsonify({'error': f'Database error: {e}'}), 500
+    
+    connection = get_db_connection(shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
         query = """
-            INSERT INTO trainings (title, description, training_topic, address, block,
+            INSERT INTO trainings (title, description, training_topic, address, block, district,
                                  training_date, training_time, duration_hours, trainees,
                                  status, conducted_by)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        cursor.execute(query, (
+        run_statement(connection, query, (
             data['title'],
             data.get('description', ''),
             data['training_topic'],
             data['address'],
             data['block'],
+            district,
             data['training_date'],
             data['training_time'],
             data['duration_hours'],
@@ -938,12 +1597,12 @@ def create_training():
         ))
         
         connection.commit()
+        bump_table_versions(connection, 'trainings')
         return jsonify({'success': True, 'message': 'Training created successfully'})
         
     except mysql.connector.Error as e:
         return jsonify({'error': f'Database error: {e}'}), 500
     finally:
-        cursor.close()
         connection.close()
 
 @app.route('/api/trainings/<int:training_id>', methods=['DELETE'])
@@ -951,7 +1610,11 @@ def delete_training(training_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
     
-    connection = get_db_connection()
+    shard = shards.shard_for_id(training_id)
+    if shard is None:
+        return jsonify({'error': 'Training not found'}), 404
+    
+    connection = get_db_connection(shard=shard)
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
@@ -967,6 +1630,8 @@ def delete_training(training_id):
         
         cursor.execute("DELETE FROM trainings WHERE id = %s", (training_id,))
         
+        bump_table_versions(connection, 'trainings')
+        
         return jsonify({'success': True, 'message': 'Training deleted successfully'})
         
     except mysql.connector.Error as e:
@@ -983,7 +1648,7 @@ def export_excel(table_name):
         return jsonify({'error': 'Unauthorized access'}), 403
     
     try:
-        connection = get_db_connection()
+        connection = get_db_connection(read_only=True)
         cursor = connection.cursor(dictionary=True)
         
         # Validate table name
@@ -993,72 +1658,41 @@ def export_excel(table_name):
         
         # Get data based on table
         if table_name == 'users':
-            cursor.execute("""
+            query, params = """
                 SELECT id, name, username, role, mobile_number, gender, age, 
                        department, designation, specialization, experience_years, 
                        created_at
                 FROM users 
                 ORDER BY created_at DESC
-            """)
-        elif table_name == 'trainees':
-            cursor.execute("""
-                SELECT id, name, mobile_number, gender, age, department, 
-                       designation, address, block, training_date, 
-                       cpr_training, first_aid_kit_given, life_saving_skills, 
-                       created_at
-                FROM trainees 
-                ORDER BY created_at DESC
-            """)
-        else:  # trainings
-            cursor.execute("""
-                SELECT id, title, training_topic, description, address, block, 
-                       training_date, training_time, duration_hours, trainees, 
-                       created_at, updated_at
-                FROM trainings 
-                ORDER BY created_at DESC
-            """)
-        
-        data = cursor.fetchall()
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        
-        # Format datetime columns safely
-        for col in df.columns:
-            if 'date' in col.lower() or 'created_at' in col or 'updated_at' in col:
-                if not df[col].empty and df[col].notna().any():
-                    try:
-                        # Convert to datetime with error handling
-                        df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
-                        # Replace any NaT values with empty string
-                        df[col] = df[col].fillna('')
-                    except Exception as e:
-                        # If conversion fails, convert to string
-                        df[col] = df[col].astype(str)
-        
-        # Create Excel file in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=table_name.title(), index=False)
-            
-            # Get the workbook and worksheet
-            workbook = writer.book
-            worksheet = writer.sheets[table_name.title()]
+            """, ()
+            versions = get_table_versions(connection, table_name)
             
-            # Auto-adjust column widths
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        output.seek(0)
+            def load():
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        else:
+            if table_name == 'trainees':
+                query = """
+                       id, name, mobile_number, gender, age, department, 
+                       designation, address, block, district, training_date, 
+                       cpr_training, first_aid_kit_given, life_saving_skills, 
+                       created_at"""
+            else:  # trainings
+                query = """
+                       id, title, training_topic, description, address, block, 
+                       district, training_date, training_time, duration_hours, trainees, 
+                       created_at, updated_at"""
+            params = (request.args.get('from'), request.args.get('to'))
+            # Every district shard's rows, merged newest first
+            versions = shard_versions(table_name)
+            load = lambda: gather_rows(table_name, query, api_queries.EXPORT_ORDER,  # noqa: E731
+                                       date_from=params[0], date_to=params[1], cached=False).rows
+        
+        def build():
+            return exports.build_excel(table_name, load()).getvalue()
+        
+        # Admins exporting the same table and range at once share one build
+        output = BytesIO(flights.do(flight_key('export_excel', query, params, versions), build))
         
         filename = f"suraksha_{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         
@@ -1075,6 +1709,75 @@ def export_excel(table_name):
         cursor.close()
         connection.close()
 
+@app.route('/export/report')
+def export_report():
+    """Export users, trainees, trainings and summary sheets as one workbook"""
+    if not session.get('user_id') or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    connection = get_db_connection(read_only=True)
+    # One read connection per district shard, streamed in shard (id) order
+    shard_connections = [get_db_connection(read_only=True, shard=shard) for shard in shards.shard_names()]
+    try:
+        if not all(shard_connections):
+            return jsonify({'error': 'Report export failed: shard connection failed'}), 500
+        output = exports.build_report(
+            connection,
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            shard_connections=shard_connections
+        )
+        
+        filename = f"suraksha_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        
+        return send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=filename
+        )
+        
+    except Exception as e:
+        return jsonify({'error': f'Report export failed: {str(e)}'}), 500
+    finally:
+        for shard_connection in shard_connections:
+            if shard_connection:
+                shard_connection.close()
+        connection.close()
+
+@app.route('/api/reports', methods=['GET'])
+def get_reports():
+    """List pre-generated report files"""
+    if not session.get('user_id') or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    
+    return jsonify({'success': True, 'reports': reports.list_reports()})
+
+@app.route('/reports/<name>/<path:filename>')
+def download_report(name, filename):
+    """Serve a pre-generated report file"""
+    if not session.get('user_id') or session.get('role') != 'admin':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    if name not in reports.REPORTS:
+        abort(404)
+    
+    if config.REPORTS_ACCEL_PREFIX:
+        # Let nginx send the file from its internal location after this auth check
+        path = os.path.normpath(filename)
+        if path.startswith(('..', '/')) or not os.path.isfile(os.path.join(reports.report_dir(name), path)):
+            abort(404)
+        response = app.response_class(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{config.REPORTS_ACCEL_PREFIX}/{name}/{path}"
+        response.headers['Content-Disposition'] = f'attachment; filename="suraksha_{name}_{path.replace("/", "_")}"'
+        return response
+    
+    return send_from_directory(
+        os.path.abspath(reports.report_dir(name)),
+        filename,
+        as_attachment=True,
+        download_name=f"suraksha_{name}_{filename.replace('/', '_')}"
+    )
+
 @app.route('/export/pdf/<table_name>')
 def export_pdf(table_name):
     """Export table data to PDF format"""
@@ -1082,7 +1785,7 @@ def export_pdf(table_name):
         return jsonify({'error': 'Unauthorized access'}), 403
     
     try:
-        connection = get_db_connection()
+        connection = get_db_connection(read_only=True)
         cursor = connection.cursor(dictionary=True)
         
         # Validate table name
@@ -1092,96 +1795,43 @@ def export_pdf(table_name):
         
         # Get data based on table
         if table_name == 'users':
-            cursor.execute("""
+            query, params = """
                 SELECT name, username, role, mobile_number, gender, age, 
                        department, designation, specialization
                 FROM users 
                 ORDER BY created_at DESC
-            """)
+            """, ()
             headers = ['Name', 'Username', 'Role', 'Mobile', 'Gender', 'Age', 
                       'Department', 'Designation', 'Specialization']
-        elif table_name == 'trainees':
-            cursor.execute("""
-                SELECT name, mobile_number, gender, age, department, 
+            versions = get_table_versions(connection, table_name)
+            
+            def load():
+                cursor.execute(query, params)
+                return exports.iter_rows(cursor)
+        else:
+            if table_name == 'trainees':
+                query = """
+                       name, mobile_number, gender, age, department, 
                        address, block, training_date, cpr_training, 
-                       first_aid_kit_given
-                FROM trainees 
-                ORDER BY created_at DESC
-            """)
-            headers = ['Name', 'Mobile', 'Gender', 'Age', 'Department', 
-                      'Address', 'Block', 'Training Date', 'CPR', 'First Aid']
-        else:  # trainings
-            cursor.execute("""
-                SELECT title, training_topic, address, block, training_date, 
-                       training_time, duration_hours, trainees
-                FROM trainings 
-                ORDER BY created_at DESC
-            """)
-            headers = ['Title', 'Topic', 'Address', 'Block', 'Date', 
-                      'Time', 'Duration (hrs)', 'Trainees']
-        
-        data = cursor.fetchall()
-        
-        # Create PDF in memory
-        output = BytesIO()
-        doc = SimpleDocTemplate(output, pagesize=A4)
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=20,
-            alignment=1  # Center alignment
-        )
-        
-        # Add title
-        title = f"SURAKSHA - {table_name.title()} Report"
-        elements.append(Paragraph(title, title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Add generation date
-        date_text = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        elements.append(Paragraph(date_text, styles['Normal']))
-        elements.append(Spacer(1, 20))
-        
-        # Prepare table data
-        table_data = [headers]
-        for row in data:
-            formatted_row = []
-            for value in row.values():
-                if value is None:
-                    formatted_row.append('')
-                elif isinstance(value, bool):
-                    formatted_row.append('Yes' if value else 'No')
-                elif isinstance(value, datetime):
-                    formatted_row.append(value.strftime('%Y-%m-%d'))
-                else:
-                    formatted_row.append(str(value))
-            table_data.append(formatted_row)
-        
-        # Create table
-        table = Table(table_data)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(table)
-        
-        # Build PDF
-        doc.build(elements)
-        output.seek(0)
+                       first_aid_kit_given"""
+                headers = ['Name', 'Mobile', 'Gender', 'Age', 'Department', 
+                          'Address', 'Block', 'Training Date', 'CPR', 'First Aid']
+            else:  # trainings
+                query = """
+                       title, training_topic, address, block, training_date, 
+                       training_time, duration_hours, trainees"""
+                headers = ['Title', 'Topic', 'Address', 'Block', 'Date', 
+                          'Time', 'Duration (hrs)', 'Trainees']
+            params = (request.args.get('from'), request.args.get('to'))
+            versions = shard_versions(table_name)
+            load = lambda: stream_rows(table_name, query, api_queries.EXPORT_ORDER,  # noqa: E731
+                                       date_from=params[0], date_to=params[1])
+        
+        def build():
+            # Streamed: the PDF engine lays out one page of rows at a time
+            return exports.build_pdf(table_name, headers, load()).getvalue()
+        
+        output = BytesIO(flights.do(flight_key('export_pdf', query, params, versions), build))
         
         filename = f"suraksha_{table_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
@@ -1194,6 +1844,9 @@ def export_pdf(table_name):
         
     except Exception as e:
         return jsonify({'error': f'PDF export failed: {str(e)}'}), 500
+    finally:
+        cursor.close()
+        connection.close()
 
 if __name__ == '__main__':
     app.run(
@@ -0,0 +1,183 @@
+"""Cold-data archival for trainees and trainings.
+
+Rows whose training_date is older than ARCHIVE_AFTER_DAYS are moved in
+batches to trainees_archive / trainings_archive, keeping the hot tables (and
+the buffer pool) small. MySQL cannot range-partition tables that carry
+foreign keys, so the archive is a parallel table set created with
+CREATE TABLE ... LIKE (same columns and indexes, no foreign keys).
+
+archive_state records, per table, the date before which rows may live in
+the archive. Queries built with range_query() only read the archive table
+when the requested date range starts before that boundary, or has no start
+at all (an unbounded list or export includes all of history). Each district
+shard keeps its own archive tables and archive_state; a run archives every
+shard.
+
+Run from cron, off-peak:  python archive.py [--days N] [--batch-size N]
+"""
+import argparse
+from datetime import date, timedelta
+
+import mysql.connector
+
+import shards
+from config import Config
+from db import get_db_connection, bump_table_versions
+
+config = Config()
+
+ARCHIVE_TABLES = {
+    'trainees': 'trainees_archive',
+    'trainings': 'trainings_archive',
+}
+
+
+CUTOFF_QUERY = "SELECT archived_before FROM archive_state WHERE table_name = %s"
+
+# Ids of the next batch of a table's rows to move, locked until the move commits
+BATCH_QUERY = "SELECT id FROM {table} WHERE training_date < %s ORDER BY id LIMIT %s FOR UPDATE"
+
+
+def get_cutoff(connection, table):
+    """Return the date before which rows of table may be archived, or None"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(CUTOFF_QUERY, (table,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    except mysql.connector.Error as e:
+        print(f"Archive state lookup error: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def needs_archive(connection, table, date_from):
+    """True if a query starting at date_from (None: unbounded) can touch archived rows"""
+    if table not in ARCHIVE_TABLES:
+        return False
+    return reaches_cutoff(get_cutoff(connection, table), date_from)
+
+
+def reaches_cutoff(cutoff, date_from):
+    """True if a range starting at date_from reaches rows archived before cutoff"""
+    if cutoff is None:
+        return False
+    if not date_from:
+        return True
+    if isinstance(date_from, str):
+        try:
+            date_from = date.fromisoformat(date_from)
+        except ValueError:
+            # Unparseable bound: include the archive rather than risk missing rows
+            return True
+    return date_from < cutoff
+
+
+def range_query(connection, table, columns, conditions=(), params=(),
+                date_from=None, date_to=None, order_by=None):
+    """Build a SELECT over table, adding its archive only when the range needs it.
+
+    Without date_from the archive is read whenever anything has been
+    archived. Returns (query, params).
+    """
+    return build_range_query(table, columns, conditions, params, date_from, date_to, order_by,
+                             with_archive=needs_archive(connection, table, date_from))
+
+
+def build_range_query(table, columns, conditions=(), params=(), date_from=None, date_to=None,
+                      order_by=None, with_archive=False):
+    """range_query() once it is known whether the archive is needed"""
+    conditions = list(conditions)
+    params = list(params)
+    if date_from:
+        conditions.append("training_date >= %s")
+        params.append(date_from)
+    if date_to:
+        conditions.append("training_date <= %s")
+        params.append(date_to)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    if with_archive:
+        # Filter each side before the union so both can use their indexes
+        source = (f"(SELECT * FROM {table}{where} "
+                  f"UNION ALL SELECT * FROM {ARCHIVE_TABLES[table]}{where}) AS {table}")
+        params = params * 2
+    else:
+        source = f"{table}{where}"
+
+    query = f"SELECT {columns} FROM {source}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    return query, params
+
+
+def advance_cutoff(connection, table, cutoff):
+    # Recorded before any row moves, so readers never miss rows mid-run
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO archive_state (table_name, archived_before) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE archived_before = GREATEST(archived_before, VALUES(archived_before))
+        """, (table, cutoff))
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def archive_batch(connection, table, cutoff, batch_size):
+    """Move one batch of rows older than cutoff; returns the number moved"""
+    archive_table = ARCHIVE_TABLES[table]
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        cursor.execute(BATCH_QUERY.format(table=table), (cutoff, batch_size))
+        ids = [row[0] for row in cursor.fetchall()]
+        if ids:
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"INSERT INTO {archive_table} SELECT * FROM {table} WHERE id IN ({placeholders})", ids)
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+        connection.commit()
+        return len(ids)
+    except mysql.connector.Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def archive_rows(connection, table, cutoff, batch_size):
+    advance_cutoff(connection, table, cutoff)
+    moved = 0
+    while True:
+        count = archive_batch(connection, table, cutoff, batch_size)
+        moved += count
+        if count < batch_size:
+            return moved
+
+
+def run(days=None, batch_size=None):
+    days = config.ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or config.ARCHIVE_BATCH_SIZE
+    cutoff = date.today() - timedelta(days=days)
+
+    for shard in shards.shard_names():
+        connection = get_db_connection(shard=shard)
+        if not connection:
+            raise SystemExit(f"Shard {shard} connection failed")
+        try:
+            for table in ARCHIVE_TABLES:
+                moved = archive_rows(connection, table, cutoff, batch_size)
+                if moved:
+                    bump_table_versions(connection, table)
+                print(f"{shard}/{table}: archived {moved} rows with training_date before {cutoff}")
+        finally:
+            connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move old trainees/trainings to the archive tables')
+    parser.add_argument('--days', type=int, help='archive rows older than this many days')
+    parser.add_argument('--batch-size', type=int, help='rows moved per transaction')
+    args = parser.parse_args()
+    run(days=args.days, batch_size=args.batch_size)
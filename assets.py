@@ -0,0 +1,202 @@
+"""Static asset pipeline: minify, fingerprint and precompress static files.
+
+Run `python assets.py` after deploying to (re)build static/dist. Templates
+reference assets through asset_url(), which resolves fingerprinted names
+from the manifest written here and falls back to the plain static file
+when no build has been run (e.g. in local development).
+
+Each build goes to a fresh static/.dist-* directory, and static/dist is a
+symlink swapped over to it once it is complete, so requests never see a
+half-built tree. The previous build is kept for pages rendered before the
+swap.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+
+from flask import abort, request, send_file
+from werkzeug.utils import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli variants are skipped when the module is missing
+    brotli = None
+
+try:
+    from rjsmin import jsmin
+except ImportError:
+    jsmin = None
+
+try:
+    from rcssmin import cssmin
+except ImportError:
+    cssmin = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+SOURCE_DIRS = ('css', 'js', 'images')
+COMPRESSIBLE = ('.css', '.js', '.svg')
+HASH_LENGTH = 12
+# Builds live in sibling directories named with this prefix
+BUILD_PREFIX = '.dist-'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# (encoding token, file suffix) in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def minify_js(source):
+    if jsmin is not None:
+        return jsmin(source)
+    # Conservative fallback: drop indentation, blank lines and whole-line comments
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def minify_css(source):
+    if cssmin is not None:
+        return cssmin(source)
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{}:;,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+MINIFIERS = {
+    '.js': minify_js,
+    '.css': minify_css,
+}
+
+
+def fingerprint(relpath, data):
+    stem, ext = os.path.splitext(relpath)
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}{ext}"
+
+
+def write_precompressed(path, data):
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """Build fingerprinted, precompressed copies of static assets into dist_dir"""
+    parent = os.path.dirname(dist_dir)
+    build_dir = tempfile.mkdtemp(prefix=BUILD_PREFIX, dir=parent)
+    os.chmod(build_dir, 0o755)
+    try:
+        manifest = _build_into(static_dir, build_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    _swap_in(build_dir, dist_dir)
+    return manifest
+
+
+def _build_into(static_dir, dist_dir):
+    manifest = {}
+
+    for source_dir in SOURCE_DIRS:
+        for root, _, files in os.walk(os.path.join(static_dir, source_dir)):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, static_dir).replace(os.sep, '/')
+                ext = os.path.splitext(name)[1].lower()
+
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if ext in MINIFIERS:
+                    data = MINIFIERS[ext](data.decode('utf-8')).encode('utf-8')
+
+                hashed = fingerprint(relpath, data)
+                target = os.path.join(dist_dir, hashed)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(data)
+                if ext in COMPRESSIBLE:
+                    write_precompressed(target, data)
+                manifest[relpath] = hashed
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def _swap_in(build_dir, dist_dir):
+    """Point the dist_dir symlink at build_dir and drop builds older than the one it replaces"""
+    parent = os.path.dirname(dist_dir)
+    previous = os.path.realpath(dist_dir) if os.path.islink(dist_dir) else None
+    if os.path.isdir(dist_dir) and not os.path.islink(dist_dir):
+        # A plain directory from before builds were swapped in can't be
+        # replaced by a symlink; move it aside and keep it as the previous build
+        previous = tempfile.mkdtemp(prefix=BUILD_PREFIX, dir=parent)
+        os.replace(dist_dir, previous)
+
+    link = os.path.join(parent, f"{BUILD_PREFIX}link-{os.getpid()}")
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(build_dir), link)
+    os.replace(link, dist_dir)
+
+    keep = {os.path.realpath(build_dir), previous}
+    for entry in os.scandir(parent):
+        if entry.name.startswith(BUILD_PREFIX) and entry.is_dir(follow_symlinks=False) \
+                and os.path.realpath(entry.path) not in keep:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+_manifest = {'mtime': None, 'entries': {}}
+
+
+def load_manifest():
+    """Return the asset manifest, reloading it when a new build replaces it"""
+    try:
+        mtime = os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return {}
+    if mtime != _manifest['mtime']:
+        with open(MANIFEST_PATH) as f:
+            _manifest['entries'] = json.load(f)
+        _manifest['mtime'] = mtime
+    return _manifest['entries']
+
+
+def send_asset(filename):
+    """Serve a fingerprinted asset, preferring a precompressed variant"""
+    path = safe_join(DIST_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for token, suffix in ENCODINGS:
+        if request.accept_encodings[token] and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, token
+            break
+
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+if __name__ == '__main__':
+    entries = build()
+    print(f"Built {len(entries)} assets into {DIST_DIR}")
@@ -0,0 +1,362 @@
+"""Asyncio service for the read-only /api/* endpoints and live updates.
+
+Under gunicorn each Flask request holds a worker thread for as long as its
+queries run, so a few slow lists or many open connections use up a worker.
+This service answers the same GET endpoints on one event loop with an
+aiomysql pool per shard; a request waiting on MySQL costs a coroutine, not
+a thread. Queries come from api_queries, the same definitions app.py uses,
+and the Flask session cookie (same SECRET_KEY) is accepted as it is.
+
+    GET /api/users, /api/professionals          admins
+    GET /api/trainees, /api/trainings           ?fields= ?format=columnar ?from= ?to=
+    GET /api/trainees/<id>, /api/trainings/<id>
+    GET /api/districts
+    GET /api/stream/versions                    Server-Sent Events
+
+/api/stream/versions pushes the table_versions of every shard whenever one
+changes, so open pages can refresh what changed instead of polling. One
+task polls table_versions for all subscribers; a client that falls
+ASYNC_STREAM_QUEUE events behind is disconnected and reconnects.
+
+Reads go to the primary and the shards, never to replicas, so a user's own
+writes are always visible. Writes, pages and exports stay on the Flask app;
+nginx sends GET /api/ to this service:
+
+    python async_api.py
+    gunicorn async_api:create_app --bind 127.0.0.1:5005 --worker-class aiohttp.GunicornWebWorker
+"""
+import asyncio
+import json
+import time
+from decimal import Decimal
+
+import aiomysql
+from aiohttp import web
+from flask import Flask
+
+import api_queries
+import archive
+import listing
+import shards
+from config import Config
+from db import DEFAULT_SHARD, SHARDS
+
+config = Config()
+
+# Flask signs its session cookie; an app object with the same key reads it
+_flask = Flask(__name__)
+_flask.secret_key = config.SECRET_KEY
+_session_serializer = _flask.session_interface.get_signing_serializer(_flask)
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'total_seconds'):
+        return value.total_seconds()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def json_response(data, status=200):
+    response = web.json_response(data, status=status,
+                                 dumps=lambda data: json.dumps(data, default=_json_default))
+    if config.COMPRESSION_ENABLED and len(response.body) >= config.COMPRESSION_MIN_SIZE:
+        response.enable_compression()
+    return response
+
+
+def error(message, status):
+    return json_response({'error': message}, status=status)
+
+
+def flask_session(request):
+    """The signed-in user's Flask session, or {}"""
+    cookie = request.cookies.get(_flask.config['SESSION_COOKIE_NAME'])
+    if not cookie or _session_serializer is None:
+        return {}
+    try:
+        return _session_serializer.loads(cookie, max_age=_flask.permanent_session_lifetime.total_seconds())
+    except Exception:
+        return {}
+
+
+# -- database -------------------------------------------------------------
+
+async def create_pools(app):
+    settings = {'user': config.DB_USER, 'password': config.DB_PASSWORD, 'charset': 'utf8mb4',
+                'autocommit': True, 'minsize': 1, 'maxsize': config.ASYNC_DB_POOL_SIZE}
+    pools = {DEFAULT_SHARD: await aiomysql.create_pool(host=config.DB_HOST, db=config.DB_NAME, **settings)}
+    for name, (_, host, port, database) in SHARDS.items():
+        pools[name] = await aiomysql.create_pool(host=host, port=port, db=database, **settings)
+    app['pools'] = pools
+
+
+async def close_pools(app):
+    for pool in app['pools'].values():
+        pool.close()
+        await pool.wait_closed()
+
+
+async def fetch(pool, query, params=()):
+    """(columns, rows) of a query, rows as dictionaries"""
+    async with pool.acquire() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, tuple(params))
+            rows = await cursor.fetchall()
+            return [column[0] for column in cursor.description or ()], list(rows)
+
+
+class AsyncDistrictMap:
+    """shards.DistrictMap for the event loop"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self._districts = None
+        self._loaded_at = 0.0
+
+    async def districts(self, pool):
+        async with self._lock:
+            if self._districts is None or time.monotonic() - self._loaded_at >= self.ttl:
+                try:
+                    _, district_rows = await fetch(pool, shards.DISTRICTS_QUERY)
+                    _, block_rows = await fetch(pool, shards.DISTRICT_BLOCKS_QUERY)
+                    self._districts = shards.build_districts(district_rows, block_rows)
+                except aiomysql.Error as e:
+                    if self._districts is None:
+                        raise
+                    print(f"District map refresh error: {e}")
+                self._loaded_at = time.monotonic()
+            return self._districts
+
+    async def shards_for(self, pool, district):
+        if not district:
+            return shards.shard_names()
+        return [shards.district_shard(await self.districts(pool), district)]
+
+
+# -- endpoints ------------------------------------------------------------
+
+routes = web.RouteTableDef()
+
+
+def list_response(request, name, columns, rows):
+    if request.query.get('format') == 'columnar':
+        return json_response({'success': True, name: listing.columnar(rows, columns)})
+    return json_response({'success': True, name: rows})
+
+
+@routes.get('/api/users')
+@routes.get('/api/professionals')
+async def get_users(request):
+    if flask_session(request).get('role') != 'admin':
+        return error('Unauthorized', 401)
+    name = request.path.rsplit('/', 1)[1]
+    try:
+        query = api_queries.user_list_query(name, request.query.get('fields'))
+        columns, rows = await fetch(request.app['pools'][DEFAULT_SHARD], query)
+    except ValueError as e:
+        return error(str(e), 400)
+    except aiomysql.Error as e:
+        return error(f'Database error: {e}', 500)
+    return list_response(request, name, columns, rows)
+
+
+async def shard_list_part(pool, table, select, conditions, params, date_from, date_to):
+    """One shard's rows of a list, reading its archive only when the range reaches it"""
+    _, cutoff = await fetch(pool, archive.CUTOFF_QUERY, (table,))
+    with_archive = archive.reaches_cutoff(cutoff[0]['archived_before'] if cutoff else None, date_from)
+    query, query_params = api_queries.list_query(table, select, conditions, params,
+                                                 date_from, date_to, with_archive)
+    return await fetch(pool, query, query_params)
+
+
+@routes.get('/api/trainees')
+@routes.get('/api/trainings')
+async def get_records(request):
+    user = flask_session(request)
+    if 'user_id' not in user:
+        return error('Unauthorized', 401)
+    table = request.path.rsplit('/', 1)[1]
+    args = request.query
+    pools = request.app['pools']
+    try:
+        # Admins read every district shard, professionals their own district's
+        shard_list = (shards.shard_names() if user.get('role') == 'admin' else
+                      await request.app['districts'].shards_for(pools[DEFAULT_SHARD], user.get('district')))
+        columns = listing.select_columns(table, args.get('fields'))
+        select, order_column, descending, extra = api_queries.merge_select(
+            columns, api_queries.LIST_ORDER[table], len(shard_list))
+        conditions, params = api_queries.owner_filter(table, args.get('user_role'), args.get('user_id'))
+        parts = await asyncio.gather(*(
+            shard_list_part(pools[shard], table, select, conditions, params, args.get('from'), args.get('to'))
+            for shard in shard_list
+        ))
+    except ValueError as e:
+        return error(str(e), 400)
+    except aiomysql.Error as e:
+        return error(f'Database error: {e}', 500)
+
+    columns = parts[0][0]
+    rows = shards.merge_sorted([rows for _, rows in parts], shards.sort_key(order_column), reverse=descending)
+    if extra:
+        columns = columns[:-1]
+        rows = [{name: row[name] for name in columns} for row in rows]
+    return list_response(request, table, columns, rows)
+
+
+@routes.get(r'/api/trainees/{record_id:\d+}')
+@routes.get(r'/api/trainings/{record_id:\d+}')
+async def get_record(request):
+    if 'user_id' not in flask_session(request):
+        return error('Unauthorized', 401)
+    table = request.path.split('/')[2]
+    label = 'Trainee' if table == 'trainees' else 'Training'
+    record_id = int(request.match_info['record_id'])
+    # The id range says which district shard holds the record
+    shard = shards.shard_for_id(record_id)
+    if shard is None:
+        return error(f'{label} not found', 404)
+    try:
+        # Falls back to cold storage for archived records
+        for query in api_queries.record_queries(table):
+            _, rows = await fetch(request.app['pools'][shard], query, (record_id,))
+            if rows:
+                return json_response({'success': True, 'data': rows[0]})
+    except aiomysql.Error as e:
+        return error(f'Database error: {e}', 500)
+    return error(f'{label} not found', 404)
+
+
+@routes.get('/api/districts')
+async def get_districts(request):
+    if 'user_id' not in flask_session(request):
+        return error('Unauthorized', 401)
+    try:
+        districts = await request.app['districts'].districts(request.app['pools'][DEFAULT_SHARD])
+    except aiomysql.Error as e:
+        return error(f'Database error: {e}', 500)
+    return json_response({'success': True, 'data': [
+        {'code': code, 'name': info['name'], 'blocks': info['blocks']} for code, info in districts.items()
+    ]})
+
+
+# -- live updates ---------------------------------------------------------
+
+class VersionFeed:
+    """Polls every shard's table_versions and fans changes out to subscribers"""
+
+    def __init__(self, pools, interval, queue_size):
+        self.pools = pools
+        self.interval = interval
+        self.queue_size = queue_size
+        self.versions = {}
+        self.subscribers = set()
+        self.dropped = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    async def _poll(self):
+        results = await asyncio.gather(*(fetch(pool, api_queries.TABLE_VERSIONS_QUERY)
+                                         for pool in self.pools.values()))
+        return {shard: {row['table_name']: row['version'] for row in rows}
+                for shard, (_, rows) in zip(self.pools, results)}
+
+    async def run(self):
+        while True:
+            try:
+                versions = await self._poll()
+                if versions != self.versions:
+                    self.versions = versions
+                    for queue in list(self.subscribers):
+                        try:
+                            queue.put_nowait(versions)
+                        except asyncio.QueueFull:
+                            # Too far behind: end its stream, the browser reconnects
+                            self.unsubscribe(queue)
+                            self.dropped += 1
+            except aiomysql.Error as e:
+                print(f"Version feed error: {e}")
+            await asyncio.sleep(self.interval)
+
+
+@routes.get('/api/stream/versions')
+async def stream_versions(request):
+    if 'user_id' not in flask_session(request):
+        return error('Unauthorized', 401)
+    feed = request.app['feed']
+    if len(feed.subscribers) >= config.ASYNC_STREAM_MAX_CLIENTS:
+        response = error('Too many live connections', 503)
+        response.headers['Retry-After'] = '30'
+        return response
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        # nginx must not buffer the stream
+        'X-Accel-Buffering': 'no',
+    })
+    await response.prepare(request)
+    queue = feed.subscribe()
+    try:
+        if feed.versions:
+            await response.write(f"data: {json.dumps(feed.versions)}\n\n".encode())
+        while queue in feed.subscribers:
+            try:
+                versions = await asyncio.wait_for(queue.get(), config.ASYNC_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                await response.write(b": keepalive\n\n")
+                continue
+            await response.write(f"data: {json.dumps(versions)}\n\n".encode())
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        feed.unsubscribe(queue)
+    return response
+
+
+@routes.get('/api/stream/stats')
+async def stream_stats(request):
+    if flask_session(request).get('role') != 'admin':
+        return error('Unauthorized', 401)
+    feed = request.app['feed']
+    pools = request.app['pools']
+    return json_response({
+        'success': True,
+        'subscribers': len(feed.subscribers),
+        'dropped': feed.dropped,
+        'pools': {shard: {'size': pool.size, 'free': pool.freesize} for shard, pool in pools.items()},
+    })
+
+
+async def start_feed(app):
+    app['feed'] = VersionFeed(app['pools'], config.ASYNC_STREAM_POLL_SECONDS, config.ASYNC_STREAM_QUEUE)
+    app['feed_task'] = asyncio.create_task(app['feed'].run())
+
+
+async def stop_feed(app):
+    app['feed_task'].cancel()
+
+
+def create_app():
+    app = web.Application()
+    app['districts'] = AsyncDistrictMap(ttl=config.DISTRICT_MAP_TTL)
+    app.add_routes(routes)
+    app.on_startup.append(create_pools)
+    app.on_startup.append(start_feed)
+    app.on_cleanup.append(stop_feed)
+    app.on_cleanup.append(close_pools)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host=config.ASYNC_API_HOST, port=config.ASYNC_API_PORT)
@@ -0,0 +1,117 @@
+"""Compare the Flask deployment with the async API tier under concurrent load.
+
+Signs in through the Flask app, then hits the same GET endpoint on both
+services with rising numbers of concurrent connections, reporting
+throughput, tail latency and failures (errors and timeouts) at each level:
+the level where failures start is the service's connection capacity. With
+--streams, that many live-update streams stay open on the async tier
+during its runs, as browser tabs would keep them.
+
+    python benchmarks/async_api.py --flask http://127.0.0.1:5004 --async http://127.0.0.1:5005 \\
+        --username admin --password ... [--path /api/trainings] [--levels 10 100 500 1000] \\
+        [--seconds 10] [--streams 1000]
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from yarl import URL
+
+
+async def sign_in(session, base, username, password, role):
+    async with session.post(f"{base}/login", allow_redirects=False,
+                            data={'username': username, 'password': password, 'role': role}) as response:
+        if response.status != 302:
+            raise SystemExit(f"Sign-in failed ({response.status}); check the credentials")
+
+
+async def client(session, url, deadline, latencies, failures, timeout):
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                await response.read()
+                if response.status != 200:
+                    failures['status'] += 1
+                    continue
+        except asyncio.TimeoutError:
+            failures['timeout'] += 1
+            continue
+        except aiohttp.ClientError:
+            failures['error'] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def hold_stream(session, url, stop):
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=None)) as response:
+            while not stop.is_set():
+                if not await response.content.readline():
+                    return
+    except aiohttp.ClientError:
+        pass
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000 if values else float('nan')
+
+
+async def run_level(cookies, url, concurrency, seconds, timeout):
+    # One TCP connection per simulated client
+    connector = aiohttp.TCPConnector(limit=0, force_close=False)
+    async with aiohttp.ClientSession(connector=connector, cookie_jar=cookies) as session:
+        latencies, failures = [], {'status': 0, 'timeout': 0, 'error': 0}
+        deadline = time.monotonic() + seconds
+        await asyncio.gather(*(client(session, url, deadline, latencies, failures, timeout)
+                               for _ in range(concurrency)))
+    latencies.sort()
+    return (f"{concurrency:>6} clients  {len(latencies) / seconds:8.1f} req/s  "
+            f"p50 {percentile(latencies, 0.5):7.1f}ms  p95 {percentile(latencies, 0.95):7.1f}ms  "
+            f"p99 {percentile(latencies, 0.99):7.1f}ms  failed {sum(failures.values())} {failures}")
+
+
+async def main(args):
+    cookies = aiohttp.CookieJar(unsafe=True)
+    async with aiohttp.ClientSession(cookie_jar=cookies) as session:
+        await sign_in(session, args.flask, args.username, args.password, args.role)
+    # The Flask session cookie is valid on both services
+    for morsel in list(cookies):
+        cookies.update_cookies({morsel.key: morsel.value}, URL(args.async_url))
+
+    for label, base in (('flask', args.flask), ('async', args.async_url)):
+        print(f"== {label} {base}{args.path}")
+        stop = asyncio.Event()
+        streams = []
+        stream_session = None
+        if label == 'async' and args.streams:
+            stream_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0), cookie_jar=cookies)
+            streams = [asyncio.create_task(hold_stream(stream_session, f"{base}/api/stream/versions", stop))
+                       for _ in range(args.streams)]
+            await asyncio.sleep(2)
+            print(f"   {sum(not task.done() for task in streams)} live-update streams open")
+        try:
+            for concurrency in args.levels:
+                print(await run_level(cookies, f"{base}{args.path}", concurrency, args.seconds, args.timeout))
+        finally:
+            stop.set()
+            for task in streams:
+                task.cancel()
+            if stream_session:
+                await stream_session.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--flask', required=True, help='base URL of the Flask deployment')
+    parser.add_argument('--async', dest='async_url', required=True, help='base URL of async_api.py')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--role', default='admin')
+    parser.add_argument('--path', default='/api/trainings')
+    parser.add_argument('--levels', type=int, nargs='+', default=[10, 100, 500, 1000])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--timeout', type=float, default=10, help='seconds before a request counts as failed')
+    parser.add_argument('--streams', type=int, default=0, help='live-update streams held open on the async tier')
+    asyncio.run(main(args=parser.parse_args()))
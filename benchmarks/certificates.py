@@ -0,0 +1,79 @@
+"""Measure certificate rendering throughput, serial vs the process pool.
+
+Renders synthetic trainees the way certificate_jobs does (chunks of
+CERTIFICATE_CHUNK_SIZE through certificates.render_chunk) and reports
+certificates per minute plus the average PDF size.
+
+    python benchmarks/certificates.py [--count 2000] [--workers N]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import certificates  # noqa: E402
+
+BLOCKS = ['Raipur', 'Birgaon', 'Abhanpur', 'Arang', 'Dhariswa', 'Tilda']
+
+
+def synthetic_trainees(count):
+    return [{
+        'id': i + 1,
+        'name': f"Trainee Number {i + 1}",
+        'department': 'Health',
+        'designation': 'Volunteer',
+        'block': BLOCKS[i % len(BLOCKS)],
+        'training_date': date(2024, 1, 1) + timedelta(days=i % 365),
+        'cpr_training': True,
+        'first_aid_kit_given': i % 2 == 0,
+        'life_saving_skills': i % 3 == 0,
+        'trainer_name': 'Dr. Example',
+    } for i in range(count)]
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_serial(trainees, chunk_size):
+    certificates.init_worker()
+    start = time.perf_counter()
+    total_bytes = 0
+    for chunk in chunks(trainees, chunk_size):
+        total_bytes += sum(len(pdf) for _, pdf in certificates.render_chunk(chunk))
+    return time.perf_counter() - start, total_bytes
+
+
+def run_pool(trainees, chunk_size, workers):
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=certificates.init_worker) as executor:
+        # Warm the pool so process start-up is not counted as render time
+        list(executor.map(certificates.render_chunk, [trainees[:1]] * workers))
+        start = time.perf_counter()
+        total_bytes = 0
+        for files in executor.map(certificates.render_chunk, chunks(trainees, chunk_size)):
+            total_bytes += sum(len(pdf) for _, pdf in files)
+        return time.perf_counter() - start, total_bytes
+
+
+def report(label, count, elapsed, total_bytes):
+    print(f"{label:<12} {elapsed:7.2f}s  {count / elapsed * 60:10,.0f} certs/min  "
+          f"{total_bytes / count / 1024:6.1f} KB/cert")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=50)
+    args = parser.parse_args()
+
+    trainees = synthetic_trainees(args.count)
+    report('serial', args.count, *run_serial(trainees, args.chunk_size))
+    report(f"pool x{args.workers}", args.count, *run_pool(trainees, args.chunk_size, args.workers))
@@ -0,0 +1,120 @@
+"""Measure check-in ingestion: group commit against one INSERT per check-in.
+
+Submits synthetic check-ins from many threads, the way gunicorn request
+threads would, against the configured database (.env) - first through
+checkins.CheckinQueue, then as one autocommitted INSERT each on a fresh
+connection. The check-ins go to a training and trainees created for the
+run (check-ins for unknown ids are refused), and all of them are deleted
+afterwards.
+
+    python benchmarks/checkins.py [--events 20000] [--threads 32] [--per-request 1]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mysql.connector  # noqa: E402
+
+import checkins  # noqa: E402
+from db import DB_CONFIG, DEFAULT_SHARD, get_db_connection  # noqa: E402
+
+# Title of the benchmark's training and department of its trainees
+MARKER = 'checkin-benchmark'
+
+
+def setup(events):
+    """Create a training and events trainees for the run; returns (training_id, trainee_ids)"""
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO trainings (title, training_topic, address, block, training_date, training_time, conducted_by)
+            VALUES (%s, %s, %s, %s, CURDATE(), '09:00', 0)
+        """, (MARKER, MARKER, MARKER, 'Raipur'))
+        training_id = cursor.lastrowid
+        cursor.executemany("""
+            INSERT INTO trainees (name, gender, age, department, address, block, training_date)
+            VALUES (%s, 'Other', 30, %s, %s, 'Raipur', CURDATE())
+        """, [(f"{MARKER} {n}", MARKER, MARKER) for n in range(events)])
+        cursor.execute("SELECT id FROM trainees WHERE department = %s ORDER BY id", (MARKER,))
+        trainee_ids = [trainee_id for (trainee_id,) in cursor.fetchall()]
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+    return training_id, trainee_ids
+
+
+def run_threads(threads, training_id, trainee_ids, per_request, submit):
+    """Split check-ins of trainee_ids over threads calling submit(rows); returns seconds taken"""
+    def worker(start):
+        for offset in range(start, len(trainee_ids), threads * per_request):
+            rows = [(DEFAULT_SHARD, (training_id, trainee_id, datetime.now()))
+                    for trainee_id in trainee_ids[offset:offset + per_request]]
+            submit(rows)
+
+    workers = [threading.Thread(target=worker, args=(i * per_request,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def cleanup():
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT id FROM trainings WHERE title = %s", (MARKER,))
+        for (training_id,) in cursor.fetchall():
+            cursor.execute("DELETE FROM attendance WHERE training_id = %s", (training_id,))
+        cursor.execute("DELETE FROM trainees WHERE department = %s", (MARKER,))
+        cursor.execute("DELETE FROM trainings WHERE title = %s", (MARKER,))
+        connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def single_inserts(rows):
+    for _, (training_id, trainee_id, checked_in_at) in rows:
+        connection = mysql.connector.connect(autocommit=True, **DB_CONFIG)
+        cursor = connection.cursor()
+        try:
+            cursor.execute(checkins.INSERT_CHECKINS, (training_id, trainee_id, checked_in_at, 0))
+        finally:
+            cursor.close()
+            connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--per-request', type=int, default=1)
+    args = parser.parse_args()
+
+    cleanup()
+    training_id, trainee_ids = setup(args.events)
+    queue = checkins.CheckinQueue()
+    seconds = run_threads(args.threads, training_id, trainee_ids, args.per_request,
+                          lambda rows: queue.submit(rows, 0))
+    stats = queue.stats()
+    print(f"group commit   {args.events / seconds:9,.0f} check-ins/s  "
+          f"avg batch {stats['avg_batch_size']:.0f}  avg flush {stats['avg_flush_ms']:.1f}ms  "
+          f"max flush {stats['max_flush_ms']:.1f}ms")
+
+    # A tenth of the events is plenty to see the per-insert cost; fresh rows,
+    # as check-ins already stored would be ignored
+    cleanup()
+    training_id, trainee_ids = setup(max(args.events // 10, args.threads))
+    seconds = run_threads(args.threads, training_id, trainee_ids, args.per_request, single_inserts)
+    print(f"single inserts {len(trainee_ids) / seconds:9,.0f} check-ins/s")
+    cleanup()
@@ -0,0 +1,108 @@
+"""Measure per-query overhead of the database driver paths.
+
+Runs the app's hot statements against the configured database (.env) on one
+connection per mode, comparing the pure-Python and C extension drivers, each
+with text-protocol queries and with prepared statements reused through
+db.run_statement(). Inserts run inside a transaction that is rolled back.
+
+    python benchmarks/db_driver.py [--iterations 2000] [--warmup 100]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import mysql.connector  # noqa: E402
+
+import db  # noqa: E402
+
+MODES = [
+    ('pure, text', True, False),
+    ('pure, prepared', True, True),
+    ('C ext, text', False, False),
+    ('C ext, prepared', False, True),
+]
+
+INSERT_TRAINEE = """
+    INSERT INTO trainees (name, mobile_number, gender, age, department, designation,
+                        address, block, training_date, cpr_training, first_aid_kit_given,
+                        life_saving_skills, registered_by)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def statements(connection):
+    """The statements to time, with parameters taken from the database"""
+    row = db.run_statement(
+        connection, "SELECT id, username FROM users WHERE role = 'professional' ORDER BY id LIMIT 1",
+        prepared=False
+    ).rows
+    if not row:
+        sys.exit("Needs at least one professional in the users table")
+    professional_id, username = row[0]['id'], row[0]['username']
+    return [
+        ('login lookup', "SELECT * FROM users WHERE username = %s AND role = %s", (username, 'professional')),
+        ('trainee list', "SELECT * FROM trainees WHERE registered_by = %s ORDER BY name", (professional_id,)),
+        ('table versions', "SELECT table_name, version FROM table_versions WHERE table_name IN (%s, %s)",
+         ('trainees', 'trainings')),
+        ('insert trainee', INSERT_TRAINEE, ('Benchmark', '', 'Female', 30, 'Health', '', 'Raipur', 'Tilda',
+                                            '2025-01-01', True, False, True, professional_id)),
+    ]
+
+
+def time_statement(connection, query, params, prepared, iterations, warmup):
+    """Median and 95th percentile microseconds per execute-and-fetch"""
+    inserting = query.lstrip().upper().startswith('INSERT')
+    if inserting:
+        connection.start_transaction()
+    try:
+        timings = []
+        for i in range(warmup + iterations):
+            started = time.perf_counter()
+            result = db.run_statement(connection, query, params, prepared=prepared)
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                timings.append(elapsed * 1e6)
+    finally:
+        if inserting:
+            connection.rollback()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)], len(result.rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+
+    settings = dict(db.DB_CONFIG, autocommit=True)
+    print(f"{'statement':<16}{'mode':<18}{'median (us)':>13}{'p95 (us)':>11}{'rows':>7}")
+    results = {}
+    for label, use_pure, prepared in MODES:
+        if not use_pure and not mysql.connector.HAVE_CEXT:
+            print(f"{'':<16}{label:<18}{'C extension not installed':>31}")
+            continue
+        connection = mysql.connector.connect(**dict(settings, use_pure=use_pure))
+        try:
+            for name, query, params in statements(connection):
+                median, p95, rows = time_statement(connection, query, params, prepared,
+                                                   args.iterations, args.warmup)
+                results[(name, label)] = median
+                print(f"{name:<16}{label:<18}{median:>13.1f}{p95:>11.1f}{rows:>7}")
+        finally:
+            connection.close()
+
+    baseline = 'pure, text'
+    print(f"\nspeed-up over {baseline}:")
+    for (name, label), median in results.items():
+        if label != baseline and (name, baseline) in results:
+            print(f"  {name:<16}{label:<18}{results[(name, baseline)] / median:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark the PDF export engine against the previous single-Table build.
+
+Each sample runs in a fresh interpreter so peak RSS is per run. "legacy"
+reproduces the old export_pdf: one platypus Table holding every row, laid
+out by SimpleDocTemplate in a single pass. It is skipped above --legacy-max
+rows, where it takes minutes and gigabytes.
+
+    python benchmarks/pdf_export.py [--rows 1000 10000 100000] [--legacy-max 10000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+from datetime import date, timedelta
+sys.path.insert(0, {root!r})
+import exports
+
+HEADERS = ['Name', 'Mobile', 'Gender', 'Age', 'Department',
+           'Address', 'Block', 'Training Date', 'CPR', 'First Aid']
+BLOCKS = ['Raipur', 'Birgaon', 'Abhanpur', 'Arang', 'Dhariswa', 'Tilda']
+
+def rows(count):
+    for i in range(count):
+        yield {{
+            'name': f'Trainee {{i}}', 'mobile_number': f'98{{i:08d}}', 'gender': 'Female',
+            'age': 20 + i % 40, 'department': 'Health Department',
+            'address': f'House {{i}}, Ward {{i % 70}}, ' + 'Near Community Hall ' * (1 + i % 3),
+            'block': BLOCKS[i % 6], 'training_date': date(2024, 1, 1) + timedelta(days=i % 365),
+            'cpr_training': i % 2, 'first_aid_kit_given': i % 3 == 0,
+        }}
+
+def legacy(count):
+    from io import BytesIO
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+    output = BytesIO()
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    data = [HEADERS] + [[exports._pdf_text(v) for v in row.values()] for row in rows(count)]
+    table = Table(data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    doc.build([table])
+    return output
+
+start = time.perf_counter()
+if {engine!r} == 'legacy':
+    output = legacy({count})
+else:
+    output = exports.build_pdf('trainees', HEADERS, rows({count}))
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'bytes': len(output.getvalue()),
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def sample(engine, count):
+    code = PROBE.format(root=ROOT, engine=engine, count=count)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark PDF export engines')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'engine':<8} {'rows':>8} {'seconds':>9} {'rows/s':>9} {'peak RSS':>10} {'size':>9}")
+    for count in args.rows:
+        for engine in ('legacy', 'paged'):
+            if engine == 'legacy' and count > args.legacy_max:
+                print(f"{engine:<8} {count:>8,}   skipped (above --legacy-max)")
+                continue
+            result = sample(engine, count)
+            if 'error' in result:
+                print(f"{engine:<8} {count:>8,}   failed: {result['error']}")
+                continue
+            print(f"{engine:<8} {count:>8,} {result['seconds']:>9.2f} {count / result['seconds']:>9,.0f} "
+                  f"{result['max_rss_mb']:>8.0f}MB {result['bytes'] / 1024 / 1024:>7.1f}MB")
@@ -0,0 +1,58 @@
+"""Measure worker boot cost: app import time and resident memory.
+
+Each sample runs in a fresh interpreter, the same way a gunicorn worker
+without --preload imports the app. The "eager" mode also imports the export
+engines at boot, reproducing the old module-level pandas/reportlab imports.
+
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app
+if {eager!r}:
+    import pandas, openpyxl
+    from reportlab.platypus import SimpleDocTemplate, Table
+elapsed = time.perf_counter() - start
+with open('/proc/self/statm') as f:
+    rss_pages = int(f.read().split()[1])
+print(json.dumps({{
+    'import_seconds': elapsed,
+    'rss_mb': rss_pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def sample(eager):
+    code = PROBE.format(root=ROOT, eager=eager)
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'import (ms)':>14}{'RSS (MB)':>12}{'max RSS (MB)':>15}")
+    for mode, eager in (('eager', True), ('lazy', False)):
+        samples = [sample(eager) for _ in range(args.runs)]
+        print(f"{mode:<8}"
+              f"{statistics.median(s['import_seconds'] for s in samples) * 1000:>14.1f}"
+              f"{statistics.median(s['rss_mb'] for s in samples):>12.1f}"
+              f"{statistics.median(s['max_rss_mb'] for s in samples):>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
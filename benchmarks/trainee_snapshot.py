@@ -0,0 +1,70 @@
+"""Measure the trainee analytics snapshot: load time, memory and query latency.
+
+Loads synthetic trainees straight into a TraineeSnapshot (no database) and
+times typical admin slices.
+
+    python benchmarks/trainee_snapshot.py [--rows 1000000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import trainee_snapshot  # noqa: E402
+
+BLOCKS = ['Raipur', 'Birgaon', 'Abhanpur', 'Arang', 'Dhariswa', 'Tilda']
+DEPARTMENTS = ['Health', 'Police', 'Education', 'Fire', 'Transport', 'Revenue',
+               'Panchayat', 'Women and Child Development']
+
+QUERIES = [
+    ('total', {}, ()),
+    ('by block', {}, ('block',)),
+    ('block x gender, CPR only', {'cpr_training': True}, ('block', 'gender')),
+    ('women 25-40 in two blocks, by department',
+     {'gender': ['Female'], 'age_min': 25, 'age_max': 40, 'block': ['Tilda', 'Arang']}, ('department',)),
+    ('2024 by month x block', {'date_from': '2024-01-01', 'date_to': '2024-12-31'}, ('training_month', 'block')),
+    ('by professional x age band', {}, ('registered_by', 'age_band')),
+]
+
+
+def synthetic_rows(count, batch=5000):
+    rng = random.Random(7)
+    start = date(2020, 1, 1)
+    for offset in range(0, count, batch):
+        yield [(i + 1, rng.randint(18, 70), start + timedelta(days=rng.randint(0, 2000)),
+                rng.choice(BLOCKS), 'raipur', rng.choice(trainee_snapshot.GENDERS),
+                rng.choice(DEPARTMENTS), rng.randint(1, 400),
+                rng.random() < 0.6, rng.random() < 0.4, rng.random() < 0.5)
+               for i in range(offset, min(offset + batch, count))]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    snapshot = trainee_snapshot.TraineeSnapshot(refresh_interval=float('inf'))
+    started = time.perf_counter()
+    for rows in synthetic_rows(args.rows):
+        snapshot._append(rows)
+    snapshot.loaded_at = snapshot.refreshed_at = time.time()
+    snapshot._loaded = True
+    load_seconds = time.perf_counter() - started
+    size = sum(column.nbytes for column in snapshot._columns.values()) + snapshot._positions.nbytes
+    print(f"loaded {args.rows:,} rows in {load_seconds:.2f}s, {size / 1024 / 1024:.1f}MB of arrays")
+
+    for label, filters, group_by in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            result = snapshot.query(filters, group_by)
+            timings.append(result['query_ms'])
+        timings.sort()
+        groups = len(result.get('groups', ()))
+        print(f"{label:<45} median {timings[len(timings) // 2]:7.2f}ms  max {timings[-1]:7.2f}ms  "
+              f"{result['total']:>9,} rows  {groups:>5} groups")
@@ -0,0 +1,271 @@
+"""Chunked, resumable cascade deletes for users and professionals.
+
+Deleting an owner removes their trainings and detaches their trainees in
+small batches, each committed together with the job's progress counters, so
+no statement holds row locks for long and an interrupted job can be resumed
+exactly where it stopped. The user row itself is deleted last. Jobs are
+recorded in the delete_jobs table; owners with many records are processed on
+a background thread while the API returns the job id for progress polling.
+
+Owners are users on the primary, but their trainings and trainees may sit on
+any district shard, so every shard is worked through in turn. On a shard
+other than the primary a batch cannot share a transaction with the job's
+counters; it commits first and the counters follow.
+"""
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+
+import shards
+from config import Config
+from db import DEFAULT_SHARD, get_db_connection, bump_table_versions
+
+config = Config()
+
+# A running job whose heartbeat is older than this is assumed to have died
+# with its worker and may be claimed again.
+STALE_AFTER_SECONDS = 120
+
+BATCH_STATEMENTS = (
+    ('trainings_deleted',
+     "DELETE FROM trainings WHERE conducted_by = %s ORDER BY id LIMIT %s"),
+    ('trainings_deleted',
+     "DELETE FROM trainings_archive WHERE conducted_by = %s ORDER BY id LIMIT %s"),
+    ('trainees_detached',
+     "UPDATE trainees SET registered_by = NULL WHERE registered_by = %s ORDER BY id LIMIT %s"),
+    ('trainees_detached',
+     "UPDATE trainees_archive SET registered_by = NULL WHERE registered_by = %s ORDER BY id LIMIT %s"),
+)
+
+# Jobs to restart: pending, or running with a heartbeat older than STALE_AFTER_SECONDS
+RESUME_QUERY = """
+    SELECT id FROM delete_jobs
+    WHERE status = 'pending'
+       OR (status = 'running' AND heartbeat_at < NOW() - INTERVAL %s SECOND)
+    ORDER BY id
+"""
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def count_owned(connection, user_id):
+    """Return (trainings, trainees) owned by a user, including archived rows"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM trainings WHERE conducted_by = %s)
+                 + (SELECT COUNT(*) FROM trainings_archive WHERE conducted_by = %s)
+        """, (user_id, user_id))
+        trainings = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM trainees WHERE registered_by = %s)
+                 + (SELECT COUNT(*) FROM trainees_archive WHERE registered_by = %s)
+        """, (user_id, user_id))
+        trainees = cursor.fetchone()[0]
+        return int(trainings), int(trainees)
+    finally:
+        cursor.close()
+
+
+def create_job(connection, user_id, role=None):
+    """Record a pending delete job and return (job_id, total owned rows)"""
+    owned = [counts for _, counts in shards.scatter(
+        lambda shard_connection, shard: count_owned(shard_connection, user_id), read_only=False
+    )]
+    trainings = sum(counts[0] for counts in owned)
+    trainees = sum(counts[1] for counts in owned)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO delete_jobs (user_id, role, status, total_trainings, total_trainees)
+            VALUES (%s, %s, 'pending', %s, %s)
+        """, (user_id, role, trainings, trainees))
+        connection.commit()
+        return cursor.lastrowid, trainings + trainees
+    finally:
+        cursor.close()
+
+
+def get_job(connection, job_id):
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM delete_jobs WHERE id = %s", (job_id,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def is_stale(job):
+    """True if a job is pending or its worker stopped reporting progress"""
+    if job['status'] == 'pending':
+        return True
+    if job['status'] != 'running' or job['heartbeat_at'] is None:
+        return False
+    return (datetime.now() - job['heartbeat_at']).total_seconds() > STALE_AFTER_SECONDS
+
+
+def claim_job(connection, job_id):
+    """Atomically take ownership of a pending or stale job"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            UPDATE delete_jobs
+            SET status = 'running', claimed_by = %s, heartbeat_at = NOW()
+            WHERE id = %s
+              AND (status = 'pending'
+                   OR (status = 'running' AND heartbeat_at < NOW() - INTERVAL %s SECOND))
+        """, (worker_id(), job_id, STALE_AFTER_SECONDS))
+        connection.commit()
+        return cursor.rowcount == 1
+    finally:
+        cursor.close()
+
+
+def run_batch(connection, job_id, user_id, counter, statement, batch_size, shard_connection=None):
+    """Apply one batch and its progress update in a single transaction.
+
+    With shard_connection, the batch runs and commits on that shard before
+    the progress update; the statements are idempotent, so a crash between
+    the two only leaves the counter one batch short.
+    """
+    if shard_connection is not None:
+        cursor = shard_connection.cursor()
+        try:
+            cursor.execute(statement, (user_id, batch_size))
+            affected = cursor.rowcount
+            shard_connection.commit()
+        finally:
+            cursor.close()
+        statement = None
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        if statement is not None:
+            cursor.execute(statement, (user_id, batch_size))
+            affected = cursor.rowcount
+        cursor.execute(
+            f"UPDATE delete_jobs SET {counter} = {counter} + %s, heartbeat_at = NOW() WHERE id = %s",
+            (affected, job_id)
+        )
+        connection.commit()
+        return affected
+    except mysql.connector.Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def finish_job(connection, job_id, user_id, role):
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        if role:
+            cursor.execute("DELETE FROM users WHERE id = %s AND role = %s", (user_id, role))
+        else:
+            cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        cursor.execute(
+            "UPDATE delete_jobs SET status = 'completed', heartbeat_at = NOW() WHERE id = %s",
+            (job_id,)
+        )
+        connection.commit()
+    except mysql.connector.Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def fail_job(job_id, error):
+    connection = get_db_connection()
+    if not connection:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "UPDATE delete_jobs SET status = 'failed', error = %s WHERE id = %s",
+            (str(error)[:500], job_id)
+        )
+        connection.commit()
+    except mysql.connector.Error as e:
+        print(f"Delete job {job_id} status update error: {e}")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def run_job(job_id):
+    """Claim and run a delete job to completion; returns True if it completed here"""
+    connection = get_db_connection()
+    if not connection:
+        return False
+
+    try:
+        if not claim_job(connection, job_id):
+            return False
+        job = get_job(connection, job_id)
+        user_id = job['user_id']
+
+        for shard in shards.shard_names():
+            shard_connection = None
+            if shard != DEFAULT_SHARD:
+                shard_connection = get_db_connection(shard=shard)
+                if not shard_connection:
+                    raise mysql.connector.errors.InterfaceError(f"Shard {shard} connection failed")
+            try:
+                for counter, statement in BATCH_STATEMENTS:
+                    while True:
+                        affected = run_batch(connection, job_id, user_id, counter, statement,
+                                             config.CASCADE_BATCH_SIZE, shard_connection)
+                        if affected < config.CASCADE_BATCH_SIZE:
+                            break
+                        # Give registration and dashboard traffic a window between batches
+                        time.sleep(config.CASCADE_BATCH_PAUSE)
+                if shard_connection:
+                    bump_table_versions(shard_connection, 'trainings', 'trainees')
+            finally:
+                if shard_connection:
+                    shard_connection.close()
+
+        finish_job(connection, job_id, user_id, job['role'])
+        bump_table_versions(connection, 'trainings', 'trainees', 'users')
+        return True
+
+    except mysql.connector.Error as e:
+        print(f"Delete job {job_id} failed: {e}")
+        fail_job(job_id, e)
+        return False
+    finally:
+        connection.close()
+
+
+def start_job(job_id):
+    thread = threading.Thread(target=run_job, args=(job_id,), name=f"delete-job-{job_id}", daemon=True)
+    thread.start()
+    return thread
+
+
+def resume_jobs():
+    """Restart jobs left pending or abandoned by a dead worker"""
+    connection = get_db_connection()
+    if not connection:
+        return
+    cursor = connection.cursor()
+    try:
+        cursor.execute(RESUME_QUERY, (STALE_AFTER_SECONDS,))
+        job_ids = [row[0] for row in cursor.fetchall()]
+    except mysql.connector.Error as e:
+        print(f"Delete job resume error: {e}")
+        job_ids = []
+    finally:
+        cursor.close()
+        connection.close()
+
+    for job_id in job_ids:
+        start_job(job_id)
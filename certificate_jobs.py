@@ -0,0 +1,275 @@
+"""Bulk certificate generation jobs.
+
+A job selects trainees who completed CPR, life-saving or first-aid
+training, renders their certificates on a process pool, and writes the
+results into a zip under CERTIFICATES_DIR. There are two modes:
+
+* trainee: one PDF per trainee, rendered in chunks of CERTIFICATE_CHUNK_SIZE
+* training: one merged PDF per training session, holding its trainees'
+  certificates
+
+Trainees are matched to a session by registering professional, block and
+training date; both sit on their district's shard, so every shard is
+searched and trainer names are filled in from the primary's users.
+
+Jobs are recorded in certificate_jobs. A job whose worker stops sending
+heartbeats can be claimed again, the same way as cascade delete jobs.
+"""
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import mysql.connector
+
+import archive
+import certificates
+import shards
+from cascade_delete import STALE_AFTER_SECONDS, worker_id
+from config import Config
+from db import get_db_connection
+
+config = Config()
+
+COMPLETED_CONDITION = "(tr.cpr_training = 1 OR tr.life_saving_skills = 1 OR tr.first_aid_kit_given = 1)"
+
+# Seconds between progress/heartbeat writes while a job renders
+PROGRESS_INTERVAL = 1.0
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return this process's render pool, creating it on first use"""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                # spawn, not fork: web workers are multi-threaded and hold DB sockets
+                _executor = ProcessPoolExecutor(
+                    max_workers=config.CERTIFICATE_WORKERS or os.cpu_count(),
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=certificates.init_worker
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def reset_executor():
+    """Drop a pool whose processes died so the next job starts a fresh one"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def zip_path(job_id):
+    return os.path.join(config.CERTIFICATES_DIR, f"job_{job_id}.zip")
+
+
+def _source(connection, table, alias, date_from):
+    if archive.needs_archive(connection, table, date_from):
+        return f"(SELECT * FROM {table} UNION ALL SELECT * FROM {archive.ARCHIVE_TABLES[table]}) AS {alias}"
+    return f"{table} {alias}"
+
+
+def trainee_query(connection, mode, filters):
+    """The (query, params) selecting a job's trainees on one shard"""
+    date_from = filters.get('from')
+    columns = """tr.id, tr.name, tr.department, tr.designation, tr.block, tr.training_date,
+                 tr.cpr_training, tr.first_aid_kit_given, tr.life_saving_skills,
+                 tr.registered_by"""
+    joins = ""
+    conditions = [COMPLETED_CONDITION]
+    params = []
+
+    if mode == 'training' or filters.get('training_id'):
+        columns += ", t.id AS training_id, t.title AS training_title"
+        joins += f"""
+            JOIN {_source(connection, 'trainings', 't', date_from)}
+              ON t.conducted_by = tr.registered_by
+             AND t.block = tr.block
+             AND t.training_date = tr.training_date"""
+    if filters.get('training_id'):
+        conditions.append("t.id = %s")
+        params.append(filters['training_id'])
+    if date_from:
+        conditions.append("tr.training_date >= %s")
+        params.append(date_from)
+    if filters.get('to'):
+        conditions.append("tr.training_date <= %s")
+        params.append(filters['to'])
+    if filters.get('block'):
+        conditions.append("tr.block = %s")
+        params.append(filters['block'])
+    if filters.get('district'):
+        conditions.append("tr.district = %s")
+        params.append(filters['district'])
+    if filters.get('owner'):
+        conditions.append("tr.registered_by = %s")
+        params.append(filters['owner'])
+
+    return f"""
+        SELECT {columns}
+        FROM {_source(connection, 'trainees', 'tr', date_from)}
+        {joins}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY tr.training_date, tr.id
+    """, params
+
+
+def select_trainees(connection, mode, filters):
+    """Return the trainees a job covers, each with trainer (and training) details"""
+    def fetch(shard_connection, shard):
+        query, params = trainee_query(shard_connection, mode, filters)
+        cursor = shard_connection.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    shard_list = [shards.DistrictMap(ttl=0).shard_for(filters['district'])] if filters.get('district') else None
+    trainees = shards.merge_sorted([rows for _, rows in shards.scatter(fetch, shard_list)],
+                                   key=lambda row: (row['training_date'], row['id']))
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT id, name FROM users")
+        names = dict(cursor.fetchall())
+    finally:
+        cursor.close()
+    for trainee in trainees:
+        trainee['trainer_name'] = names.get(trainee.pop('registered_by'))
+    return trainees
+
+
+def build_tasks(mode, trainees):
+    """Split trainees into pool tasks; returns (render function, [(task, certificates)])"""
+    if mode == 'training':
+        sessions = {}
+        for trainee in trainees:
+            sessions.setdefault((trainee['training_id'], trainee['training_title']), []).append(trainee)
+        tasks = []
+        for (training_id, title), members in sessions.items():
+            safe_title = ''.join(ch if ch.isalnum() else '_' for ch in title).strip('_')
+            filename = f"training_{training_id}_{safe_title or 'session'}.pdf"
+            tasks.append(((filename, f"Certificates - {title}", members), len(members)))
+        return certificates.render_training, tasks
+
+    size = config.CERTIFICATE_CHUNK_SIZE
+    chunks = [trainees[i:i + size] for i in range(0, len(trainees), size)]
+    return certificates.render_chunk, [(chunk, len(chunk)) for chunk in chunks]
+
+
+def create_job(connection, requested_by, mode, filters):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO certificate_jobs (requested_by, mode, filters, status) VALUES (%s, %s, %s, 'pending')",
+            (requested_by, mode, json.dumps(filters))
+        )
+        connection.commit()
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+
+
+def get_job(connection, job_id):
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM certificate_jobs WHERE id = %s", (job_id,))
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def claim_job(connection, job_id):
+    """Atomically take ownership of a pending or stale job"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            UPDATE certificate_jobs
+            SET status = 'running', claimed_by = %s, heartbeat_at = NOW(), done = 0
+            WHERE id = %s
+              AND (status = 'pending'
+                   OR (status = 'running' AND heartbeat_at < NOW() - INTERVAL %s SECOND))
+        """, (worker_id(), job_id, STALE_AFTER_SECONDS))
+        connection.commit()
+        return cursor.rowcount == 1
+    finally:
+        cursor.close()
+
+
+def update_job(connection, job_id, **fields):
+    assignments = ', '.join(f"{name} = %s" for name in fields)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            f"UPDATE certificate_jobs SET {assignments}, heartbeat_at = NOW() WHERE id = %s",
+            (*fields.values(), job_id)
+        )
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def run_job(job_id):
+    """Claim and run a certificate job; returns True if it completed here"""
+    connection = get_db_connection()
+    if not connection:
+        return False
+
+    tmp_path = f"{zip_path(job_id)}.tmp"
+    try:
+        if not claim_job(connection, job_id):
+            return False
+        job = get_job(connection, job_id)
+        trainees = select_trainees(connection, job['mode'], json.loads(job['filters']))
+        update_job(connection, job_id, total=len(trainees))
+
+        render, tasks = build_tasks(job['mode'], trainees)
+        os.makedirs(config.CERTIFICATES_DIR, exist_ok=True)
+        done = 0
+        last_progress = time.monotonic()
+        # PDF pages are already compressed; storing keeps zipping off the critical path
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as bundle:
+            results = get_executor().map(render, [task for task, _ in tasks])
+            for (_, count), files in zip(tasks, results):
+                for filename, pdf in files:
+                    bundle.writestr(filename, pdf)
+                done += count
+                if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                    update_job(connection, job_id, done=done)
+                    last_progress = time.monotonic()
+
+        os.replace(tmp_path, zip_path(job_id))
+        update_job(connection, job_id, done=done, status='completed')
+        return True
+
+    except Exception as e:
+        print(f"Certificate job {job_id} failed: {e}")
+        if isinstance(e, BrokenProcessPool):
+            reset_executor()
+        try:
+            update_job(connection, job_id, status='failed', error=str(e)[:500])
+        except mysql.connector.Error as status_error:
+            print(f"Certificate job {job_id} status update error: {status_error}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    finally:
+        connection.close()
+
+
+def start_job(job_id):
+    thread = threading.Thread(target=run_job, args=(job_id,), name=f"certificate-job-{job_id}", daemon=True)
+    thread.start()
+    return thread
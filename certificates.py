@@ -0,0 +1,160 @@
+"""Trainee completion certificates rendered with reportlab.
+
+Rendering runs in a process pool. Each pool process loads the logo and font
+metrics once in init_worker(), and every certificate reuses a Form XObject
+holding the page parts that never change (border, logo, headings, signature
+lines). A merged per-training PDF therefore stores that artwork only once.
+
+This module needs only reportlab and the standard library, so spawned pool
+processes start quickly. reportlab itself is imported inside the rendering
+functions, as in exports.py: the web app imports this module through
+certificate_jobs and should not load reportlab until a job renders.
+"""
+import os
+from datetime import date, datetime
+from io import BytesIO
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'images', 'suraksha-logo.png')
+# Landscape A4 in points (reportlab's landscape(A4))
+PAGE_SIZE = (297 * 72 / 25.4, 210 * 72 / 25.4)
+FRAME_NAME = 'certificate_frame'
+
+SKILLS = (
+    ('cpr_training', 'Cardiopulmonary Resuscitation (CPR)'),
+    ('life_saving_skills', 'Life Saving Skills'),
+    ('first_aid_kit_given', 'First Aid (kit issued)'),
+)
+
+_logo = None
+
+
+def init_worker():
+    """Pool initializer: load shared resources once per process"""
+    from reportlab import rl_config
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase import pdfmetrics
+
+    global _logo
+    # Binary streams: ASCII85-encoding the logo in pure Python was most of
+    # the per-certificate cost
+    rl_config.useA85 = 0
+    _logo = ImageReader(LOGO_PATH)
+    for font in ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'):
+        pdfmetrics.getFont(font)
+
+
+def certificate_number(trainee):
+    return f"SUR-{trainee['id']:06d}"
+
+
+def certificate_filename(trainee):
+    safe_name = ''.join(ch if ch.isalnum() else '_' for ch in trainee['name']).strip('_')
+    return f"{certificate_number(trainee)}_{safe_name or 'trainee'}.pdf"
+
+
+def _format_date(value):
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%d %B %Y')
+    return str(value or '')
+
+
+def _draw_frame(c):
+    """Static artwork shared by every certificate page"""
+    from reportlab.lib import colors
+    from reportlab.lib.utils import ImageReader
+
+    width, height = PAGE_SIZE
+    c.setStrokeColor(colors.HexColor('#1e3a8a'))
+    c.setLineWidth(6)
+    c.rect(24, 24, width - 48, height - 48)
+    c.setLineWidth(1.5)
+    c.rect(36, 36, width - 72, height - 72)
+
+    logo = _logo or ImageReader(LOGO_PATH)
+    c.drawImage(logo, width / 2 - 40, height - 150, width=80, height=80,
+                preserveAspectRatio=True, mask='auto')
+
+    c.setFillColor(colors.HexColor('#1e3a8a'))
+    c.setFont('Helvetica-Bold', 30)
+    c.drawCentredString(width / 2, height - 190, 'Certificate of Completion')
+    c.setFillColor(colors.black)
+    c.setFont('Helvetica', 14)
+    c.drawCentredString(width / 2, height - 225, 'This is to certify that')
+
+    c.setLineWidth(1)
+    for x in (120, width - 300):
+        c.line(x, 110, x + 180, 110)
+    c.setFont('Helvetica', 11)
+    c.drawCentredString(210, 95, 'Trainer')
+    c.drawCentredString(width - 210, 95, 'SURAKSHA Programme')
+
+
+def _draw_certificate(c, trainee):
+    width, height = PAGE_SIZE
+    c.doForm(FRAME_NAME)
+
+    c.setFont('Helvetica-Bold', 26)
+    c.drawCentredString(width / 2, height - 270, trainee['name'])
+
+    details = ', '.join(part for part in (trainee.get('designation'), trainee.get('department')) if part)
+    c.setFont('Helvetica', 13)
+    if details:
+        c.drawCentredString(width / 2, height - 295, details)
+    c.drawCentredString(
+        width / 2, height - 325,
+        f"has completed training at {trainee['block']} block on {_format_date(trainee['training_date'])}"
+    )
+
+    skills = [label for column, label in SKILLS if trainee.get(column)]
+    c.setFont('Helvetica-Oblique', 12)
+    for offset, label in enumerate(skills):
+        c.drawCentredString(width / 2, height - 355 - offset * 18, label)
+
+    c.setFont('Helvetica', 12)
+    c.drawCentredString(210, 116, trainee.get('trainer_name') or '')
+    c.setFont('Helvetica', 9)
+    c.drawString(48, 48, f"Certificate No. {certificate_number(trainee)}")
+    c.drawRightString(width - 48, 48, f"Issued {_format_date(date.today())}")
+    c.showPage()
+
+
+def _new_canvas(output, title):
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(output, pagesize=PAGE_SIZE, pageCompression=1)
+    c.setTitle(title)
+    c.setAuthor('SURAKSHA')
+    c.beginForm(FRAME_NAME)
+    _draw_frame(c)
+    c.endForm()
+    return c
+
+
+def render_certificate(trainee):
+    """Render a single trainee's certificate and return the PDF bytes"""
+    output = BytesIO()
+    c = _new_canvas(output, f"Certificate - {trainee['name']}")
+    _draw_certificate(c, trainee)
+    c.save()
+    return output.getvalue()
+
+
+def render_merged(trainees, title):
+    """Render one PDF with a certificate page per trainee"""
+    output = BytesIO()
+    c = _new_canvas(output, title)
+    for trainee in trainees:
+        _draw_certificate(c, trainee)
+    c.save()
+    return output.getvalue()
+
+
+def render_chunk(trainees):
+    """Pool task: render a chunk of individual certificates as [(filename, pdf)]"""
+    return [(certificate_filename(trainee), render_certificate(trainee)) for trainee in trainees]
+
+
+def render_training(args):
+    """Pool task: render one training's merged certificate batch as [(filename, pdf)]"""
+    filename, title, trainees = args
+    return [(filename, render_merged(trainees, title))]
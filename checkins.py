@@ -0,0 +1,287 @@
+"""Group-committed attendance check-ins.
+
+At a training camp hundreds of trainees are checked in within minutes.
+Request threads do not write them one by one: submit() validates the
+events, puts them on this process's queue and waits. One flusher thread
+per process takes everything queued - up to CHECKIN_BATCH_SIZE events, as
+soon as that many are waiting or the oldest has waited
+CHECKIN_FLUSH_INTERVAL - and writes it with one multi-row INSERT and one
+commit per shard. submit() returns only after that commit, so an
+acknowledged check-in is durable; while a flush runs, the next batch fills
+up, so batches grow with the load instead of commits multiplying.
+
+Check-ins are stored with their training, on its district shard (the id
+range says which). attendance has no foreign keys, so each flush looks up
+the batch's trainings and trainees on the shard in one query first: a
+check-in for a training or trainee that does not exist, or, for a
+professional, a training they do not conduct, is reported as invalid and
+not stored. (training_id, trainee_id) is unique, so a check-in sent twice -
+a retry after a dropped response, or two volunteers scanning the same card
+- is stored once and acknowledged both times.
+
+When more than CHECKIN_MAX_PENDING events are already waiting, submit()
+raises QueueFull instead of queueing more; the client retries later.
+"""
+import collections
+import os
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+
+import shards
+from config import Config
+from db import get_db_connection
+
+config = Config()
+
+INSERT_CHECKINS = """
+    INSERT IGNORE INTO attendance (training_id, trainee_id, checked_in_at, recorded_by)
+    VALUES (%s, %s, %s, %s)
+"""
+
+# The trainings and trainees a batch refers to, with each training's owner
+LOOKUP_QUERY = """
+    SELECT 'training', id, conducted_by FROM trainings WHERE id IN ({trainings})
+    UNION ALL
+    SELECT 'trainee', id, NULL FROM trainees WHERE id IN ({trainees})
+"""
+
+# Seconds of flushes the ingest rate is averaged over
+RATE_WINDOW = 10
+
+
+class QueueFull(Exception):
+    pass
+
+
+def parse_event(event):
+    """Return ((shard, row), None) for a usable check-in, or (None, error message)"""
+    if not isinstance(event, dict):
+        return None, 'Entry must be an object'
+    try:
+        training_id = int(event['training_id'])
+        trainee_id = int(event['trainee_id'])
+    except (KeyError, TypeError, ValueError):
+        return None, 'training_id and trainee_id are required'
+    shard = shards.shard_for_id(training_id)
+    if shard is None:
+        return None, 'Unknown training'
+    if shards.shard_for_id(trainee_id) != shard:
+        return None, 'Trainee and training are in different districts'
+    checked_in_at = event.get('checked_in_at')
+    try:
+        checked_in_at = datetime.fromisoformat(checked_in_at) if checked_in_at else datetime.now()
+    except (TypeError, ValueError):
+        return None, 'Invalid checked_in_at'
+    return (shard, (training_id, trainee_id, checked_in_at)), None
+
+
+class _Ticket:
+    """One submit() call's events, done once they are committed (or failed)"""
+
+    def __init__(self, rows, recorded_by, conducted_by):
+        self.rows = rows
+        self.recorded_by = recorded_by
+        self.conducted_by = conducted_by
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.error = None
+        # Per row: None once stored, else why it was refused
+        self.errors = [None] * len(rows)
+
+
+class CheckinQueue:
+    def __init__(self, batch_size=500, flush_interval=0.02, max_pending=20000, ack_timeout=10):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.ack_timeout = ack_timeout
+        self._tickets = collections.deque()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._flusher_pid = None
+        self._recent = collections.deque()
+        self.accepted = 0
+        self.stored = 0
+        self.invalid = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_batch_size = 0
+
+    def _ensure_flusher(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        if self._flusher_pid != os.getpid():
+            self._flusher_pid = os.getpid()
+            self._tickets.clear()
+            self._pending = 0
+            threading.Thread(target=self._run, name='checkin-flusher', daemon=True).start()
+
+    def submit(self, rows, recorded_by, conducted_by=None):
+        """Queue [(shard, row)] and wait until they are committed.
+
+        With conducted_by set, only check-ins to trainings that user conducts
+        are stored. Returns one entry per row: None if it was stored, else
+        why it was not. Raises QueueFull if the queue is over max_pending,
+        TimeoutError if the flush does not finish within ack_timeout, or the
+        flush's database error.
+        """
+        if not rows:
+            return []
+        ticket = _Ticket(rows, recorded_by, conducted_by)
+        with self._cond:
+            self._ensure_flusher()
+            if self._pending + len(rows) > self.max_pending:
+                self.rejected += len(rows)
+                raise QueueFull(f"{self._pending} check-ins already waiting")
+            self._tickets.append(ticket)
+            self._pending += len(rows)
+            self.accepted += len(rows)
+            self._cond.notify()
+        if not ticket.done.wait(self.ack_timeout):
+            # Still queued or in flight; the client's retry is harmless
+            raise TimeoutError('Check-ins not confirmed in time')
+        if ticket.error is not None:
+            raise ticket.error
+        return ticket.errors
+
+    def _take_batch(self):
+        """Block until a batch is due, then take whole tickets up to batch_size events"""
+        with self._cond:
+            while not self._tickets:
+                self._cond.wait()
+            while self._pending < self.batch_size:
+                remaining = self._tickets[0].queued_at + self.flush_interval - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            while self._tickets and (not batch or size + len(self._tickets[0].rows) <= self.batch_size):
+                ticket = self._tickets.popleft()
+                batch.append(ticket)
+                size += len(ticket.rows)
+            self._pending -= size
+            return batch, size
+
+    @staticmethod
+    def _refusal(ticket, row, trainings, trainees):
+        training_id, trainee_id, _ = row
+        if training_id not in trainings:
+            return 'Unknown training'
+        if trainee_id not in trainees:
+            return 'Unknown trainee'
+        if ticket.conducted_by is not None and trainings[training_id] != ticket.conducted_by:
+            return 'Not your training'
+        return None
+
+    def _write(self, shard, entries):
+        """Store [(ticket, index, row)] on shard; refusals go on the tickets and their count is returned"""
+        connection = get_db_connection(shard=shard)
+        if not connection:
+            raise mysql.connector.errors.InterfaceError(f"Shard {shard} connection failed")
+        training_ids = sorted({row[0] for _, _, row in entries})
+        trainee_ids = sorted({row[1] for _, _, row in entries})
+        cursor = connection.cursor()
+        try:
+            connection.start_transaction()
+            cursor.execute(LOOKUP_QUERY.format(trainings=', '.join(['%s'] * len(training_ids)),
+                                               trainees=', '.join(['%s'] * len(trainee_ids))),
+                           training_ids + trainee_ids)
+            trainings, trainees = {}, set()
+            for kind, record_id, conducted_by in cursor.fetchall():
+                if kind == 'training':
+                    trainings[record_id] = conducted_by
+                else:
+                    trainees.add(record_id)
+
+            rows, refused = [], []
+            for ticket, index, row in entries:
+                refusal = self._refusal(ticket, row, trainings, trainees)
+                if refusal:
+                    refused.append((ticket, index, refusal))
+                else:
+                    rows.append(row + (ticket.recorded_by,))
+            if rows:
+                # executemany sends the INSERT as one multi-row statement
+                cursor.executemany(INSERT_CHECKINS, rows)
+            connection.commit()
+        except mysql.connector.Error:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+            connection.close()
+        for ticket, index, refusal in refused:
+            ticket.errors[index] = refusal
+        return len(refused)
+
+    def _flush(self, batch):
+        """Write a batch; returns (stored, invalid) event counts"""
+        by_shard = {}
+        for ticket in batch:
+            for index, (shard, row) in enumerate(ticket.rows):
+                by_shard.setdefault(shard, []).append((ticket, index, row))
+        failed = {}
+        invalid = 0
+        for shard, entries in by_shard.items():
+            try:
+                invalid += self._write(shard, entries)
+            except mysql.connector.Error as e:
+                print(f"Check-in flush error on shard {shard}: {e}")
+                failed[shard] = e
+        for ticket in batch:
+            ticket.error = next((failed[shard] for shard, _ in ticket.rows if shard in failed), None)
+            ticket.done.set()
+        written = sum(len(entries) for shard, entries in by_shard.items() if shard not in failed)
+        return written - invalid, invalid
+
+    def _run(self):
+        while True:
+            batch, size = self._take_batch()
+            started = time.monotonic()
+            try:
+                stored, invalid = self._flush(batch)
+            except Exception as e:
+                # Never leave submitters waiting on a dead flusher
+                for ticket in batch:
+                    if not ticket.done.is_set():
+                        ticket.error = e
+                        ticket.done.set()
+                stored, invalid = 0, 0
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self.batches += 1
+                self.stored += stored
+                self.invalid += invalid
+                self.failed += size - stored - invalid
+                self.last_batch_size = size
+                self.flush_seconds += elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                now = time.monotonic()
+                self._recent.append((now, stored))
+                while self._recent and self._recent[0][0] < now - RATE_WINDOW:
+                    self._recent.popleft()
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            recent = sum(count for at, count in self._recent if at >= now - RATE_WINDOW)
+            return {
+                'pending': self._pending,
+                'accepted': self.accepted,
+                'stored': self.stored,
+                'invalid': self.invalid,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'batches': self.batches,
+                'ingest_per_second': round(recent / RATE_WINDOW, 1),
+                'last_batch_size': self.last_batch_size,
+                'avg_batch_size': round((self.stored + self.invalid + self.failed) / self.batches, 1)
+                if self.batches else 0,
+                'avg_flush_ms': round(self.flush_seconds / self.batches * 1000, 3) if self.batches else 0,
+                'max_flush_ms': round(self.max_flush_seconds * 1000, 3),
+            }
@@ -0,0 +1,212 @@
+"""WSGI middleware that gzip/brotli-compresses responses as they stream.
+
+Responses are compressed chunk by chunk instead of being buffered, so large
+pages and streamed exports start reaching the client immediately. The
+compressor only emits output as its window fills, which keeps the ratio of
+a one-shot compress; a streaming view that needs what it has yielded so far
+on the wire (a progress line, a finished block of rows) yields an empty
+chunk, and the middleware flushes the compressor at that boundary. Only
+text-like content types are compressed; XLSX, PDF, images and anything that
+already carries a Content-Encoding (e.g. precompressed /assets files) pass
+through untouched. Every response that could have been compressed carries
+Vary: Accept-Encoding, even when it is sent as is, so shared caches keep the
+variants apart.
+"""
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # fall back to gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Statuses whose body is empty or must not be transformed
+SKIP_STATUSES = (204, 206, 304)
+
+
+class GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Negotiate gzip/brotli and compress eligible responses incrementally.
+
+    min_size: responses smaller than this many bytes are sent uncompressed.
+        For streamed responses without a Content-Length, only the first
+        min_size bytes are held back to make that decision.
+    gzip_level / brotli_quality: compression effort, bounding CPU cost.
+    """
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def negotiate(self, environ):
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accept['br']:
+            return 'br'
+        if accept['gzip']:
+            return 'gzip'
+        return None
+
+    def make_stream(self, encoding):
+        if encoding == 'br':
+            return BrotliStream(self.brotli_quality)
+        return GzipStream(self.gzip_level)
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            def vary_start_response(status, headers, exc_info=None):
+                return start_response(status, self._passthrough_headers(status, headers), exc_info)
+            return self.app(environ, vary_start_response)
+
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            captured['exc_info'] = exc_info
+            return write
+
+        def write(data):
+            raise RuntimeError('CompressionMiddleware does not support the WSGI write() callable')
+
+        app_iter = self.app(environ, capture_start_response)
+        if captured and not self._compressible(captured['status'], captured['headers']):
+            # Hand the original iterable back so file wrappers/sendfile still apply
+            start_response(captured['status'], self._passthrough_headers(captured['status'], captured['headers']),
+                           captured['exc_info'])
+            return app_iter
+        return self._respond(app_iter, start_response, captured, encoding)
+
+    def _eligible(self, status, headers):
+        """Whether the response would be compressed for a client that accepts it, size permitting"""
+        if int(status.split(' ', 1)[0]) in SKIP_STATUSES:
+            return False
+        content_type = ''
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == 'content-encoding':
+                return False
+            if lowered == 'content-type':
+                content_type = value.lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _compressible(self, status, headers):
+        if not self._eligible(status, headers):
+            return False
+        for name, value in headers:
+            if name.lower() == 'content-length' and int(value) < self.min_size:
+                return False
+        return True
+
+    def _respond(self, app_iter, start_response, captured, encoding):
+        try:
+            iterator = iter(app_iter)
+            # Flask calls start_response before returning; generators may defer it
+            pending = [] if captured else [next(iterator, b'')]
+            status, headers = captured['status'], captured['headers']
+
+            if not self._compressible(status, headers):
+                start_response(status, self._passthrough_headers(status, headers), captured['exc_info'])
+                yield from pending
+                yield from iterator
+                return
+
+            # Hold back just enough of the body to apply the minimum size
+            size = sum(len(chunk) for chunk in pending)
+            exhausted = False
+            while size < self.min_size:
+                chunk = next(iterator, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending.append(chunk)
+                size += len(chunk)
+
+            if exhausted:
+                start_response(status, self._passthrough_headers(status, headers), captured['exc_info'])
+                yield b''.join(pending)
+                return
+
+            start_response(status, self._compressed_headers(headers, encoding), captured['exc_info'])
+            stream = self.make_stream(encoding)
+            yield stream.compress(b''.join(pending))
+            for chunk in iterator:
+                # An empty chunk marks a boundary the view wants on the wire
+                data = stream.compress(chunk) if chunk else stream.flush()
+                if data:
+                    yield data
+            yield stream.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def _passthrough_headers(self, status, headers):
+        """Headers for a response sent uncompressed, varying on the encoding if it could have been"""
+        if self._eligible(status, headers):
+            return self._vary_headers(headers)
+        return headers
+
+    def _vary_headers(self, headers):
+        result = []
+        vary = None
+        for name, value in headers:
+            if name.lower() == 'vary':
+                vary = value
+                continue
+            result.append((name, value))
+        if not vary:
+            vary = 'Accept-Encoding'
+        elif 'accept-encoding' not in vary.lower():
+            vary = f"{vary}, Accept-Encoding"
+        result.append(('Vary', vary))
+        return result
+
+    def _compressed_headers(self, headers, encoding):
+        result = []
+        for name, value in self._vary_headers(headers):
+            lowered = name.lower()
+            if lowered == 'content-length':
+                continue
+            if lowered == 'etag' and not value.startswith('W/'):
+                value = 'W/' + value
+            result.append((name, value))
+        result.append(('Content-Encoding', encoding))
+        return result
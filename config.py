@@ -9,6 +9,31 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'Karsh123@')
     DB_NAME = os.getenv('DB_NAME', 'suraksha_db')
+    # Connections per process; gunicorn.conf.py sizes the pools from the
+    # worker thread count and the connections one request can hold at once
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    # Read replicas as "host[:port],host[:port]"; empty sends everything to DB_HOST
+    DB_REPLICA_HOSTS = os.getenv('DB_REPLICA_HOSTS', '')
+    DB_REPLICA_POOL_SIZE = int(os.getenv('DB_REPLICA_POOL_SIZE', 5))
+    DB_REPLICA_MAX_LAG = int(os.getenv('DB_REPLICA_MAX_LAG', 5))
+    DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 2))
+    # Reads from a session that just wrote stay on the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', 10))
+    # Driver path (see db.py): C extension unless DB_USE_PURE, and hot
+    # statements prepared once per pooled connection, up to
+    # DB_STATEMENT_CACHE_SIZE per connection
+    DB_USE_PURE = os.getenv('DB_USE_PURE', 'False').lower() == 'true'
+    DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'True').lower() == 'true'
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 32))
+    # District shards (shards.py) as "index:name=host[:port]/database, ...";
+    # the primary (DB_HOST/DB_NAME) is shard 0, "default", and also holds
+    # users, jobs and the district -> shard map. Indexes must never change.
+    DB_SHARDS = os.getenv('DB_SHARDS', '')
+    DB_SHARD_POOL_SIZE = int(os.getenv('DB_SHARD_POOL_SIZE', DB_POOL_SIZE))
+    SHARD_SCATTER_THREADS = int(os.getenv('SHARD_SCATTER_THREADS', 8))
+    DISTRICT_MAP_TTL = float(os.getenv('DISTRICT_MAP_TTL', 60))
+    # District of records written without one (the original single-district rollout)
+    DEFAULT_DISTRICT = os.getenv('DEFAULT_DISTRICT', 'raipur')
     
     # Flask configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-production')
@@ -23,3 +48,99 @@ class Config:
     SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'True').lower() == 'true'
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    
+    # Dashboard fragment cache
+    FRAGMENT_CACHE_ENTRIES = int(os.getenv('FRAGMENT_CACHE_ENTRIES', 256))
+    FRAGMENT_CACHE_MAX_BYTES = int(os.getenv('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Coalescing of identical concurrent reads (singleflight.py); set
+    # SINGLEFLIGHT_DIR (e.g. /dev/shm/suraksha-singleflight) to share across workers
+    SINGLEFLIGHT_DIR = os.getenv('SINGLEFLIGHT_DIR', '')
+    SINGLEFLIGHT_WAIT_TIMEOUT = float(os.getenv('SINGLEFLIGHT_WAIT_TIMEOUT', 60))
+    
+    # List query results (query_cache.py), per process; set QUERY_CACHE_DIR
+    # (e.g. /dev/shm/suraksha-query-cache) for a tier shared across workers
+    QUERY_CACHE_ENTRIES = int(os.getenv('QUERY_CACHE_ENTRIES', 1024))
+    QUERY_CACHE_MAX_BYTES = int(os.getenv('QUERY_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    QUERY_CACHE_DIR = os.getenv('QUERY_CACHE_DIR', '')
+    QUERY_CACHE_SHARED_MAX_BYTES = int(os.getenv('QUERY_CACHE_SHARED_MAX_BYTES', 256 * 1024 * 1024))
+    
+    # Admission control (admission.py). Active plus queued dashboard/export
+    # requests (4 + 2 + 2 by default) must stay below GUNICORN_WORKERS *
+    # GUNICORN_THREADS so interactive routes always find a free thread; set
+    # ADMISSION_DIR (e.g. /dev/shm/suraksha-admission) to share slots across workers
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_DIR = os.getenv('ADMISSION_DIR', '')
+    ADMISSION_DASHBOARD_LIMIT = int(os.getenv('ADMISSION_DASHBOARD_LIMIT', 4))
+    ADMISSION_DASHBOARD_QUEUE = int(os.getenv('ADMISSION_DASHBOARD_QUEUE', 2))
+    ADMISSION_DASHBOARD_WAIT = float(os.getenv('ADMISSION_DASHBOARD_WAIT', 5))
+    ADMISSION_EXPORT_LIMIT = int(os.getenv('ADMISSION_EXPORT_LIMIT', 2))
+    ADMISSION_EXPORT_QUEUE = int(os.getenv('ADMISSION_EXPORT_QUEUE', 2))
+    ADMISSION_EXPORT_WAIT = float(os.getenv('ADMISSION_EXPORT_WAIT', 15))
+    
+    # Response compression
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4))
+    
+    # Cascade deletes of users/professionals
+    CASCADE_BATCH_SIZE = int(os.getenv('CASCADE_BATCH_SIZE', 1000))
+    CASCADE_BATCH_PAUSE = float(os.getenv('CASCADE_BATCH_PAUSE', 0.05))
+    CASCADE_BACKGROUND_THRESHOLD = int(os.getenv('CASCADE_BACKGROUND_THRESHOLD', 5000))
+    
+    # Cold-data archival (archive.py)
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 730))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 1000))
+    
+    # Pre-generated reports (reports.py); with REPORTS_ACCEL_PREFIX set, downloads
+    # are handed to nginx via X-Accel-Redirect instead of being sent by Flask
+    REPORTS_DIR = os.getenv('REPORTS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports'))
+    REPORTS_ACCEL_PREFIX = os.getenv('REPORTS_ACCEL_PREFIX', '')
+    
+    # Bulk certificates (certificate_jobs.py); 0 workers means one per CPU
+    CERTIFICATES_DIR = os.getenv('CERTIFICATES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'certificates'))
+    CERTIFICATE_WORKERS = int(os.getenv('CERTIFICATE_WORKERS', 0))
+    CERTIFICATE_CHUNK_SIZE = int(os.getenv('CERTIFICATE_CHUNK_SIZE', 50))
+    
+    # Offline trainee sync (POST /api/trainees/batch)
+    SYNC_MAX_BATCH = int(os.getenv('SYNC_MAX_BATCH', 500))
+    SYNC_MAX_BODY_BYTES = int(os.getenv('SYNC_MAX_BODY_BYTES', 5 * 1024 * 1024))
+    
+    # Async read API (async_api.py): aiomysql connections per shard per
+    # process, and the live-update stream's poll interval, per-client queue,
+    # client limit and keepalive seconds
+    ASYNC_API_HOST = os.getenv('ASYNC_API_HOST', '127.0.0.1')
+    ASYNC_API_PORT = int(os.getenv('ASYNC_API_PORT', 5005))
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 20))
+    ASYNC_STREAM_POLL_SECONDS = float(os.getenv('ASYNC_STREAM_POLL_SECONDS', 2))
+    ASYNC_STREAM_QUEUE = int(os.getenv('ASYNC_STREAM_QUEUE', 16))
+    ASYNC_STREAM_MAX_CLIENTS = int(os.getenv('ASYNC_STREAM_MAX_CLIENTS', 5000))
+    ASYNC_STREAM_HEARTBEAT = float(os.getenv('ASYNC_STREAM_HEARTBEAT', 15))
+    
+    # Login (passwords.py): werkzeug method for new hashes, hashing threads and
+    # waiting logins per worker, and the failed-attempt lockout
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 16))
+    LOGIN_MAX_FAILURES = int(os.getenv('LOGIN_MAX_FAILURES', 5))
+    LOGIN_FAILURE_WINDOW = int(os.getenv('LOGIN_FAILURE_WINDOW', 300))
+    LOGIN_LOCKOUT_SECONDS = int(os.getenv('LOGIN_LOCKOUT_SECONDS', 300))
+    
+    # Attendance check-ins (checkins.py): events per group commit, seconds the
+    # oldest queued event waits for more, events queued per worker before
+    # new ones are turned away, and seconds a request waits for its commit
+    CHECKIN_BATCH_SIZE = int(os.getenv('CHECKIN_BATCH_SIZE', 500))
+    CHECKIN_FLUSH_INTERVAL = float(os.getenv('CHECKIN_FLUSH_INTERVAL', 0.02))
+    CHECKIN_MAX_PENDING = int(os.getenv('CHECKIN_MAX_PENDING', 20000))
+    CHECKIN_ACK_TIMEOUT = float(os.getenv('CHECKIN_ACK_TIMEOUT', 10))
+    CHECKIN_MAX_REQUEST = int(os.getenv('CHECKIN_MAX_REQUEST', 1000))
+    
+    # Trainee analytics snapshot (trainee_snapshot.py); change log retention
+    # must exceed the snapshot's max age
+    TRAINEE_SNAPSHOT_REFRESH_SECONDS = float(os.getenv('TRAINEE_SNAPSHOT_REFRESH_SECONDS', 5))
+    TRAINEE_SNAPSHOT_MAX_AGE = int(os.getenv('TRAINEE_SNAPSHOT_MAX_AGE', 6 * 3600))
+    TRAINEE_CHANGES_RETAIN_DAYS = int(os.getenv('TRAINEE_CHANGES_RETAIN_DAYS', 2))
+    
+    # Schema migrations: seconds a DDL statement may wait for a metadata lock
+    MIGRATION_LOCK_WAIT_TIMEOUT = int(os.getenv('MIGRATION_LOCK_WAIT_TIMEOUT', 10))
@@ -0,0 +1,9 @@
+-- Adds the table_versions table used by the dashboard fragment cache
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO table_versions (table_name, version) VALUES
+('users', 0), ('trainees', 0), ('trainings', 0);
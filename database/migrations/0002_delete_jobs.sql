@@ -0,0 +1,16 @@
+-- Adds the delete_jobs table used by chunked cascade deletes
+CREATE TABLE IF NOT EXISTS delete_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    role ENUM('admin', 'professional'),
+    status ENUM('pending', 'running', 'completed', 'failed') NOT NULL DEFAULT 'pending',
+    total_trainings INT NOT NULL DEFAULT 0,
+    total_trainees INT NOT NULL DEFAULT 0,
+    trainings_deleted INT NOT NULL DEFAULT 0,
+    trainees_detached INT NOT NULL DEFAULT 0,
+    claimed_by VARCHAR(100),
+    heartbeat_at DATETIME,
+    error VARCHAR(500),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_delete_jobs_status (status)
+);
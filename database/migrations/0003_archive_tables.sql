@@ -0,0 +1,10 @@
+-- Cold storage for old trainees/trainings (same columns and indexes, no
+-- foreign keys); rows are moved here by archive.py
+CREATE TABLE IF NOT EXISTS trainees_archive LIKE trainees;
+CREATE TABLE IF NOT EXISTS trainings_archive LIKE trainings;
+
+-- Date before which rows of each table may have been archived
+CREATE TABLE IF NOT EXISTS archive_state (
+    table_name VARCHAR(64) PRIMARY KEY,
+    archived_before DATE NOT NULL
+);
@@ -0,0 +1,47 @@
+-- Composite indexes matching the filters and sort orders used in app.py.
+-- Built in place without blocking reads or writes (ALGORITHM=INPLACE, LOCK=NONE).
+
+-- login: username lookup is served by the UNIQUE key; professionals lists
+-- filter by role and sort by name; exports sort by created_at
+ALTER TABLE users
+    ADD INDEX idx_users_role_name (role, name),
+    ADD INDEX idx_users_created_at (created_at),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- professional dashboard / list API: registered_by = ? ORDER BY name
+-- admin lists sort by name; date ranges and archival scan training_date;
+-- exports sort by created_at; reports slice by block and department
+ALTER TABLE trainees
+    ADD INDEX idx_trainees_registered_by_name (registered_by, name),
+    ADD INDEX idx_trainees_name (name),
+    ADD INDEX idx_trainees_training_date (training_date),
+    ADD INDEX idx_trainees_created_at (created_at),
+    ADD INDEX idx_trainees_block_date (block, training_date),
+    ADD INDEX idx_trainees_department (department),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- professional dashboard / list API: conducted_by = ? ORDER BY training_date DESC
+-- admin lists sort by training_date; exports sort by created_at
+ALTER TABLE trainings
+    ADD INDEX idx_trainings_conducted_by_date (conducted_by, training_date),
+    ADD INDEX idx_trainings_training_date (training_date),
+    ADD INDEX idx_trainings_created_at (created_at),
+    ADD INDEX idx_trainings_block_date (block, training_date),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Archive tables serve the same queries when a date range reaches them
+ALTER TABLE trainees_archive
+    ADD INDEX idx_trainees_registered_by_name (registered_by, name),
+    ADD INDEX idx_trainees_name (name),
+    ADD INDEX idx_trainees_training_date (training_date),
+    ADD INDEX idx_trainees_created_at (created_at),
+    ADD INDEX idx_trainees_block_date (block, training_date),
+    ADD INDEX idx_trainees_department (department),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE trainings_archive
+    ADD INDEX idx_trainings_conducted_by_date (conducted_by, training_date),
+    ADD INDEX idx_trainings_training_date (training_date),
+    ADD INDEX idx_trainings_created_at (created_at),
+    ADD INDEX idx_trainings_block_date (block, training_date),
+    ALGORITHM=INPLACE, LOCK=NONE;
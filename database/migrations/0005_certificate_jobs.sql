@@ -0,0 +1,15 @@
+-- Adds the certificate_jobs table used by bulk certificate generation
+CREATE TABLE IF NOT EXISTS certificate_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    requested_by INT NOT NULL,
+    mode ENUM('trainee', 'training') NOT NULL DEFAULT 'trainee',
+    filters VARCHAR(500) NOT NULL DEFAULT '{}',
+    status ENUM('pending', 'running', 'completed', 'failed') NOT NULL DEFAULT 'pending',
+    total INT NOT NULL DEFAULT 0,
+    done INT NOT NULL DEFAULT 0,
+    claimed_by VARCHAR(100),
+    heartbeat_at DATETIME,
+    error VARCHAR(500),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_certificate_jobs_status (status)
+);
@@ -0,0 +1,13 @@
+-- Client-generated idempotency keys for trainees captured offline and synced
+-- in batches; the unique index makes replayed uploads insert nothing.
+-- Archive tables get the column too so INSERT ... SELECT * and the
+-- hot/archive UNION keep matching column lists.
+ALTER TABLE trainees
+    ADD COLUMN client_key CHAR(36) NULL,
+    ADD UNIQUE INDEX uq_trainees_client_key (client_key),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE trainees_archive
+    ADD COLUMN client_key CHAR(36) NULL,
+    ADD UNIQUE INDEX uq_trainees_archive_client_key (client_key),
+    ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,21 @@
+-- Change stream for trainees: every insert, update and delete (including
+-- cascade deletes and archival) appends the row id here. In-process
+-- analytics snapshots (trainee_snapshot.py) poll it by seq and re-read only
+-- the changed rows. Old entries are purged by `trainee_snapshot.py --purge`.
+-- With binary logging on, creating triggers needs SUPER or
+-- log_bin_trust_function_creators=1.
+CREATE TABLE IF NOT EXISTS trainee_changes (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    trainee_id INT NOT NULL,
+    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_trainee_changes_changed_at (changed_at)
+);
+
+CREATE TRIGGER trainees_changes_insert AFTER INSERT ON trainees
+    FOR EACH ROW INSERT INTO trainee_changes (trainee_id) VALUES (NEW.id);
+
+CREATE TRIGGER trainees_changes_update AFTER UPDATE ON trainees
+    FOR EACH ROW INSERT INTO trainee_changes (trainee_id) VALUES (NEW.id);
+
+CREATE TRIGGER trainees_changes_delete AFTER DELETE ON trainees
+    FOR EACH ROW INSERT INTO trainee_changes (trainee_id) VALUES (OLD.id);
@@ -0,0 +1,58 @@
+-- Multi-district rollout (shards.py). Blocks were an ENUM of one district's
+-- six blocks; they become text checked against district_blocks, and every
+-- trainee and training records its district, which decides the database
+-- (shard) it is stored on. districts and district_blocks are read on the
+-- primary only; `migrate.py --shard` applies this file to every shard as
+-- well, where they simply stay empty.
+CREATE TABLE IF NOT EXISTS districts (
+    code VARCHAR(32) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    shard VARCHAR(64) NOT NULL DEFAULT 'default',
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS district_blocks (
+    district_code VARCHAR(32) NOT NULL,
+    block VARCHAR(64) NOT NULL,
+    PRIMARY KEY (district_code, block),
+    FOREIGN KEY (district_code) REFERENCES districts(code) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO districts (code, name, shard) VALUES ('raipur', 'Raipur', 'default');
+
+INSERT IGNORE INTO district_blocks (district_code, block) VALUES
+('raipur', 'Raipur'), ('raipur', 'Birgaon'), ('raipur', 'Abhanpur'),
+('raipur', 'Arang'), ('raipur', 'Dhariswa'), ('raipur', 'Tilda');
+
+-- Home district of a professional; NULL (admins) means every district
+ALTER TABLE users
+    ADD COLUMN district VARCHAR(32) NULL,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Owners live in users on the primary only, so a shard cannot check them;
+-- cascade_delete.py removes an owner's rows from every shard itself
+ALTER TABLE trainees DROP FOREIGN KEY trainees_ibfk_1;
+ALTER TABLE trainings DROP FOREIGN KEY trainings_ibfk_1;
+
+-- ENUM -> VARCHAR rebuilds the tables (no INPLACE); run off-peak. The
+-- archive tables change identically so INSERT ... SELECT * and the
+-- hot/archive UNION keep matching column lists.
+ALTER TABLE trainees
+    MODIFY block VARCHAR(64) NOT NULL,
+    ADD COLUMN district VARCHAR(32) NOT NULL DEFAULT 'raipur' AFTER block,
+    ADD INDEX idx_trainees_district_block (district, block, training_date);
+
+ALTER TABLE trainees_archive
+    MODIFY block VARCHAR(64) NOT NULL,
+    ADD COLUMN district VARCHAR(32) NOT NULL DEFAULT 'raipur' AFTER block,
+    ADD INDEX idx_trainees_archive_district_block (district, block, training_date);
+
+ALTER TABLE trainings
+    MODIFY block VARCHAR(64) NOT NULL,
+    ADD COLUMN district VARCHAR(32) NOT NULL DEFAULT 'raipur' AFTER block,
+    ADD INDEX idx_trainings_district_block (district, block, training_date);
+
+ALTER TABLE trainings_archive
+    MODIFY block VARCHAR(64) NOT NULL,
+    ADD COLUMN district VARCHAR(32) NOT NULL DEFAULT 'raipur' AFTER block,
+    ADD INDEX idx_trainings_archive_district_block (district, block, training_date);
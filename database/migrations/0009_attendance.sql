@@ -0,0 +1,14 @@
+-- Attendance check-ins (checkins.py), stored on the training's shard. No
+-- foreign keys: trainees and trainings may be archived while their
+-- check-ins stay, and per-row FK lookups would slow the bulk inserts. The
+-- unique key makes a check-in sent twice insert nothing the second time.
+CREATE TABLE IF NOT EXISTS attendance (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    training_id INT NOT NULL,
+    trainee_id INT NOT NULL,
+    checked_in_at DATETIME NOT NULL,
+    recorded_by INT NULL,
+    received_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_attendance_training_trainee (training_id, trainee_id),
+    INDEX idx_attendance_trainee (trainee_id)
+);
@@ -0,0 +1,11 @@
+-- Deleting a professional detaches their trainees (cascade_delete.py sets
+-- registered_by to NULL) rather than deleting them, so the trainee records
+-- and their certificates survive the owner. Making a column nullable is an
+-- online change; it still rebuilds the table, so run it off-peak.
+ALTER TABLE trainees
+    MODIFY registered_by INT NULL,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE trainees_archive
+    MODIFY registered_by INT NULL,
+    ALGORITHM=INPLACE, LOCK=NONE;
@@ -1,3 +1,6 @@
+-- Baseline schema. Later changes live in database/migrations and are applied
+-- with `python migrate.py`.
+
 -- Create database
 CREATE DATABASE IF NOT EXISTS suraksha_db;
 USE suraksha_db;
@@ -0,0 +1,360 @@
+"""Database connection handling.
+
+Each process keeps its own connection pools, created lazily on first use so
+that gunicorn workers forked from a preloaded master never share sockets.
+Pooled connections are returned to the pool by connection.close(), so the
+routes keep their usual open/close pattern. A pool does not wait for a free
+connection: when all are out, get_db_connection() fails, so each pool is
+sized for the most connections its worker's threads can hold at once (see
+gunicorn.conf.py).
+
+Writes always go to the primary (DB_HOST). Read-only routes ask for
+get_db_connection(read_only=True) and are served by one of DB_REPLICA_HOSTS
+when possible, falling back to the primary when:
+
+* the current session wrote within DB_READ_YOUR_WRITES_SECONDS, so a user
+  always sees the record they just saved;
+* a replica reports more than DB_REPLICA_MAX_LAG seconds of lag, has
+  replication stopped, or cannot be reached (it is skipped until its next
+  check, every DB_REPLICA_CHECK_INTERVAL seconds).
+
+Connections use the driver's C extension unless DB_USE_PURE is set (or the
+extension is not installed). run_statement() executes the hot statements
+(logins, list queries, inserts, table version lookups) as server-side
+prepared statements: each is prepared once per pooled connection, kept in
+a small per-connection LRU and re-executed with new parameters over the
+binary protocol. Prepared statements live in the server session, so with
+DB_PREPARED_STATEMENTS on the pools do not reset sessions when connections
+are returned; a transaction a route left open is rolled back on checkout
+instead.
+
+Districts can live on separate databases (DB_SHARDS, see shards.py):
+get_db_connection(shard=name) connects to one. Shard 0, DEFAULT_SHARD, is
+the primary itself, with its replicas; other shards have no replicas.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import mysql.connector
+from flask import has_request_context, session
+from mysql.connector import pooling
+
+from config import Config
+
+config = Config()
+
+DB_CONFIG = {
+    'host': config.DB_HOST,
+    'user': config.DB_USER,
+    'password': config.DB_PASSWORD,
+    'database': config.DB_NAME,
+    'charset': 'utf8mb4',
+    'use_unicode': True,
+    'use_pure': config.DB_USE_PURE
+}
+
+# Rows and write results of one run_statement() call
+Statement = namedtuple('Statement', ['columns', 'rows', 'rowcount', 'lastrowid'])
+
+# Session key holding the time of the session's last write
+LAST_WRITE_KEY = '_db_last_write'
+
+# The primary database, shard 0
+DEFAULT_SHARD = 'default'
+
+
+def parse_hosts(value):
+    """Parse 'host[:port], ...' into a list of (host, port) tuples"""
+    hosts = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port) if port else 3306))
+    return hosts
+
+
+def parse_shards(value):
+    """Parse 'index:name=host[:port]/database, ...' into {name: (index, host, port, database)}"""
+    shards = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        label, _, location = item.partition('=')
+        index, _, name = label.partition(':')
+        address, _, database = location.partition('/')
+        if not (index.strip().isdigit() and name.strip() and address and database):
+            raise ValueError(f"Invalid DB_SHARDS entry: {item}")
+        if int(index) == 0 or name.strip() == DEFAULT_SHARD:
+            raise ValueError(f"Shard 0 ({DEFAULT_SHARD}) is the primary database: {item}")
+        (host, port), = parse_hosts(address)
+        shards[name.strip()] = (int(index), host, port, database.strip())
+    indexes = [index for index, _, _, _ in shards.values()]
+    if len(set(indexes)) != len(indexes):
+        raise ValueError("DB_SHARDS indexes must be unique")
+    return shards
+
+
+REPLICAS = parse_hosts(config.DB_REPLICA_HOSTS)
+SHARDS = parse_shards(config.DB_SHARDS)
+
+_pools = {}
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+# replica -> (checked_at, healthy); per process, refreshed every check interval
+_replica_health = {}
+_replica_cycle = itertools.cycle(range(len(REPLICAS))) if REPLICAS else None
+
+
+def get_pool(replica=None, shard=None):
+    """Return this process's pool for the primary (or a replica, or a shard), creating it after fork if needed"""
+    global _pool_pid
+    key = ('shard', shard) if shard else replica
+    if _pool_pid != os.getpid() or key not in _pools:
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                _pools.clear()
+                _replica_health.clear()
+                _pool_pid = os.getpid()
+            if key not in _pools:
+                settings = dict(DB_CONFIG)
+                if shard:
+                    index, settings['host'], settings['port'], settings['database'] = SHARDS[shard]
+                    name = f"suraksha_{os.getpid()}_s{index}"
+                    size = config.DB_SHARD_POOL_SIZE
+                elif replica is None:
+                    name = f"suraksha_{os.getpid()}"
+                    size = config.DB_POOL_SIZE
+                else:
+                    settings['host'], settings['port'] = replica
+                    name = f"suraksha_{os.getpid()}_r{REPLICAS.index(replica)}"
+                    size = config.DB_REPLICA_POOL_SIZE
+                _pools[key] = pooling.MySQLConnectionPool(
+                    pool_name=name,
+                    pool_size=min(size, pooling.CNX_POOL_MAXSIZE),
+                    pool_reset_session=not config.DB_PREPARED_STATEMENTS,
+                    autocommit=True,
+                    **settings
+                )
+    return _pools[key]
+
+
+def checkout(pool):
+    """Take a connection from pool, discarding any transaction its last user left open"""
+    connection = pool.get_connection()
+    if not pool.reset_session and connection.in_transaction:
+        connection.rollback()
+    return connection
+
+
+def driver_info():
+    """Describe the driver path connections take"""
+    return {
+        'c_extension': mysql.connector.HAVE_CEXT and not config.DB_USE_PURE,
+        'prepared_statements': config.DB_PREPARED_STATEMENTS,
+        'statement_cache_size': config.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def note_session_write():
+    """Pin the current session's reads to the primary for a short while"""
+    if has_request_context():
+        session[LAST_WRITE_KEY] = time.time()
+
+
+def session_recently_wrote():
+    if not has_request_context():
+        return False
+    last_write = session.get(LAST_WRITE_KEY)
+    return last_write is not None and time.time() - last_write < config.DB_READ_YOUR_WRITES_SECONDS
+
+
+def replica_lag(connection):
+    """Return replication lag in seconds, or None if the replica is not replicating"""
+    cursor = connection.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            # MySQL < 8.0.22 and MariaDB
+            cursor.execute("SHOW SLAVE STATUS")
+        status = cursor.fetchone()
+        if not status:
+            return None
+        lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        return None if lag is None else int(lag)
+    finally:
+        cursor.close()
+
+
+def replica_connection():
+    """Return a connection to a healthy, caught-up replica, or None"""
+    now = time.time()
+    for _ in range(len(REPLICAS)):
+        replica = REPLICAS[next(_replica_cycle)]
+        checked_at, healthy = _replica_health.get(replica, (0, True))
+        check_due = now - checked_at >= config.DB_REPLICA_CHECK_INTERVAL
+        if not healthy and not check_due:
+            continue
+
+        try:
+            connection = checkout(get_pool(replica))
+        except mysql.connector.errors.PoolError:
+            # All of this replica's connections are busy; try the next one
+            continue
+        except mysql.connector.Error as e:
+            print(f"Replica {replica[0]}:{replica[1]} connection error: {e}")
+            _replica_health[replica] = (now, False)
+            continue
+
+        if check_due:
+            try:
+                lag = replica_lag(connection)
+            except mysql.connector.Error as e:
+                print(f"Replica {replica[0]}:{replica[1]} status error: {e}")
+                lag = None
+            healthy = lag is not None and lag <= config.DB_REPLICA_MAX_LAG
+            _replica_health[replica] = (now, healthy)
+            if not healthy:
+                connection.close()
+                continue
+        return connection
+    return None
+
+
+def get_db_connection(read_only=False, shard=None):
+    if shard and shard != DEFAULT_SHARD:
+        try:
+            return checkout(get_pool(shard=shard))
+        except mysql.connector.Error as e:
+            print(f"Shard {shard} connection error: {e}")
+            return None
+    if read_only and REPLICAS and not session_recently_wrote():
+        connection = replica_connection()
+        if connection is not None:
+            return connection
+    try:
+        return checkout(get_pool())
+    except mysql.connector.Error as e:
+        print(f"Database connection error: {e}")
+        return None
+
+
+class _StatementCache:
+    """Prepared cursors of one server session, least recently used first"""
+
+    def __init__(self, connection_id):
+        self.connection_id = connection_id
+        self.cursors = OrderedDict()
+
+
+def _prepared_cursor(connection, query, dictionary):
+    """Return (query, cursor) with query prepared on connection's session.
+
+    The cache hangs off the underlying connection, which outlives the pool's
+    wrapper, and is dropped when the driver reconnects to a new session.
+    The query string returned is the one the cursor was prepared with: the
+    driver only skips re-preparing when it is passed that same object.
+    """
+    raw = getattr(connection, '_cnx', None) or connection
+    connection_id = getattr(raw, 'connection_id', None)
+    cache = getattr(raw, '_statement_cache', None)
+    if cache is None or cache.connection_id != connection_id:
+        cache = _StatementCache(connection_id)
+        raw._statement_cache = cache
+
+    key = (query, dictionary)
+    entry = cache.cursors.get(key)
+    if entry is not None:
+        cache.cursors.move_to_end(key)
+        return entry
+
+    entry = (query, raw.cursor(prepared=True, dictionary=dictionary))
+    cache.cursors[key] = entry
+    while len(cache.cursors) > config.DB_STATEMENT_CACHE_SIZE:
+        _, (_, evicted) = cache.cursors.popitem(last=False)
+        try:
+            evicted.close()
+        except mysql.connector.Error:
+            pass
+    return entry
+
+
+def _forget_statement(connection, query, dictionary):
+    raw = getattr(connection, '_cnx', None) or connection
+    cache = getattr(raw, '_statement_cache', None)
+    if cache is not None:
+        cache.cursors.pop((query, dictionary), None)
+
+
+def run_statement(connection, query, params=(), dictionary=True, prepared=None):
+    """Execute query with params and return a Statement with all its rows fetched.
+
+    query must use %s placeholders and params must be a sequence. With
+    prepared (default DB_PREPARED_STATEMENTS) the query runs as a
+    server-side prepared statement reused across checkouts of this
+    connection; otherwise it is sent as text on a fresh cursor.
+    """
+    if prepared is None:
+        prepared = config.DB_PREPARED_STATEMENTS
+    params = tuple(params)
+    if not prepared:
+        cursor = connection.cursor(dictionary=dictionary)
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall() if cursor.with_rows else []
+            return Statement(tuple(cursor.column_names), rows, cursor.rowcount, cursor.lastrowid)
+        finally:
+            cursor.close()
+
+    query, cursor = _prepared_cursor(connection, query, dictionary)
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall() if cursor.with_rows else []
+    except mysql.connector.Error:
+        # The statement may be gone from the server; prepare it afresh next time
+        _forget_statement(connection, query, dictionary)
+        raise
+    return Statement(tuple(cursor.column_names), rows, cursor.rowcount, cursor.lastrowid)
+
+
+def get_table_versions(connection, *tables):
+    """Return the change versions of the given tables as a tuple, or None if unavailable"""
+    try:
+        placeholders = ', '.join(['%s'] * len(tables))
+        result = run_statement(
+            connection,
+            f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+            tables,
+            dictionary=False
+        )
+        versions = dict(result.rows)
+        return tuple(versions.get(table, 0) for table in tables)
+    except mysql.connector.Error as e:
+        print(f"Table version lookup error: {e}")
+        return None
+
+
+def bump_table_versions(connection, *tables):
+    """Mark tables as changed so cached fragments built from them are not reused"""
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(
+            """
+            INSERT INTO table_versions (table_name, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+            """,
+            [(table,) for table in tables]
+        )
+        connection.commit()
+        note_session_write()
+    except mysql.connector.Error as e:
+        print(f"Table version bump error: {e}")
+    finally:
+        cursor.close()
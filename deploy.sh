@@ -63,6 +63,9 @@ print_header "Step 4: Installing Python dependencies"
 pip install --upgrade pip
 pip install -r requirements.txt
 
+# Build minified, fingerprinted and precompressed static assets
+python assets.py
+
 # Step 5: Setup environment variables
 print_header "Step 5: Setting up environment configuration"
 if [ ! -f .env ]; then
@@ -102,6 +105,10 @@ mysql -u root -p"$DB_PASSWORD" suraksha_db < database/schema.sql
 # Update .env file with the entered password
 sed -i "s/your_mysql_password_here/$DB_PASSWORD/" .env
 
+# Apply versioned migrations (indexes, tables added after the baseline schema)
+print_status "Applying schema migrations..."
+venv/bin/python migrate.py --all-shards
+
 print_status "Database setup completed successfully"
 
 # Step 7: Create Nginx configuration
@@ -120,12 +127,44 @@ server {
         proxy_redirect off;
     }
     
+    # Read-only API reads and live-update streams go to the async tier
+    # (async_api.py); writes to the same URLs stay on gunicorn
+    location ~ ^/api/((users|professionals|districts)|(trainees|trainings)(/[0-9]+)?)$ {
+        if (\$request_method = GET) {
+            proxy_pass http://127.0.0.1:5005;
+        }
+        proxy_pass http://127.0.0.1:5004;
+        proxy_set_header Host \$host;
+        proxy_set_header X-Real-IP \$remote_addr;
+        proxy_set_header X-Forwarded-For \$proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto \$scheme;
+    }
+    
+    location /api/stream/ {
+        proxy_pass http://127.0.0.1:5005;
+        proxy_set_header Host \$host;
+        proxy_buffering off;
+        proxy_read_timeout 1h;
+    }
+    
     location /static {
         alias $APP_DIR/static;
         expires 30d;
         add_header Cache-Control "public, no-transform";
     }
     
+    location /assets {
+        alias $APP_DIR/static/dist;
+        gzip_static on;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+    
+    # Pre-generated reports; only reachable through the app's X-Accel-Redirect
+    location /protected-reports/ {
+        internal;
+        alias $APP_DIR/reports/;
+    }
+    
     client_max_body_size 20M;
     proxy_connect_timeout 60s;
     proxy_send_timeout 60s;
@@ -146,7 +185,7 @@ print_status "Nginx configured and started"
 print_header "Step 8: Setting up process management"
 sudo tee /etc/supervisor/conf.d/suraksha.conf << EOF
 [program:suraksha]
-command=$APP_DIR/venv/bin/gunicorn --workers 3 --bind 127.0.0.1:5004 --timeout 60 --keep-alive 5 wsgi:app
+command=$APP_DIR/venv/bin/gunicorn -c $APP_DIR/gunicorn.conf.py wsgi:app
 directory=$APP_DIR
 user=$(whoami)
 autostart=true
@@ -156,6 +195,18 @@ stdout_logfile=$APP_DIR/logs/suraksha.log
 stdout_logfile_maxbytes=50MB
 stdout_logfile_backups=5
 environment=PATH="$APP_DIR/venv/bin"
+
+[program:suraksha-async]
+command=$APP_DIR/venv/bin/gunicorn async_api:create_app --bind 127.0.0.1:5005 --workers 2 --worker-class aiohttp.GunicornWebWorker
+directory=$APP_DIR
+user=$(whoami)
+autostart=true
+autorestart=true
+redirect_stderr=true
+stdout_logfile=$APP_DIR/logs/suraksha-async.log
+stdout_logfile_maxbytes=50MB
+stdout_logfile_backups=5
+environment=PATH="$APP_DIR/venv/bin"
 EOF
 
 # Create logs directory
@@ -164,7 +215,7 @@ mkdir -p logs
 # Update Supervisor and start application
 sudo supervisorctl reread
 sudo supervisorctl update
-sudo supervisorctl start suraksha
+sudo supervisorctl start suraksha suraksha-async
 
 print_status "Application started with Supervisor"
 
@@ -205,6 +256,15 @@ chmod +x backup.sh
 # Add to crontab for daily backup
 (crontab -l 2>/dev/null; echo "0 2 * * * $APP_DIR/backup.sh") | crontab -
 
+# Move old trainees/trainings to the archive tables every Sunday, off-peak
+(crontab -l 2>/dev/null; echo "30 2 * * 0 cd $APP_DIR && $APP_DIR/venv/bin/python archive.py >> $APP_DIR/logs/archive.log 2>&1") | crontab -
+
+# Refresh the weekly/monthly reports every night, off-peak
+(crontab -l 2>/dev/null; echo "0 3 * * * cd $APP_DIR && $APP_DIR/venv/bin/python reports.py >> $APP_DIR/logs/reports.log 2>&1") | crontab -
+
+# Trim the trainee change log read by the analytics snapshots
+(crontab -l 2>/dev/null; echo "15 3 * * * cd $APP_DIR && $APP_DIR/venv/bin/python trainee_snapshot.py --purge >> $APP_DIR/logs/analytics.log 2>&1") | crontab -
+
 print_status "Backup script created and scheduled"
 
 # Step 11: Create SSL setup script
@@ -0,0 +1,441 @@
+"""Excel and PDF export engines.
+
+pandas/openpyxl and reportlab are heavy to import and only needed by the
+export routes, so each builder imports its engine on first use instead of
+every gunicorn worker paying for them at boot.
+"""
+import tempfile
+from datetime import datetime
+from io import BytesIO
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+
+import archive
+
+# Rows pulled from the server per round trip while streaming a sheet
+REPORT_FETCH_SIZE = 1000
+
+REPORT_USER_COLUMNS = """
+    id, name, username, role, mobile_number, gender, age,
+    department, designation, specialization, experience_years, created_at"""
+REPORT_TRAINEE_COLUMNS = """
+    id, name, mobile_number, gender, age, department, designation, address,
+    block, district, training_date, cpr_training, first_aid_kit_given, life_saving_skills,
+    registered_by, created_at"""
+REPORT_TRAINING_COLUMNS = """
+    id, title, training_topic, description, address, block, district, training_date,
+    training_time, duration_hours, trainees, status, conducted_by,
+    created_at, updated_at"""
+
+
+def build_excel(table_name, data):
+    """Render rows as a single-sheet workbook and return it as a BytesIO"""
+    import pandas as pd
+
+    # Convert to DataFrame
+    df = pd.DataFrame(data)
+
+    # Format datetime columns safely
+    for col in df.columns:
+        if 'date' in col.lower() or 'created_at' in col or 'updated_at' in col:
+            if not df[col].empty and df[col].notna().any():
+                try:
+                    # Convert to datetime with error handling
+                    df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+                    # Replace any NaT values with empty string
+                    df[col] = df[col].fillna('')
+                except Exception as e:
+                    # If conversion fails, convert to string
+                    df[col] = df[col].astype(str)
+
+    # Create Excel file in memory
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=table_name.title(), index=False)
+
+        # Get the workbook and worksheet
+        workbook = writer.book
+        worksheet = writer.sheets[table_name.title()]
+
+        # Auto-adjust column widths
+        for column in worksheet.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except:
+                    pass
+            adjusted_width = min(max_length + 2, 50)
+            worksheet.column_dimensions[column_letter].width = adjusted_width
+
+    output.seek(0)
+    return output
+
+
+# PDF layout (points). Rows are laid out and drawn one page at a time, so
+# only the current page's table is ever held in memory.
+PDF_MARGIN = 36
+PDF_FONT_SIZE = 8
+PDF_HEADER_FONT_SIZE = 9
+PDF_CELL_PADDING = 3
+PDF_MIN_COLUMN_WIDTH = 40
+PDF_MAX_COLUMN_WIDTH = 200
+# Rows sampled to size the columns before any page is drawn
+PDF_SAMPLE_ROWS = 200
+
+
+def _pdf_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def _column_widths(headers, sample, string_width):
+    """Natural column widths from the header and a sample of rows"""
+    widths = []
+    for index, header in enumerate(headers):
+        cells = sorted(string_width(row[index], 'Helvetica', PDF_FONT_SIZE) for row in sample)
+        # 90th percentile, so one long address does not widen the whole column
+        typical = cells[int(len(cells) * 0.9)] if cells else 0
+        natural = max(string_width(header, 'Helvetica-Bold', PDF_HEADER_FONT_SIZE), typical)
+        widths.append(min(max(natural + 2 * PDF_CELL_PADDING, PDF_MIN_COLUMN_WIDTH), PDF_MAX_COLUMN_WIDTH))
+    return widths
+
+
+def _column_groups(widths, available):
+    """Split column indexes into groups that fit the page width.
+
+    Tables too wide even at the minimum column width are wrapped onto
+    several pages per row chunk, each repeating the first column so rows
+    can be matched up. Widths are scaled to fill each group's page.
+    """
+    if sum(widths) <= available or sum(PDF_MIN_COLUMN_WIDTH for _ in widths) <= available:
+        groups = [list(range(len(widths)))]
+    else:
+        groups, current, used = [], [0], widths[0]
+        for index in range(1, len(widths)):
+            if used + widths[index] > available and len(current) > 1:
+                groups.append(current)
+                current, used = [0], widths[0]
+            current.append(index)
+            used += widths[index]
+        groups.append(current)
+
+    layout = []
+    for group in groups:
+        group_widths = [widths[index] for index in group]
+        total = sum(group_widths)
+        if total > available:
+            # Shrink columns above the minimum width, proportionally
+            excess = total - available
+            flexible = sum(w - PDF_MIN_COLUMN_WIDTH for w in group_widths) or 1
+            group_widths = [w - excess * (w - PDF_MIN_COLUMN_WIDTH) / flexible for w in group_widths]
+        else:
+            group_widths = [w * available / total for w in group_widths]
+        layout.append((group, group_widths))
+    return layout
+
+
+def build_pdf(table_name, headers, data):
+    """Render rows as a titled, multi-page PDF table and return it as a BytesIO.
+
+    data may be any iterable of dicts or sequences (e.g. rows streamed from a
+    cursor). Each page gets its own small table with the header repeated;
+    wide tables switch to landscape and, if still too wide, wrap their
+    columns onto extra pages. Long values wrap inside their cell.
+    """
+    from reportlab import rl_config
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfbase.pdfdoc import PDFArray, PDFName, PDFStream, PDFZCompress
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Paragraph, Table, TableStyle
+
+    # Binary page streams; reportlab's pure-Python ASCII85 encoder is slow
+    rl_config.useA85 = 0
+
+    rows = ([_pdf_text(value) for value in (row.values() if isinstance(row, dict) else row)]
+            for row in data)
+    sample = list(islice(rows, PDF_SAMPLE_ROWS))
+    rows = chain(sample, rows)
+
+    widths = _column_widths(headers, sample, stringWidth)
+    page_size = A4
+    if sum(widths) > A4[0] - 2 * PDF_MARGIN:
+        page_size = landscape(A4)
+    page_width, page_height = page_size
+    layout = _column_groups(widths, page_width - 2 * PDF_MARGIN)
+    column_widths = {}
+    for group, group_widths in layout:
+        for index, width in zip(group, group_widths):
+            column_widths.setdefault(index, width)
+
+    cell_style = ParagraphStyle('Cell', fontName='Helvetica', fontSize=PDF_FONT_SIZE,
+                                leading=PDF_FONT_SIZE + 2, alignment=1)
+    plain_height = PDF_FONT_SIZE + 2 * PDF_CELL_PADDING + 2
+    header_height = PDF_HEADER_FONT_SIZE + 2 * PDF_CELL_PADDING + 4
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), PDF_HEADER_FONT_SIZE),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), PDF_FONT_SIZE),
+        ('TOPPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ('LEFTPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), PDF_CELL_PADDING),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ])
+
+    def layout_row(values):
+        """Wrap over-long cells; returns (cells, row height)"""
+        cells, height = [], plain_height
+        for index, text in enumerate(values):
+            inner = column_widths[index] - 2 * PDF_CELL_PADDING
+            # No Helvetica glyph is wider than the font size, so short text always fits
+            if len(text) * PDF_FONT_SIZE > inner and stringWidth(text, 'Helvetica', PDF_FONT_SIZE) > inner:
+                paragraph = Paragraph(escape(text), cell_style)
+                height = max(height, paragraph.wrap(inner, page_height)[1] + 2 * PDF_CELL_PADDING + 2)
+                cells.append(paragraph)
+            else:
+                cells.append(text)
+        return cells, height
+
+    output = BytesIO()
+    c = canvas.Canvas(output, pagesize=page_size, pageCompression=1)
+    title = f"SURAKSHA - {table_name.title()} Report"
+    c.setTitle(title)
+    generated = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+    page_number = 0
+
+    def flush_page():
+        """Compress the finished page now; reportlab would otherwise keep
+        every page's raw content stream until save()"""
+        page = c._doc.Pages.pages[-1]
+        if page.stream:
+            contents = PDFStream(content=PDFZCompress.encode(page.stream))
+            contents.dictionary['Filter'] = PDFArray([PDFName('FlateDecode')])
+            page.Contents = contents
+            page.stream = None
+
+    def draw_page(chunk, heights):
+        nonlocal page_number
+        for group, group_widths in layout:
+            page_number += 1
+            top = page_height - PDF_MARGIN
+            if page_number == 1:
+                c.setFont('Helvetica-Bold', 18)
+                c.drawCentredString(page_width / 2, top - 18, title)
+                c.setFont('Helvetica', 10)
+                c.drawString(PDF_MARGIN, top - 44, generated)
+                top -= 60
+            else:
+                c.setFont('Helvetica', 8)
+                c.drawString(PDF_MARGIN, top - 8, title)
+                top -= 16
+            c.setFont('Helvetica', 8)
+            c.drawRightString(page_width - PDF_MARGIN, PDF_MARGIN / 2, f"Page {page_number}")
+
+            table = Table(
+                [[headers[index] for index in group]] + [[cells[index] for index in group] for cells in chunk],
+                colWidths=group_widths,
+                rowHeights=[header_height] + heights
+            )
+            table.setStyle(table_style)
+            _, height = table.wrapOn(c, page_width, page_height)
+            table.drawOn(c, PDF_MARGIN, top - height)
+            c.showPage()
+            flush_page()
+
+    # Fill each page up to the body height, then draw and drop it
+    first_body = page_height - 2 * PDF_MARGIN - 60 - header_height
+    body = page_height - 2 * PDF_MARGIN - 16 - header_height
+    chunk, heights, used = [], [], 0
+    for values in rows:
+        cells, height = layout_row(values)
+        limit = first_body if page_number == 0 else body
+        if chunk and used + height > limit:
+            draw_page(chunk, heights)
+            chunk, heights, used = [], [], 0
+        chunk.append(cells)
+        heights.append(height)
+        used += height
+    if chunk or page_number == 0:
+        draw_page(chunk, heights)
+
+    c.save()
+    output.seek(0)
+    return output
+
+
+def _header_row(sheet, names):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    bold = Font(bold=True)
+    row = []
+    for name in names:
+        cell = WriteOnlyCell(sheet, value=name.replace('_', ' ').title())
+        cell.font = bold
+        row.append(cell)
+    sheet.append(row)
+
+
+def _columns(spec):
+    return [column.strip() for column in spec.split(',')]
+
+
+def iter_rows(cursor):
+    """Yield an executed cursor's rows, fetching REPORT_FETCH_SIZE at a time"""
+    while True:
+        rows = cursor.fetchmany(REPORT_FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def _stream_rows(cursor, query, params=()):
+    cursor.execute(query, params)
+    return iter_rows(cursor)
+
+
+def build_report(connection, date_from=None, date_to=None, shard_connections=None):
+    """Write users, trainees and trainings plus per-block and per-professional
+    summaries into one workbook, returned as an open temporary file.
+
+    Sheets are write-only and every table is read with an unbuffered cursor in
+    fetch-size batches, so memory does not grow with the table size; the
+    summaries are tallied while the rows stream past instead of re-querying.
+    date_from/date_to limit trainees and trainings by training_date.
+
+    users are read on connection; trainees and trainings on each of
+    shard_connections (default: connection alone) in turn. Given in shard
+    order, whose id ranges ascend, the sheets stay in id order.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    # Summary sheets first in tab order; they are filled once the data is read
+    block_sheet = workbook.create_sheet('By Block')
+    professional_sheet = workbook.create_sheet('By Professional')
+    users_sheet = workbook.create_sheet('Users')
+    trainees_sheet = workbook.create_sheet('Trainees')
+    trainings_sheet = workbook.create_sheet('Trainings')
+
+    blocks = {}
+    professionals = {}
+
+    def block_totals(district, block):
+        return blocks.setdefault((district, block), {
+            'trainees': 0, 'cpr': 0, 'first_aid_kits': 0, 'life_saving': 0,
+            'trainings': 0, 'completed': 0, 'hours': 0,
+        })
+
+    def professional_totals(user_id):
+        return professionals.setdefault(user_id, {
+            'name': '', 'department': '', 'trainees': 0, 'trainings': 0, 'hours': 0,
+        })
+
+    cursor = connection.cursor()
+    try:
+        names = {}
+        columns = _columns(REPORT_USER_COLUMNS)
+        name, role, department = (columns.index(c) for c in ('name', 'role', 'department'))
+        _header_row(users_sheet, columns)
+        for row in _stream_rows(cursor, f"SELECT {REPORT_USER_COLUMNS} FROM users ORDER BY id"):
+            users_sheet.append(row)
+            names[row[0]] = row[name]
+            if row[role] == 'professional':
+                totals = professional_totals(row[0])
+                totals['name'], totals['department'] = row[name], row[department] or ''
+    finally:
+        cursor.close()
+
+    shard_connections = shard_connections or [connection]
+    columns = _columns(REPORT_TRAINEE_COLUMNS)
+    block, district, cpr, kit, skills, owner = (columns.index(c) for c in (
+        'block', 'district', 'cpr_training', 'first_aid_kit_given', 'life_saving_skills', 'registered_by'))
+    _header_row(trainees_sheet, columns)
+    for shard_connection in shard_connections:
+        query, params = archive.range_query(
+            shard_connection, 'trainees', REPORT_TRAINEE_COLUMNS,
+            date_from=date_from, date_to=date_to, order_by='id'
+        )
+        cursor = shard_connection.cursor()
+        try:
+            for row in _stream_rows(cursor, query, params):
+                row = list(row)
+                owner_id = row[owner]
+                # Show the professional's name rather than their user id
+                row[owner] = names.get(owner_id, '')
+                trainees_sheet.append(row)
+
+                totals = block_totals(row[district], row[block])
+                totals['trainees'] += 1
+                totals['cpr'] += bool(row[cpr])
+                totals['first_aid_kits'] += bool(row[kit])
+                totals['life_saving'] += bool(row[skills])
+                if owner_id is not None:
+                    professional_totals(owner_id)['trainees'] += 1
+        finally:
+            cursor.close()
+
+    columns = _columns(REPORT_TRAINING_COLUMNS)
+    block, district, duration, status, owner = (columns.index(c) for c in (
+        'block', 'district', 'duration_hours', 'status', 'conducted_by'))
+    _header_row(trainings_sheet, columns)
+    for shard_connection in shard_connections:
+        query, params = archive.range_query(
+            shard_connection, 'trainings', REPORT_TRAINING_COLUMNS,
+            date_from=date_from, date_to=date_to, order_by='id'
+        )
+        cursor = shard_connection.cursor()
+        try:
+            for row in _stream_rows(cursor, query, params):
+                row = list(row)
+                owner_id = row[owner]
+                row[owner] = names.get(owner_id, '')
+                trainings_sheet.append(row)
+
+                hours = float(row[duration] or 0)
+                totals = block_totals(row[district], row[block])
+                totals['trainings'] += 1
+                totals['completed'] += row[status] == 'Completed'
+                totals['hours'] += hours
+                if owner_id is not None:
+                    totals = professional_totals(owner_id)
+                    totals['trainings'] += 1
+                    totals['hours'] += hours
+        finally:
+            cursor.close()
+
+    _header_row(block_sheet, ['district', 'block', 'trainees', 'cpr_trained', 'first_aid_kits_given',
+                              'life_saving_skills', 'trainings', 'completed_trainings',
+                              'training_hours'])
+    for district, block in sorted(blocks):
+        t = blocks[(district, block)]
+        block_sheet.append([district, block, t['trainees'], t['cpr'], t['first_aid_kits'], t['life_saving'],
+                            t['trainings'], t['completed'], t['hours']])
+
+    _header_row(professional_sheet, ['professional', 'department', 'trainees_registered',
+                                     'trainings_conducted', 'training_hours'])
+    for user_id, t in sorted(professionals.items(), key=lambda item: item[1]['name']):
+        professional_sheet.append([t['name'] or names.get(user_id) or f"#{user_id}", t['department'],
+                                   t['trainees'], t['trainings'], t['hours']])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
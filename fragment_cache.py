@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+# A cached dashboard section: the serialized rows (still needed by the page's
+# stats and inline JSON) together with the rendered card markup.
+Fragment = namedtuple('Fragment', ['rows', 'html'])
+
+
+class FragmentCache:
+    """Size-bounded LRU cache for rendered template fragments.
+
+    Keys should include everything the fragment depends on (fragment name,
+    owner and the change versions of the tables it reads), so entries never
+    need explicit invalidation - stale versions simply age out of the LRU.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, flights=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Optional SingleFlight so concurrent misses for one key render once
+        self.flights = flights
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def set(self, key, fragment):
+        size = len(fragment.html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.html)
+            self._entries[key] = fragment
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.html)
+                self.evictions += 1
+
+    def get_or_render(self, key, render):
+        """Return the cached fragment for key, calling render() on a miss.
+
+        A key of None means the caller could not determine the data version,
+        in which case the fragment is rendered and not cached.
+        """
+        if key is None:
+            return render()
+        fragment = self.get(key)
+        if fragment is None:
+            fragment = self.flights.do(key, render) if self.flights else render()
+            self.set(key, fragment)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
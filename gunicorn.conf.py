@@ -0,0 +1,56 @@
+"""Gunicorn settings for production.
+
+Loaded automatically by `gunicorn wsgi:app` when run from the app directory
+(or explicitly with `-c gunicorn.conf.py`). Every value can be overridden
+through the environment / .env file.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', f"127.0.0.1:{os.getenv('PORT', '5004')}")
+
+# Threads let one worker keep serving while another request waits on MySQL
+# or builds an export; with a single thread the plain sync worker is used.
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+workers = int(os.getenv('GUNICORN_WORKERS', min(cpu_count * 2 + 1, 8)))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# Import the app once in the master and fork workers from it, sharing the
+# loaded code copy-on-write. Each worker opens its own DB pool after fork.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Recycle workers periodically to bound memory growth (e.g. after exports);
+# the jitter keeps them from all restarting at once.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Pools hand out connections without waiting: an exhausted pool fails the
+# request. A request holds at most DB_CONNECTIONS_PER_REQUEST connections
+# from one pool at a time - its own, plus the default shard's when it
+# scatters over the shards (admin dashboard, exports, reports) - and other
+# shards at most one each. DB_POOL_HEADROOM covers the background threads
+# (check-in flusher, delete and certificate jobs, snapshot refreshes).
+connections_per_request = int(os.getenv('DB_CONNECTIONS_PER_REQUEST', 2))
+pool_headroom = int(os.getenv('DB_POOL_HEADROOM', 4))
+os.environ.setdefault('DB_POOL_SIZE', str(threads * connections_per_request + pool_headroom))
+os.environ.setdefault('DB_REPLICA_POOL_SIZE', str(threads * connections_per_request))
+os.environ.setdefault('DB_SHARD_POOL_SIZE', str(threads + pool_headroom))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+
+
+def post_worker_init(worker):
+    # Resume cascade deletes interrupted by a restart or a recycled worker
+    import cascade_delete
+    cascade_delete.resume_jobs()
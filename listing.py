@@ -0,0 +1,63 @@
+"""Field projection and columnar encoding for the list APIs.
+
+?fields=name,training_date narrows the SELECT to those columns (checked
+against a per-table whitelist, which never includes password hashes).
+?format=columnar returns the column names once and the values as parallel
+arrays instead of one object per row:
+
+    {"columns": ["id", "name"], "values": [[1, 2], ["Asha", "Ravi"]], "count": 2}
+
+Values are converted a column at a time, the same way serialize_data()
+converts them for templates: dates and datetimes to ISO strings, TIME
+columns to seconds and DECIMAL to float.
+"""
+from decimal import Decimal
+
+LIST_FIELDS = {
+    'users': (
+        'id', 'name', 'username', 'mobile_number', 'gender', 'age', 'role', 'designation',
+        'department', 'specialization', 'experience_years', 'district', 'created_at',
+    ),
+    'trainees': (
+        'id', 'name', 'mobile_number', 'gender', 'age', 'department', 'designation', 'address',
+        'block', 'district', 'training_date', 'cpr_training', 'first_aid_kit_given',
+        'life_saving_skills', 'registered_by', 'created_at',
+    ),
+    'trainings': (
+        'id', 'title', 'description', 'training_topic', 'address', 'block', 'district',
+        'training_date', 'training_time', 'duration_hours', 'trainees', 'current_trainees', 'status',
+        'conducted_by', 'created_at', 'updated_at',
+    ),
+}
+
+
+def select_columns(table, fields, default='*'):
+    """SQL column list for a ?fields= value, or default when none was given"""
+    if not fields:
+        return default
+    names = list(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+    unknown = [name for name in names if name not in LIST_FIELDS[table]]
+    if unknown or not names:
+        raise ValueError(f"Unknown fields for {table}: {', '.join(unknown) or fields}")
+    return ', '.join(names)
+
+
+def _converter(values):
+    sample = next((value for value in values if value is not None), None)
+    if hasattr(sample, 'isoformat'):
+        return lambda value: None if value is None else value.isoformat()
+    if hasattr(sample, 'total_seconds'):
+        return lambda value: None if value is None else value.total_seconds()
+    if isinstance(sample, Decimal):
+        return lambda value: None if value is None else float(value)
+    return None
+
+
+def columnar(rows, columns):
+    """Encode dictionary-cursor rows as {'columns', 'values', 'count'}"""
+    values = []
+    for column in columns:
+        column_values = [row[column] for row in rows]
+        convert = _converter(column_values)
+        values.append([convert(value) for value in column_values] if convert else column_values)
+    return {'columns': list(columns), 'values': values, 'count': len(rows)}
@@ -0,0 +1,236 @@
+"""Versioned schema migrations.
+
+database/schema.sql is the baseline; every later change is a numbered file
+in database/migrations (NNNN_description.sql) applied in order and recorded
+in the schema_migrations table.
+
+    python migrate.py                 apply pending migrations
+    python migrate.py --status        list applied and pending migrations
+    python migrate.py --check-plans   EXPLAIN the app's queries, fail on full scans
+    python migrate.py --shard east    the same on one district shard (DB_SHARDS)
+    python migrate.py --all-shards    the primary, then every shard
+
+Every shard carries the full schema, so each migration applies everywhere.
+
+Statements are re-runnable: a migration interrupted part-way can simply be
+applied again, as "already exists" errors for indexes, columns, tables and
+triggers (and "does not exist" when dropping a key) are treated as done.
+Index changes should use ALGORITHM=INPLACE, LOCK=NONE so they run online;
+lock_wait_timeout keeps a DDL statement from queueing behind long
+transactions and blocking traffic while it waits.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from config import Config
+from db import DEFAULT_SHARD, SHARDS, get_db_connection
+
+config = Config()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# Errors meaning the statement's effect is already present
+ALREADY_APPLIED = (
+    errorcode.ER_DUP_KEYNAME,      # index exists
+    errorcode.ER_DUP_FIELDNAME,    # column exists
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_TRG_ALREADY_EXISTS,
+    errorcode.ER_CANT_DROP_FIELD_OR_KEY,   # key already dropped
+)
+
+def plan_checks(shard=None):
+    """(label, sql, params, full_scan_allowed) for every query shape the app runs.
+
+    Built from the definitions the app itself uses (api_queries and the
+    modules' statement constants), so a changed query is checked as it now
+    is. full_scan_allowed marks listings that return the whole table. The
+    users, jobs and districts tables are only used on the primary, so their
+    statements are left out on other shards.
+    """
+    # Imported here: only plan checks need the app's modules
+    import api_queries
+    import archive
+    import cascade_delete
+    import shards
+    import trainee_snapshot
+
+    checks = []
+    if shard in (None, DEFAULT_SHARD):
+        checks += [
+            ('login', api_queries.LOGIN_QUERY, ('admin', 'admin'), False),
+            ('password rehash', api_queries.REHASH_PASSWORD_QUERY, ('hash', 1, 'admin123'), False),
+            ('users list', api_queries.user_list_query('users'), (), True),
+            ('professionals list', api_queries.user_list_query('professionals'), (), False),
+            ('professional names', api_queries.user_list_query('professionals', 'id,name'), (), False),
+            ('user names', api_queries.USER_NAMES_QUERY, (), True),
+            ('districts', shards.DISTRICTS_QUERY, (), True),
+            ('district blocks', shards.DISTRICT_BLOCKS_QUERY, (), True),
+            ('delete jobs to resume', cascade_delete.RESUME_QUERY, (cascade_delete.STALE_AFTER_SECONDS,), False),
+        ]
+    checks += [
+        ('table versions', api_queries.TABLE_VERSIONS_QUERY, (), True),
+        ('archive cutoff', archive.CUTOFF_QUERY, ('trainees',), False),
+        ('trainee changes', trainee_snapshot.CHANGES_QUERY, (0, trainee_snapshot.CHANGE_BATCH), False),
+        ('trainee changes purge', trainee_snapshot.PURGE_CHANGES_QUERY,
+         ('2024-01-01', trainee_snapshot.CHANGE_BATCH), False),
+    ]
+    for table in archive.ARCHIVE_TABLES:
+        owner_conditions, owner_params = api_queries.owner_filter(table, 'professional', 1)
+        checks += [
+            (f'{table} list', *api_queries.list_query(table, '*', [], [], None, None, False), True),
+            (f'{table} by owner', *api_queries.list_query(table, '*', owner_conditions, owner_params,
+                                                          None, None, False), False),
+            (f'{table} date range', *api_queries.list_query(table, '*', [], [], '2024-01-01', '2024-01-31',
+                                                            False), False),
+            (f'{table} by owner with archive', *api_queries.list_query(table, '*', owner_conditions, owner_params,
+                                                                       '2020-01-01', None, True), False),
+            (f'{table} owner totals', api_queries.owner_totals_query(table), (), True),
+            (f'{table} export', *archive.build_range_query(table, '*', order_by=api_queries.EXPORT_ORDER), True),
+            (f'{table} archive batch', archive.BATCH_QUERY.format(table=table), ('2020-01-01', 1000), False),
+        ]
+        live, archived = api_queries.record_queries(table)
+        checks += [(f'{table} by id', live, (1,), False), (f'archived {table} by id', archived, (1,), False)]
+    checks += [(f"cascade {counter}: {' '.join(statement.split()[:3])}", statement, (1, 1000), False)
+               for counter, statement in cascade_delete.BATCH_STATEMENTS]
+    return checks
+
+
+def discover():
+    """Return [(version, name, path)] for migration files, in order"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version CHAR(4) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def apply_migration(cursor, version, name, path):
+    with open(path) as f:
+        sql = f.read()
+    for statement in split_statements(sql):
+        try:
+            cursor.execute(statement)
+        except mysql.connector.Error as e:
+            if e.errno not in ALREADY_APPLIED:
+                raise
+            print(f"  already applied: {e.msg}")
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (version, name, hashlib.sha256(sql.encode('utf-8')).hexdigest())
+    )
+
+
+def migrate(status_only=False, shard=None):
+    connection = get_db_connection(shard=shard)
+    if not connection:
+        raise SystemExit(f"Database connection failed ({shard or DEFAULT_SHARD})")
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION lock_wait_timeout = %s", (config.MIGRATION_LOCK_WAIT_TIMEOUT,))
+        ensure_migrations_table(cursor)
+        applied = applied_versions(cursor)
+
+        for version, name, path in discover():
+            if version in applied:
+                with open(path) as f:
+                    checksum = hashlib.sha256(f.read().encode('utf-8')).hexdigest()
+                note = '' if checksum == applied[version] else '  (file changed since it was applied)'
+                print(f"[applied] {version}_{name}{note}")
+            elif status_only:
+                print(f"[pending] {version}_{name}")
+            else:
+                print(f"[applying] {version}_{name}")
+                apply_migration(cursor, version, name, path)
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def scan_failures(label, plan, full_scan_allowed):
+    """Failure messages for the full table scans in an EXPLAIN's rows"""
+    failures = []
+    for row in plan:
+        table = row['table']
+        # No table (nothing to read) or a derived/union result, whose parts
+        # appear as rows of their own
+        if not table or table.startswith('<'):
+            continue
+        if row['type'] == 'ALL' and not full_scan_allowed:
+            failures.append(f"{label}: full scan of {table}")
+    return failures
+
+
+def check_plans(shard=None):
+    """EXPLAIN every plan_checks() statement; return the list of failures.
+
+    Any full table scan fails unless the statement is a whole-table
+    listing. Run it against production-sized data (a restored backup):
+    on near-empty tables MySQL prefers a scan even when an index fits.
+    """
+    connection = get_db_connection(shard=shard)
+    if not connection:
+        raise SystemExit("Database connection failed")
+    cursor = connection.cursor(dictionary=True)
+    failures = []
+    try:
+        for label, sql, params, full_scan_allowed in plan_checks(shard):
+            cursor.execute("EXPLAIN " + sql, params)
+            plan = cursor.fetchall()
+            found = scan_failures(label, plan, full_scan_allowed)
+            failures += found
+            for message in found:
+                print(f"[FAIL] {message}")
+            if not found:
+                print(f"[ok]   {label}: " + ', '.join(f"{row['table']} via {row['key'] or row['type']}"
+                                                     for row in plan))
+    finally:
+        cursor.close()
+        connection.close()
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations')
+    parser.add_argument('--status', action='store_true', help='list migrations without applying')
+    parser.add_argument('--check-plans', action='store_true', help='fail if any app query does a full table scan')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--shard', choices=sorted(SHARDS), help='run against this district shard')
+    target.add_argument('--all-shards', action='store_true', help='run against the primary and every shard')
+    args = parser.parse_args()
+
+    shards = [None] + sorted(SHARDS) if args.all_shards else [args.shard]
+    if args.check_plans:
+        sys.exit(1 if any([check_plans(shard) for shard in shards]) else 0)
+    for shard in shards:
+        if len(shards) > 1:
+            print(f"== {shard or DEFAULT_SHARD}")
+        migrate(status_only=args.status, shard=shard)
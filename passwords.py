@@ -0,0 +1,161 @@
+"""Password hashing for the login path.
+
+Hashing is deliberately slow, so a burst of logins at the start of a shift
+can take every CPU the workers have. verify() runs the KDF on a small
+per-process thread pool (hashlib releases the GIL while it works), and at
+most PASSWORD_HASH_QUEUE logins per worker wait for it; beyond that the
+login is turned away with Busy rather than queueing indefinitely.
+
+New hashes use PASSWORD_HASH_METHOD (a werkzeug method string, e.g.
+pbkdf2:sha256:600000). verify() reports when a stored password should be
+replaced - it is plaintext, from before hashing was introduced, or hashed
+with another method or cost - so the caller can store the new hash it
+returns.
+
+LoginThrottle counts failed attempts per account (username and role). Once
+an account has failed LOGIN_MAX_FAILURES times within LOGIN_FAILURE_WINDOW
+seconds it is locked for LOGIN_LOCKOUT_SECONDS, and attempts are refused
+before any database or hashing work. Counts are kept per worker process.
+"""
+import functools
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from config import Config
+
+config = Config()
+
+# Prefixes of werkzeug hashes; anything else in users.password is plaintext
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:', '$')
+
+
+class Busy(Exception):
+    pass
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=config.PASSWORD_HASH_METHOD)
+
+
+@functools.lru_cache(maxsize=None)
+def current_method():
+    """The method prefix werkzeug writes for PASSWORD_HASH_METHOD.
+
+    Read off a real hash, since werkzeug expands short names: 'pbkdf2' is
+    stored as 'pbkdf2:sha256:600000', 'scrypt' as 'scrypt:32768:8:1'.
+    """
+    return hash_password('').split('$', 1)[0]
+
+
+def needs_rehash(stored):
+    return not stored.startswith(f"{current_method()}$")
+
+
+def _verify(stored, password):
+    if stored.startswith(HASH_PREFIXES):
+        valid = check_password_hash(stored, password)
+    else:
+        # Plaintext from before passwords were hashed
+        valid = hmac.compare_digest(stored.encode(), password.encode())
+    if valid and needs_rehash(stored):
+        return True, hash_password(password)
+    return valid, None
+
+
+_executor = None
+_executor_pid = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid, _slots
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=config.PASSWORD_HASH_WORKERS,
+                                               thread_name_prefix='password-hash')
+                _slots = threading.BoundedSemaphore(config.PASSWORD_HASH_WORKERS + config.PASSWORD_HASH_QUEUE)
+                _executor_pid = os.getpid()
+    return _executor, _slots
+
+
+def verify(stored, password):
+    """Check password against users.password on the hashing pool.
+
+    Returns (valid, new_hash); new_hash is set when the password was right
+    but the stored value should be replaced by it. Raises Busy when the
+    pool's queue is full.
+    """
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        raise Busy('Too many logins in progress')
+    try:
+        return executor.submit(_verify, stored, password).result()
+    finally:
+        slots.release()
+
+
+class LoginThrottle:
+    """Failed login attempts per key, with a lockout once there are too many"""
+
+    def __init__(self, max_failures=5, window=300, lockout=300, max_entries=10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.lockout = lockout
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> [failures, first failure time, locked until]
+        self._entries = {}
+        self.refused = 0
+
+    def locked(self, *keys):
+        """Seconds until the first locked key unlocks, or 0 if none is locked"""
+        now = time.monotonic()
+        with self._lock:
+            remaining = max((self._entries[key][2] - now for key in keys if key in self._entries), default=0)
+            if remaining > 0:
+                self.refused += 1
+                return int(remaining) + 1
+        return 0
+
+    def failed(self, *keys):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._expire(now)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or now - entry[1] > self.window:
+                    entry = self._entries[key] = [0, now, 0]
+                entry[0] += 1
+                if entry[0] >= self.max_failures:
+                    entry[2] = now + self.lockout
+
+    def succeeded(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def _expire(self, now):
+        self._entries = {key: entry for key, entry in self._entries.items()
+                         if now - entry[1] <= self.window or entry[2] > now}
+        if len(self._entries) >= self.max_entries:
+            # Still full of live entries: forget the oldest half
+            oldest = sorted(self._entries, key=lambda key: self._entries[key][1])
+            for key in oldest[:len(oldest) // 2]:
+                del self._entries[key]
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'tracked': len(self._entries),
+                'locked': sum(1 for entry in self._entries.values() if entry[2] > now),
+                'refused': self.refused,
+            }
@@ -0,0 +1,209 @@
+"""Result cache for read queries, invalidated by table change versions.
+
+fetch() keys a result by the normalised statement, its parameters and the
+current table_versions of every table it reads. The write routes bump those
+versions (db.bump_table_versions), so a cached result is never served after
+a write to one of its tables; stale entries are simply never asked for
+again and age out. A hit costs the primary-key lookup of the versions
+instead of the query.
+
+Two tiers: an LRU in each process bounded by entry count and bytes, and,
+with QUERY_CACHE_DIR set, pickled results in that directory (a tmpfs such as
+/dev/shm) shared by every gunicorn worker and trimmed to
+QUERY_CACHE_SHARED_MAX_BYTES, oldest first. Concurrent misses for one key
+run the query once through the app's SingleFlight.
+
+Cached rows are shared between requests: callers must not modify them.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict, namedtuple
+
+from db import get_table_versions, run_statement
+
+QueryResult = namedtuple('QueryResult', ['columns', 'rows'])
+
+# Shared-tier writes between sweeps of the cache directory
+SWEEP_EVERY = 50
+
+
+def normalise(query):
+    return ' '.join(query.split())
+
+
+class QueryCache:
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024,
+                 shared_dir='', shared_max_bytes=256 * 1024 * 1024, flights=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared_dir = shared_dir
+        self.shared_max_bytes = shared_max_bytes
+        self.flights = flights
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.evictions = 0
+        if shared_dir:
+            os.makedirs(shared_dir, mode=0o700, exist_ok=True)
+
+    def fetch(self, connection, query, params=(), tables=(), versions=None, dictionary=True, scope=None):
+        """Run query (or return its cached result) as a QueryResult.
+
+        tables lists every table the query reads. versions may carry their
+        change versions, in the same order, when the caller already has
+        them; otherwise they are looked up. Without versions the query runs
+        uncached. scope names the database connection points at (a district
+        shard), when the same query can run against several.
+        """
+        if versions is None and tables:
+            versions = get_table_versions(connection, *tables)
+        if versions is None:
+            with self._lock:
+                self.uncached += 1
+            return self._execute(connection, query, params, dictionary)
+
+        key = (scope, normalise(query), tuple(params), tuple(tables), tuple(versions), dictionary)
+        result = self._get(key)
+        if result is not None:
+            return result
+
+        result = self._get_shared(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            self.misses += 1
+        run = lambda: self._execute(connection, query, params, dictionary)  # noqa: E731
+        result = self.flights.do(('query',) + key, run) if self.flights else run()
+        payload = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        self._set(key, result, len(payload))
+        self._set_shared(key, payload)
+        return result
+
+    def _execute(self, connection, query, params, dictionary):
+        statement = run_statement(connection, query, params, dictionary=dictionary)
+        return QueryResult(statement.columns, statement.rows)
+
+    # -- in-process tier --------------------------------------------------
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _set(self, key, result, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    # -- shared tier ------------------------------------------------------
+
+    def _path(self, key):
+        return os.path.join(self.shared_dir, hashlib.sha1(repr(key).encode('utf-8')).hexdigest() + '.pickle')
+
+    def _get_shared(self, key):
+        if not self.shared_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                payload = f.read()
+            result = pickle.loads(payload)
+            # Recently read files survive the size-bounded sweep longest
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        with self._lock:
+            self.shared_hits += 1
+        self._set(key, result, len(payload))
+        return result
+
+    def _set_shared(self, key, payload):
+        if not self.shared_dir or len(payload) > self.shared_max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Query cache write error: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % SWEEP_EVERY == 0
+        if sweep:
+            self._sweep()
+
+    def _shared_files(self):
+        files = []
+        for entry in os.scandir(self.shared_dir):
+            if entry.name.endswith('.pickle'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _sweep(self):
+        """Delete the least recently used shared entries until under shared_max_bytes"""
+        try:
+            files = sorted(self._shared_files())
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.shared_max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            stats = {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'uncached': self.uncached,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+        if self.shared_dir:
+            try:
+                files = self._shared_files()
+                stats['shared_entries'] = len(files)
+                stats['shared_bytes'] = sum(size for _, size, _ in files)
+            except OSError:
+                pass
+        return stats
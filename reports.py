@@ -0,0 +1,256 @@
+"""Scheduled, pre-generated trainee/training reports.
+
+Each report definition splits trainees and trainings into date partitions
+(ISO weeks or months of training_date) and writes one Excel and one PDF file
+per partition under REPORTS_DIR:
+
+    reports/<report>/<table>/<partition>.xlsx|.pdf
+    reports/<report>/manifest.json
+
+A run first asks the database for a fingerprint of every partition (row
+count plus an XOR of per-row CRC32s over the exported columns, so inserts,
+edits and deletes all change it) and only regenerates partitions whose
+fingerprint differs from the manifest. A quiet night therefore costs one
+aggregate query per table. Moving rows to the archive does not change their
+content, so archival never triggers a rebuild.
+
+Every district shard is read: fingerprints add up counts and XOR checksums
+across shards, and partition rows are gathered from each in turn.
+
+Run from cron, off-peak:  python reports.py [--report NAME] [--full]
+"""
+import argparse
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+import exports
+import shards
+from archive import ARCHIVE_TABLES
+from config import Config
+from db import get_db_connection
+
+config = Config()
+
+REPORTS = {
+    'weekly': {'period': 'week', 'history': 26},
+    'monthly': {'period': 'month', 'history': 24},
+}
+
+# Partition key per period; DATE_FORMAT %x-W%v is the ISO year and week
+PERIOD_KEYS = {
+    'week': "DATE_FORMAT(training_date, '%x-W%v')",
+    'month': "DATE_FORMAT(training_date, '%Y-%m')",
+}
+
+# Columns and PDF headers, matching the on-demand exports
+TABLES = {
+    'trainees': {
+        'excel': """id, name, mobile_number, gender, age, department, designation, address, block,
+                    district, training_date, cpr_training, first_aid_kit_given, life_saving_skills, created_at""",
+        'pdf': """name, mobile_number, gender, age, department, address, block, training_date,
+                  cpr_training, first_aid_kit_given""",
+        'headers': ['Name', 'Mobile', 'Gender', 'Age', 'Department',
+                    'Address', 'Block', 'Training Date', 'CPR', 'First Aid'],
+    },
+    'trainings': {
+        'excel': """id, title, training_topic, description, address, block, district,
+                    training_date, training_time, duration_hours, trainees, created_at, updated_at""",
+        'pdf': """title, training_topic, address, block, training_date, training_time,
+                  duration_hours, trainees""",
+        'headers': ['Title', 'Topic', 'Address', 'Block', 'Date',
+                    'Time', 'Duration (hrs)', 'Trainees'],
+    },
+}
+
+FORMATS = ('xlsx', 'pdf')
+
+
+def partition_range(period, key):
+    """Return the [start, end) training_date range of a partition key"""
+    if period == 'week':
+        year, week = key.split('-W')
+        start = date.fromisocalendar(int(year), int(week), 1)
+        return start, start + timedelta(days=7)
+    year, month = (int(part) for part in key.split('-'))
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def window_start(period, history, today=None):
+    """First training_date covered by a report keeping `history` partitions"""
+    today = today or date.today()
+    if period == 'week':
+        return today - timedelta(days=today.weekday(), weeks=history - 1)
+    month_index = today.year * 12 + today.month - 1 - (history - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def source(table):
+    # Reports cover hot and archived rows alike
+    return f"(SELECT * FROM {table} UNION ALL SELECT * FROM {ARCHIVE_TABLES[table]}) AS {table}"
+
+
+def fingerprints(connections, table, period, since):
+    """Return {partition: fingerprint} for every partition from `since` on, over every shard"""
+    key = PERIOD_KEYS[period]
+    columns = TABLES[table]['excel']
+    totals = {}
+    for connection in connections:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"""
+                SELECT {key} AS part, COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', {columns})))
+                FROM {source(table)}
+                WHERE training_date >= '{since.isoformat()}'
+                GROUP BY part
+            """)
+            for part, count, checksum in cursor.fetchall():
+                total_count, total_checksum = totals.get(part, (0, 0))
+                totals[part] = (total_count + count, total_checksum ^ int(checksum))
+        finally:
+            cursor.close()
+    return {part: f"{count}:{checksum}" for part, (count, checksum) in totals.items()}
+
+
+def report_dir(name):
+    return os.path.join(config.REPORTS_DIR, name)
+
+
+def load_manifest(name):
+    try:
+        with open(os.path.join(report_dir(name), 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_atomic(path, data):
+    """Replace path with data so readers never see a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def partition_rows(connections, table, columns, start, end):
+    """A partition's rows from every shard, ordered by training_date, id"""
+    data = []
+    for connection in connections:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"SELECT {columns} FROM {source(table)} "
+                "WHERE training_date >= %s AND training_date < %s ORDER BY training_date, id",
+                (start, end)
+            )
+            data.extend(cursor.fetchall())
+        finally:
+            cursor.close()
+    # Stable, and shards come in ascending id ranges, so ties stay in id order
+    data.sort(key=lambda row: row['training_date'])
+    return data
+
+
+def generate_partition(connections, name, table, period, part):
+    start, end = partition_range(period, part)
+    spec = TABLES[table]
+    outputs = {}
+    for fmt, columns in (('xlsx', spec['excel']), ('pdf', spec['pdf'])):
+        data = partition_rows(connections, table, columns, start, end)
+        title = f"{table} {part}"
+        if fmt == 'xlsx':
+            outputs[fmt] = exports.build_excel(table, data)
+        else:
+            outputs[fmt] = exports.build_pdf(title, spec['headers'], data)
+
+    for fmt, output in outputs.items():
+        write_atomic(os.path.join(report_dir(name), table, f"{part}.{fmt}"), output.getvalue())
+
+
+def remove_partition(name, table, part):
+    for fmt in FORMATS:
+        try:
+            os.remove(os.path.join(report_dir(name), table, f"{part}.{fmt}"))
+        except FileNotFoundError:
+            pass
+
+
+def run_report(connections, name, full=False):
+    definition = REPORTS[name]
+    period = definition['period']
+    since = window_start(period, definition['history'])
+    manifest = {} if full else load_manifest(name)
+    previous = manifest.get('partitions', {})
+    partitions = {}
+
+    for table in TABLES:
+        current = fingerprints(connections, table, period, since)
+        known = previous.get(table, {})
+        changed = sorted(part for part, fp in current.items() if known.get(part) != fp)
+        for part in changed:
+            generate_partition(connections, name, table, period, part)
+        # Partitions that emptied out or aged past the history window
+        for part in set(known) - set(current):
+            remove_partition(name, table, part)
+        partitions[table] = current
+        print(f"{name}/{table}: {len(changed)} of {len(current)} partitions regenerated")
+
+    manifest = {
+        'period': period,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'partitions': partitions,
+    }
+    write_atomic(os.path.join(report_dir(name), 'manifest.json'),
+                 json.dumps(manifest, indent=2).encode('utf-8'))
+
+
+def list_reports():
+    """Describe the generated files of every report, newest partition first"""
+    result = []
+    for name, definition in REPORTS.items():
+        manifest = load_manifest(name)
+        files = []
+        for table, parts in manifest.get('partitions', {}).items():
+            for part in sorted(parts, reverse=True):
+                files.append({
+                    'table': table,
+                    'partition': part,
+                    'formats': {fmt: f"{table}/{part}.{fmt}" for fmt in FORMATS},
+                })
+        result.append({
+            'name': name,
+            'period': definition['period'],
+            'generated_at': manifest.get('generated_at'),
+            'files': files,
+        })
+    return result
+
+
+def run(names=None, full=False):
+    # Every shard in shard order, so ascending ids stay in order across them
+    connections = [get_db_connection(shard=shard) for shard in shards.shard_names()]
+    try:
+        if not all(connections):
+            raise SystemExit("Database connection failed")
+        for name in names or REPORTS:
+            run_report(connections, name, full=full)
+    except mysql.connector.Error as e:
+        raise SystemExit(f"Report generation failed: {e}")
+    finally:
+        for connection in connections:
+            if connection:
+                connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pre-generate scheduled Excel/PDF reports')
+    parser.add_argument('--report', action='append', choices=sorted(REPORTS),
+                        help='report to generate (default: all)')
+    parser.add_argument('--full', action='store_true', help='regenerate every partition')
+    args = parser.parse_args()
+    run(names=args.report, full=args.full)
@@ -0,0 +1,336 @@
+"""District sharding of trainees and trainings.
+
+Each district's trainees and trainings live on one database, its shard.
+Shards are listed in DB_SHARDS; shard 0, "default", is the primary itself,
+which also keeps users, jobs and the districts table mapping each district
+to its shard. Adding a district is a row in districts and district_blocks;
+adding capacity is a new shard that new (or moved) districts point at.
+
+Record ids are unique across shards: shard N's tables count up from
+N * SHARD_ID_SPAN (set by `shards.py --init`), so an id alone names the
+shard holding the record. Moving a district that already has rows to
+another shard means re-inserting them there, under new ids.
+
+Admin-wide lists, counts and exports scatter one query to every shard in
+parallel and gather the results; merge_sorted() combines lists each shard
+already sorted.
+
+    python shards.py --status                 districts, shards, rows and id headroom
+    python shards.py --init east              create the schema on a new shard
+    python shards.py --add-district durg Durg east --blocks Durg Patan Dhamdha
+"""
+import argparse
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import mysql.connector
+
+from config import Config
+from db import DEFAULT_SHARD, SHARDS, get_db_connection, run_statement, session_recently_wrote
+
+config = Config()
+
+# Shard N's ids start above N * SHARD_ID_SPAN: room for 100 shards of 20M
+# records each inside an INT id
+SHARD_ID_SPAN = 20000000
+AUTO_INCREMENT_TABLES = ('trainees', 'trainings')
+
+SHARD_INDEXES = {0: DEFAULT_SHARD, **{index: name for name, (index, _, _, _) in SHARDS.items()}}
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'schema.sql')
+
+
+class UnknownDistrict(ValueError):
+    pass
+
+
+def shard_names():
+    """Every shard, in index order"""
+    return [SHARD_INDEXES[index] for index in sorted(SHARD_INDEXES)]
+
+
+def shard_index(shard):
+    return 0 if shard == DEFAULT_SHARD else SHARDS[shard][0]
+
+
+def shard_for_id(record_id):
+    """Shard holding a trainee or training id, or None if no shard can hold it"""
+    return SHARD_INDEXES.get(int(record_id) // SHARD_ID_SPAN)
+
+
+DISTRICTS_QUERY = "SELECT code, name, shard FROM districts ORDER BY code"
+DISTRICT_BLOCKS_QUERY = "SELECT district_code, block FROM district_blocks ORDER BY district_code, block"
+
+
+def build_districts(district_rows, block_rows):
+    """{code: {'name', 'shard', 'blocks'}} from DISTRICTS_QUERY and DISTRICT_BLOCKS_QUERY rows"""
+    districts = {row['code']: {'name': row['name'], 'shard': row['shard'], 'blocks': []}
+                 for row in district_rows}
+    for row in block_rows:
+        if row['district_code'] in districts:
+            districts[row['district_code']]['blocks'].append(row['block'])
+    return districts
+
+
+def district_shard(districts, district):
+    """The shard a district is mapped to in a build_districts() map"""
+    info = districts.get(district)
+    if info is None:
+        raise UnknownDistrict(f"Unknown district: {district}")
+    if info['shard'] not in SHARD_INDEXES.values():
+        raise UnknownDistrict(f"District {district} is mapped to unconfigured shard {info['shard']}")
+    return info['shard']
+
+
+class DistrictMap:
+    """District -> shard and blocks, read from the primary and cached for ttl seconds"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._districts = None
+        self._loaded_at = 0.0
+
+    def _load(self):
+        connection = get_db_connection()
+        if not connection:
+            raise mysql.connector.errors.InterfaceError("Database connection failed")
+        try:
+            return build_districts(run_statement(connection, DISTRICTS_QUERY).rows,
+                                   run_statement(connection, DISTRICT_BLOCKS_QUERY).rows)
+        finally:
+            connection.close()
+
+    def districts(self):
+        """{code: {'name', 'shard', 'blocks'}}"""
+        with self._lock:
+            if self._districts is None or time.monotonic() - self._loaded_at >= self.ttl:
+                try:
+                    self._districts = self._load()
+                except mysql.connector.Error as e:
+                    if self._districts is None:
+                        raise
+                    # Keep routing with the last good map until the primary is back
+                    print(f"District map refresh error: {e}")
+                self._loaded_at = time.monotonic()
+            return self._districts
+
+    def shard_for(self, district):
+        return district_shard(self.districts(), district)
+
+    def route(self, district, block):
+        """Shard for a record in district and block, checking the block belongs to it"""
+        shard = self.shard_for(district)
+        if block not in self.districts()[district]['blocks']:
+            raise UnknownDistrict(f"Unknown block for district {district}: {block}")
+        return shard
+
+    def shards_for(self, district):
+        """Shards to read for a user's district; every shard when it is unset"""
+        if not district:
+            return shard_names()
+        return [self.shard_for(district)]
+
+    def invalidate(self):
+        with self._lock:
+            self._districts = None
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    if _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=config.SHARD_SCATTER_THREADS,
+                                               thread_name_prefix='shard-scatter')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+@contextmanager
+def open_connections(shards=None, read_only=True):
+    """{shard: connection} for scatter() calls that must see the same data.
+
+    Reads keyed by table versions (the dashboard fragments) look the
+    versions up and then read the rows; on separate connections the two can
+    land on different replicas, and rows from one lagging behind would be
+    cached under the other's newer versions. On one connection per shard
+    the rows are never older than the versions read before them.
+    """
+    shards = shard_names() if shards is None else list(shards)
+    read_only = read_only and not session_recently_wrote()
+    connections = {}
+    try:
+        for shard in shards:
+            connection = get_db_connection(read_only=read_only, shard=shard)
+            if not connection:
+                raise mysql.connector.errors.InterfaceError(f"Shard {shard} connection failed")
+            connections[shard] = connection
+        yield connections
+    finally:
+        for connection in connections.values():
+            connection.close()
+
+
+def scatter(fn, shards=None, read_only=True, connections=None):
+    """Run fn(connection, shard) on each shard in parallel; return [(shard, result)] in shard order.
+
+    fn runs outside the request context. A failure on any shard fails the
+    whole call, since an admin-wide figure silently missing districts would
+    be wrong. connections (from open_connections) are used instead of
+    taking a connection per call.
+    """
+    shards = shard_names() if shards is None else list(shards)
+    # Decided here: worker threads cannot see the session's recent writes
+    read_only = read_only and not session_recently_wrote()
+
+    def run(shard):
+        if connections is not None:
+            return fn(connections[shard], shard)
+        connection = get_db_connection(read_only=read_only, shard=shard)
+        if not connection:
+            raise mysql.connector.errors.InterfaceError(f"Shard {shard} connection failed")
+        try:
+            return fn(connection, shard)
+        finally:
+            connection.close()
+
+    if len(shards) <= 1:
+        return [(shard, run(shard)) for shard in shards]
+    futures = [(shard, _get_executor().submit(run, shard)) for shard in shards]
+    return [(shard, future.result()) for shard, future in futures]
+
+
+def merge_sorted(lists, key, reverse=False):
+    """Merge row lists that are each sorted by key into one sorted list"""
+    lists = [rows for rows in lists if rows]
+    if len(lists) <= 1:
+        return list(lists[0]) if lists else []
+    return list(heapq.merge(*lists, key=key, reverse=reverse))
+
+
+def sort_key(column):
+    """Key ordering rows like MySQL's ORDER BY column: NULLs first, text case-insensitively"""
+    def key(row):
+        value = row[column]
+        if isinstance(value, str):
+            value = value.casefold()
+        return (value is not None, value)
+    return key
+
+
+# -- administration -------------------------------------------------------
+
+def init_shard(shard):
+    """Create the schema on an empty shard database and start its id range"""
+    import migrate
+    if shard == DEFAULT_SHARD:
+        raise SystemExit("The default shard is the primary; use migrate.py")
+    connection = get_db_connection(shard=shard)
+    if not connection:
+        raise SystemExit(f"Shard {shard} connection failed")
+    cursor = connection.cursor()
+    try:
+        with open(SCHEMA_FILE) as f:
+            statements = migrate.split_statements(f.read())
+        for statement in statements:
+            # The shard's own database is already selected, and users stay on the primary
+            if statement.upper().startswith(('CREATE DATABASE', 'USE ', 'INSERT INTO USERS')):
+                continue
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+        connection.close()
+
+    migrate.migrate(shard=shard)
+
+    connection = get_db_connection(shard=shard)
+    cursor = connection.cursor()
+    try:
+        base = shard_index(shard) * SHARD_ID_SPAN + 1
+        for table in AUTO_INCREMENT_TABLES:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            if cursor.fetchone()[0] < base:
+                cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = {base}")
+        print(f"{shard}: schema ready, ids start at {base}")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def add_district(code, name, shard, blocks):
+    if shard not in SHARD_INDEXES.values():
+        raise SystemExit(f"Unknown shard {shard}; configure it in DB_SHARDS first")
+    connection = get_db_connection()
+    if not connection:
+        raise SystemExit("Database connection failed")
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        cursor.execute("SELECT shard FROM districts WHERE code = %s FOR UPDATE", (code,))
+        existing = cursor.fetchone()
+        if existing and existing[0] != shard:
+            connection.rollback()
+            raise SystemExit(f"District {code} is on shard {existing[0]}; its rows would have to move first")
+        cursor.execute(
+            "INSERT INTO districts (code, name, shard) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE name = VALUES(name)",
+            (code, name, shard)
+        )
+        cursor.executemany(
+            "INSERT IGNORE INTO district_blocks (district_code, block) VALUES (%s, %s)",
+            [(code, block) for block in blocks]
+        )
+        connection.commit()
+        print(f"{code}: {name} on shard {shard} with blocks {', '.join(blocks) or '(none)'}; "
+              f"workers pick it up within {config.DISTRICT_MAP_TTL:.0f}s")
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def status():
+    districts = DistrictMap(ttl=0).districts()
+    for shard in shard_names():
+        index = shard_index(shard)
+        hosted = [code for code, info in districts.items() if info['shard'] == shard]
+        print(f"{shard} (index {index}): districts {', '.join(hosted) or '(none)'}")
+        connection = get_db_connection(shard=shard)
+        if not connection:
+            print("  connection failed")
+            continue
+        cursor = connection.cursor()
+        try:
+            for table in AUTO_INCREMENT_TABLES:
+                cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table}")
+                rows, top = cursor.fetchone()
+                headroom = (index + 1) * SHARD_ID_SPAN - max(top, index * SHARD_ID_SPAN)
+                print(f"  {table}: {rows} rows, max id {top}, {headroom} ids left")
+        finally:
+            cursor.close()
+            connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Manage district shards')
+    parser.add_argument('--status', action='store_true', help='show districts, shards, rows and id headroom')
+    parser.add_argument('--init', metavar='SHARD', help='create the schema on a new shard')
+    parser.add_argument('--add-district', nargs=3, metavar=('CODE', 'NAME', 'SHARD'),
+                        help='map a district to a shard')
+    parser.add_argument('--blocks', nargs='*', default=[], help='blocks of the district being added')
+    args = parser.parse_args()
+
+    if args.init:
+        init_shard(args.init)
+    if args.add_district:
+        add_district(*args.add_district, args.blocks)
+    if args.status or not (args.init or args.add_district):
+        status()
@@ -0,0 +1,231 @@
+"""Single-flight coalescing of identical expensive reads.
+
+When many users open the same dashboard or export at once, only the first
+request for a key runs the work; requests for the same key that arrive while
+it is in flight wait for it and share its result. Keys must include the data
+version (see db.get_table_versions), so a request made after a write never
+joins a flight started before it. Nothing is kept once a flight lands -
+this is coalescing, not caching.
+
+Within a process, flights are shared between threads. With SINGLEFLIGHT_DIR
+set, the thread running a flight also takes an exclusive flock on a file
+named after the key, so the same read in other gunicorn workers waits too
+and picks up the pickled result from that directory (a tmpfs such as
+/dev/shm keeps this off the disk). Without fcntl (Windows) flights are per
+process only.
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # no cross-process coalescing
+    fcntl = None
+
+# Seconds between attempts to take another worker's flight lock
+POLL_INTERVAL = 0.05
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run fn() once per key among concurrent callers and share the outcome.
+
+    A caller that waits longer than wait_timeout for another flight runs fn()
+    itself rather than failing. Exceptions from a flight are re-raised in
+    every caller that joined it within the process; other workers run their
+    own attempt instead.
+    """
+
+    def __init__(self, shared_dir='', wait_timeout=60):
+        self.shared_dir = shared_dir if fcntl else ''
+        self.wait_timeout = wait_timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.shared = 0
+        self.timeouts = 0
+        self.errors = 0
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+
+    def do(self, key, fn):
+        """Return fn()'s result, shared with concurrent callers for the same key.
+
+        A key of None means the caller could not determine the data version,
+        so fn() runs on its own.
+        """
+        if key is None:
+            return fn()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout):
+                with self._lock:
+                    self.timeouts += 1
+                return self._execute(fn)
+            with self._lock:
+                self.coalesced += 1
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._run(key, fn)
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def _run(self, key, fn):
+        if not self.shared_dir:
+            return self._execute(fn)
+
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        lock_path = os.path.join(self.shared_dir, f"{digest}.lock")
+        result_path = os.path.join(self.shared_dir, f"{digest}.result")
+        started = time.time_ns()
+        fd, locked = self._acquire(lock_path)
+        try:
+            if locked:
+                # A result written after we arrived came from a flight we
+                # overlapped with, and the key pins its data version
+                result = self._read_result(result_path, started)
+                if result is not None:
+                    with self._lock:
+                        self.shared += 1
+                    return result[0]
+                value = self._execute(fn)
+                self._write_result(result_path, value)
+                return value
+            # Another worker has held the key past wait_timeout
+            with self._lock:
+                self.timeouts += 1
+            return self._execute(fn)
+        finally:
+            os.close(fd)
+
+    def _acquire(self, lock_path):
+        """Open and flock the key's lock file, waiting up to wait_timeout.
+
+        Returns (fd, locked); the lock is released when fd closes. If _sweep
+        removed the file while we waited on it, the lock we got guards nothing,
+        so open the path again.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o600)
+            if not self._wait_for_lock(fd, deadline):
+                return fd, False
+            if self._is_current(fd, lock_path):
+                # The mtime marks the key's last use for _sweep
+                os.utime(fd)
+                return fd, True
+            os.close(fd)
+
+    @staticmethod
+    def _is_current(fd, path):
+        try:
+            return os.fstat(fd).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _wait_for_lock(self, fd, deadline):
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(POLL_INTERVAL)
+
+    def _execute(self, fn):
+        with self._lock:
+            self.executions += 1
+        return fn()
+
+    def _read_result(self, path, since):
+        try:
+            if os.stat(path).st_mtime_ns < since:
+                return None
+            with open(path, 'rb') as f:
+                return (pickle.load(f),)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_result(self, path, value):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            print(f"Single-flight result write error: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._sweep()
+
+    def _sweep(self):
+        """Remove result and lock files no flight can still be waiting for"""
+        cutoff = time.time() - max(self.wait_timeout * 2, 60)
+        try:
+            for entry in os.scandir(self.shared_dir):
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                if entry.name.endswith('.result'):
+                    os.remove(entry.path)
+                elif entry.name.endswith('.lock'):
+                    self._remove_lock(entry.path)
+        except OSError:
+            pass
+
+    def _remove_lock(self, path):
+        """Unlink an idle lock file while holding its flock, so no flight is using it"""
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if self._is_current(fd, path):
+                os.remove(path)
+        except BlockingIOError:
+            pass
+        finally:
+            os.close(fd)
+
+    def stats(self):
+        with self._lock:
+            requests = self.executions + self.coalesced + self.shared
+            return {
+                'in_flight': len(self._flights),
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'shared_across_workers': self.shared,
+                'saved': self.coalesced + self.shared,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'cross_worker': bool(self.shared_dir),
+                'saved_rate': round((self.coalesced + self.shared) / requests, 4) if requests else 0.0,
+            }
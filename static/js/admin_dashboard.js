@@ -0,0 +1,702 @@
+// Tab switching function
+function switchTab(tabName) {
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.style.display = 'none';
+    });
+    
+    document.querySelectorAll('.nav-tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    
+    document.getElementById(tabName).style.display = 'block';
+    document.querySelector(`[data-tab="${tabName}"]`).classList.add('active');
+}
+
+// Filter functions
+function filterProfessionals() {
+    const searchTerm = document.getElementById('professionalSearch').value.toLowerCase();
+    const deptFilter = document.getElementById('professionalDeptFilter').value.toLowerCase();
+    
+    const cards = document.querySelectorAll('.professional-card');
+    let visibleCount = 0;
+    
+    cards.forEach(card => {
+        const name = card.dataset.name;
+        const department = card.dataset.department;
+        
+        const matchesSearch = !searchTerm || name.includes(searchTerm);
+        const matchesDept = !deptFilter || department.includes(deptFilter);
+        
+        if (matchesSearch && matchesDept) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+}
+
+function filterTrainees() {
+    const searchTerm = document.getElementById('traineeSearch').value.toLowerCase();
+    const deptFilter = document.getElementById('traineeDeptFilter').value.toLowerCase();
+    const blockFilter = document.getElementById('traineeBlockFilter').value.toLowerCase();
+    
+    const cards = document.querySelectorAll('.trainee-card');
+    let visibleCount = 0;
+    
+    cards.forEach(card => {
+        const name = card.dataset.name;
+        const department = card.dataset.department;
+        const block = card.dataset.block;
+        
+        const matchesSearch = !searchTerm || name.includes(searchTerm);
+        const matchesDept = !deptFilter || department.includes(deptFilter);
+        const matchesBlock = !blockFilter || block.includes(blockFilter);
+        
+        if (matchesSearch && matchesDept && matchesBlock) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+    
+    document.querySelector('.data-count').textContent = `Showing ${visibleCount} trainees`;
+}
+
+function filterTrainings() {
+    const searchTerm = document.getElementById('trainingSearch').value.toLowerCase();
+    const blockFilter = document.getElementById('trainingBlockFilter').value.toLowerCase();
+    const statusFilter = document.getElementById('trainingStatusFilter').value.toLowerCase();
+    
+    const cards = document.querySelectorAll('.training-card');
+    let visibleCount = 0;
+    
+    cards.forEach(card => {
+        const title = card.dataset.title;
+        const topic = card.dataset.topic;
+        const block = card.dataset.block;
+        const status = card.dataset.status;
+        
+        const matchesSearch = !searchTerm || title.includes(searchTerm) || topic.includes(searchTerm);
+        const matchesBlock = !blockFilter || block.includes(blockFilter);
+        const matchesStatus = !statusFilter || status.includes(statusFilter);
+        
+        if (matchesSearch && matchesBlock && matchesStatus) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+}
+
+function sortProfessionals() {
+    const sortBy = document.getElementById('professionalSort').value;
+    const grid = document.getElementById('professionalsGrid');
+    const cards = Array.from(document.querySelectorAll('.professional-card'));
+    
+    cards.sort((a, b) => {
+        let aValue, bValue;
+        
+        if (sortBy === 'name') {
+            aValue = a.dataset.name;
+            bValue = b.dataset.name;
+            return aValue.localeCompare(bValue);
+        } else if (sortBy === 'total_trainings') {
+            aValue = parseInt(a.dataset.trainings) || 0;
+            bValue = parseInt(b.dataset.trainings) || 0;
+            return bValue - aValue; // Descending order
+        } else if (sortBy === 'experience_years') {
+            aValue = parseInt(a.dataset.experience) || 0;
+            bValue = parseInt(b.dataset.experience) || 0;
+            return bValue - aValue; // Descending order
+        }
+        
+        return 0;
+    });
+    
+    // Remove all cards and re-add them in sorted order
+    cards.forEach(card => card.remove());
+    cards.forEach(card => grid.appendChild(card));
+}
+
+// CRUD operations
+async function handleAddProfessional(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    
+    const data = {
+        name: formData.get('name'),
+        username: formData.get('username'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        experience_years: parseInt(formData.get('experience_years')) || 0,
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        specialization: formData.get('specialization')
+    };
+    
+    try {
+        const response = await apiRequest('/api/professionals', {
+            method: 'POST',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Professional added successfully!', 'success');
+            hideModal('addProfessionalModal');
+            form.reset();
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error adding professional:', error);
+    }
+}
+
+async function handleAddTrainee(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    
+    const data = {
+        name: formData.get('name'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        cpr_training: form.querySelector('input[name="cpr_training"]').checked,
+        first_aid_kit_given: form.querySelector('input[name="first_aid_kit_given"]').checked,
+        life_saving_skills: form.querySelector('input[name="life_saving_skills"]').checked
+    };
+    
+    try {
+        const response = await apiRequest('/api/trainees', {
+            method: 'POST',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Trainee added successfully!', 'success');
+            hideModal('addTraineeModal');
+            form.reset();
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error adding trainee:', error);
+    }
+}
+
+async function handleAddTraining(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    
+    const data = {
+        title: formData.get('title'),
+        training_topic: formData.get('training_topic'),
+        description: formData.get('description'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        training_time: formData.get('training_time'),
+        duration_hours: parseFloat(formData.get('duration_hours')),
+        trainees: parseInt(formData.get('max_trainees')),
+        conducted_by: parseInt(formData.get('conducted_by'))
+    };
+    
+    try {
+        const response = await apiRequest('/api/trainings', {
+            method: 'POST',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Training added successfully!', 'success');
+            hideModal('addTrainingModal');
+            form.reset();
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error adding training:', error);
+    }
+}
+
+function viewProfessional(id) {
+    const professional = professionalsData.find(p => p.id === id);
+    if (professional) {
+        alert(`Professional Details:\n\nName: ${professional.name}\nUsername: ${professional.username}\nMobile: ${professional.mobile_number}\nDepartment: ${professional.department || 'Not specified'}\nSpecialization: ${professional.specialization || 'Not specified'}\nExperience: ${professional.experience_years || 0} years`);
+    }
+}
+
+function editProfessional(id) {
+    editProfessionalRecord(id);
+}
+
+async function deleteProfessional(id) {
+    if (confirmDelete('Are you sure you want to delete this medical professional?')) {
+        try {
+            const response = await apiRequest(`/api/professionals/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success && response.job_id) {
+                showAlert('Professional has many records; deleting in the background...', 'info');
+                await waitForDeleteJob(response.job_id);
+            }
+            if (response.success) {
+                showAlert('Professional deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting professional:', error);
+        }
+    }
+}
+
+function viewTrainee(id) {
+    const trainee = traineesData.find(t => t.id === id);
+    if (trainee) {
+        alert(`Trainee Details:\n\nName: ${trainee.name}\nMobile: ${trainee.mobile_number}\nDepartment: ${trainee.department}\nBlock: ${trainee.block}\nTraining Date: ${trainee.training_date}`);
+    }
+}
+
+function editTrainee(id) {
+    editTraineeRecord(id);
+}
+
+async function deleteTrainee(id) {
+    if (confirmDelete('Are you sure you want to delete this trainee?')) {
+        try {
+            const response = await apiRequest(`/api/trainees/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Trainee deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting trainee:', error);
+        }
+    }
+}
+
+function viewTraining(id) {
+    const training = trainingsData.find(t => t.id === id);
+    if (training) {
+        alert(`Training Details:\n\nTitle: ${training.title}\nTopic: ${training.training_topic}\nDate: ${training.training_date}\nTime: ${training.training_time}\nLocation: ${training.address}, ${training.block}\nStatus: ${training.status}`);
+    }
+}
+
+function editTraining(id) {
+    editTrainingRecord(id);
+}
+
+async function deleteTraining(id) {
+    if (confirmDelete('Are you sure you want to delete this training?')) {
+        try {
+            const response = await apiRequest(`/api/trainings/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Training deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting training:', error);
+        }
+    }
+}
+
+// View Functions
+function viewProfessionalDetails(id) {
+    const professional = professionalsData.find(p => p.id === id);
+    if (professional) {
+        const detailsHtml = `
+            <div class="details-grid">
+                <div class="detail-item">
+                    <label>Name:</label>
+                    <span>${professional.name}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Username:</label>
+                    <span>${professional.username}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Mobile:</label>
+                    <span>${professional.mobile_number || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Gender:</label>
+                    <span>${professional.gender || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Age:</label>
+                    <span>${professional.age || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Department:</label>
+                    <span>${professional.department || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Designation:</label>
+                    <span>${professional.designation || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Specialization:</label>
+                    <span>${professional.specialization || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Experience:</label>
+                    <span>${professional.experience_years || 0} years</span>
+                </div>
+                <div class="detail-item">
+                    <label>Total Trainings:</label>
+                    <span>${professional.total_trainings || 0}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Total Trainees:</label>
+                    <span>${professional.total_trainees_trained || 0}</span>
+                </div>
+            </div>
+        `;
+        document.getElementById('professionalDetails').innerHTML = detailsHtml;
+        showModal('viewProfessionalModal');
+    }
+}
+
+function viewTraineeDetails(id) {
+    const trainee = traineesData.find(t => t.id === id);
+    if (trainee) {
+        const detailsHtml = `
+            <div class="details-grid">
+                <div class="detail-item">
+                    <label>Name:</label>
+                    <span>${trainee.name}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Mobile:</label>
+                    <span>${trainee.mobile_number || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Gender:</label>
+                    <span>${trainee.gender}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Age:</label>
+                    <span>${trainee.age}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Department:</label>
+                    <span>${trainee.department}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Designation:</label>
+                    <span>${trainee.designation || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Address:</label>
+                    <span>${trainee.address}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Block:</label>
+                    <span>${trainee.block}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Training Date:</label>
+                    <span>${trainee.training_date}</span>
+                </div>
+                <div class="detail-item">
+                    <label>CPR Training:</label>
+                    <span class="badge ${trainee.cpr_training ? 'badge-success' : 'badge-error'}">
+                        ${trainee.cpr_training ? 'Completed' : 'Pending'}
+                    </span>
+                </div>
+                <div class="detail-item">
+                    <label>First Aid Kit:</label>
+                    <span class="badge ${trainee.first_aid_kit_given ? 'badge-success' : 'badge-error'}">
+                        ${trainee.first_aid_kit_given ? 'Given' : 'Not Given'}
+                    </span>
+                </div>
+                <div class="detail-item">
+                    <label>Life Saving Skills:</label>
+                    <span class="badge ${trainee.life_saving_skills ? 'badge-success' : 'badge-error'}">
+                        ${trainee.life_saving_skills ? 'Trained' : 'Not Trained'}
+                    </span>
+                </div>
+            </div>
+        `;
+        document.getElementById('traineeDetails').innerHTML = detailsHtml;
+        showModal('viewTraineeModal');
+    }
+}
+
+function viewTrainingDetails(id) {
+    const training = trainingsData.find(t => t.id === id);
+    if (training) {
+        const detailsHtml = `
+            <div class="details-grid">
+                <div class="detail-item">
+                    <label>Title:</label>
+                    <span>${training.title}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Topic:</label>
+                    <span>${training.training_topic}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Description:</label>
+                    <span>${training.description || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Address:</label>
+                    <span>${training.address}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Block:</label>
+                    <span>${training.block}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Date:</label>
+                    <span>${training.training_date}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Time:</label>
+                    <span>${training.training_time}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Duration:</label>
+                    <span>${training.duration_hours} hours</span>
+                </div>
+                <div class="detail-item">
+                    <label>Max Trainees:</label>
+                    <span>${training.max_trainees}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Status:</label>
+                    <span class="badge ${training.status === 'Completed' ? 'badge-success' : training.status === 'Ongoing' ? 'badge-warning' : 'badge-info'}">
+                        ${training.status}
+                    </span>
+                </div>
+            </div>
+        `;
+        document.getElementById('trainingDetails').innerHTML = detailsHtml;
+        showModal('viewTrainingModal');
+    }
+}
+
+// Edit Functions
+function editProfessionalRecord(id) {
+    const professional = professionalsData.find(p => p.id === id);
+    if (professional) {
+        document.getElementById('editProfId').value = professional.id;
+        document.getElementById('editProfName').value = professional.name;
+        document.getElementById('editProfUsername').value = professional.username;
+        document.getElementById('editProfMobile').value = professional.mobile_number || '';
+        document.getElementById('editProfGender').value = professional.gender || '';
+        document.getElementById('editProfAge').value = professional.age || '';
+        document.getElementById('editProfDepartment').value = professional.department || '';
+        document.getElementById('editProfDesignation').value = professional.designation || '';
+        document.getElementById('editProfSpecialization').value = professional.specialization || '';
+        document.getElementById('editProfExperience').value = professional.experience_years || '';
+        showModal('editProfessionalModal');
+    }
+}
+
+function editTraineeRecord(id) {
+    const trainee = traineesData.find(t => t.id === id);
+    if (trainee) {
+        document.getElementById('editTraineeId').value = trainee.id;
+        document.getElementById('editTraineeName').value = trainee.name;
+        document.getElementById('editTraineeMobile').value = trainee.mobile_number || '';
+        document.getElementById('editTraineeGender').value = trainee.gender;
+        document.getElementById('editTraineeAge').value = trainee.age;
+        document.getElementById('editTraineeDepartment').value = trainee.department;
+        document.getElementById('editTraineeDesignation').value = trainee.designation || '';
+        document.getElementById('editTraineeAddress').value = trainee.address;
+        document.getElementById('editTraineeBlock').value = trainee.block;
+        document.getElementById('editTraineeTrainingDate').value = trainee.training_date;
+        document.getElementById('editTraineeCpr').checked = trainee.cpr_training || false;
+        document.getElementById('editTraineeFirstAid').checked = trainee.first_aid_kit_given || false;
+        document.getElementById('editTraineeLifeSaving').checked = trainee.life_saving_skills || false;
+        showModal('editTraineeModal');
+    }
+}
+
+function editTrainingRecord(id) {
+    const training = trainingsData.find(t => t.id === id);
+    if (training) {
+        document.getElementById('editTrainingId').value = training.id;
+        document.getElementById('editTrainingTitle').value = training.title;
+        document.getElementById('editTrainingTopic').value = training.training_topic;
+        document.getElementById('editTrainingDescription').value = training.description || '';
+        document.getElementById('editTrainingAddress').value = training.address;
+        document.getElementById('editTrainingBlock').value = training.block;
+        document.getElementById('editTrainingDate').value = training.training_date;
+        document.getElementById('editTrainingTime').value = training.training_time;
+        document.getElementById('editTrainingDuration').value = training.duration_hours;
+        document.getElementById('editTrainingMaxTrainees').value = training.max_trainees || training.trainees;
+        document.getElementById('editTrainingConductedBy').value = training.conducted_by;
+        document.getElementById('editTrainingStatus').value = training.status || 'Planned';
+        showModal('editTrainingModal');
+    }
+}
+
+// Edit Form Handlers
+async function handleEditProfessional(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const profId = formData.get('prof_id');
+    
+    const data = {
+        name: formData.get('name'),
+        username: formData.get('username'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        specialization: formData.get('specialization'),
+        experience_years: parseInt(formData.get('experience_years')) || 0
+    };
+    
+    try {
+        const response = await apiRequest(`/api/professionals/${profId}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Professional updated successfully!', 'success');
+            hideModal('editProfessionalModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating professional:', error);
+    }
+}
+
+async function handleEditTrainee(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const traineeId = formData.get('trainee_id');
+    
+    const data = {
+        name: formData.get('name'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        cpr_training: form.querySelector('input[name="cpr_training"]').checked,
+        first_aid_kit_given: form.querySelector('input[name="first_aid_kit_given"]').checked,
+        life_saving_skills: form.querySelector('input[name="life_saving_skills"]').checked
+    };
+    
+    try {
+        const response = await apiRequest(`/api/trainees/${traineeId}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Trainee updated successfully!', 'success');
+            hideModal('editTraineeModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating trainee:', error);
+    }
+}
+
+async function handleEditTraining(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const trainingId = formData.get('training_id');
+    
+    const data = {
+        title: formData.get('title'),
+        training_topic: formData.get('training_topic'),
+        description: formData.get('description'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        training_time: formData.get('training_time'),
+        duration_hours: parseFloat(formData.get('duration_hours')),
+        trainees: parseInt(formData.get('max_trainees')),
+        status: formData.get('status'),
+        conducted_by: parseInt(formData.get('conducted_by'))
+    };
+    
+    try {
+        const response = await apiRequest(`/api/trainings/${trainingId}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Training updated successfully!', 'success');
+            hideModal('editTrainingModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating training:', error);
+    }
+}
+
+// Export functions
+function exportToExcel(tableName) {
+    showAlert('Preparing Excel export...', 'info');
+    window.location.href = `/export/excel/${tableName}`;
+}
+
+function exportToPDF(tableName) {
+    showAlert('Preparing PDF export...', 'info');
+    window.location.href = `/export/pdf/${tableName}`;
+}
+
+function exportReport() {
+    showAlert('Preparing consolidated report...', 'info');
+    window.location.href = '/export/report';
+}
+
+// Pre-generated weekly/monthly reports (latest partitions of each)
+async function loadScheduledReports() {
+    const container = document.getElementById('scheduledReports');
+    if (!container) return;
+    
+    try {
+        const response = await apiRequest('/api/reports');
+        const lines = [];
+        response.reports.forEach(report => {
+            const latest = {};
+            report.files.forEach(file => {
+                if (!latest[file.table]) latest[file.table] = file;
+            });
+            Object.values(latest).forEach(file => {
+                const base = `/reports/${report.name}/`;
+                lines.push(`<p><strong>${report.name} ${file.table} (${file.partition}):</strong> ` +
+                    `<a href="${base}${file.formats.xlsx}">Excel</a> | <a href="${base}${file.formats.pdf}">PDF</a></p>`);
+            });
+        });
+        container.innerHTML = lines.length ? lines.join('') : '<p>No reports generated yet</p>';
+    } catch (error) {
+        container.innerHTML = '<p>Reports unavailable</p>';
+    }
+}
+
+document.addEventListener('DOMContentLoaded', loadScheduledReports);
@@ -0,0 +1,226 @@
+// Global JavaScript functions for React-like functionality
+
+// Modal functions
+function showModal(modalId) {
+    document.getElementById(modalId).style.display = 'flex';
+    document.body.style.overflow = 'hidden';
+}
+
+function hideModal(modalId) {
+    document.getElementById(modalId).style.display = 'none';
+    document.body.style.overflow = 'auto';
+}
+
+function closeModal(event) {
+    if (event.target.classList.contains('modal-overlay')) {
+        event.target.style.display = 'none';
+        document.body.style.overflow = 'auto';
+    }
+}
+
+// Search and filter functions
+function filterData(searchTerm, filterBy = '') {
+    const cards = document.querySelectorAll('.data-card');
+    let visibleCount = 0;
+
+    cards.forEach(card => {
+        const text = card.textContent.toLowerCase();
+        const matchesSearch = !searchTerm || text.includes(searchTerm.toLowerCase());
+        const matchesFilter = !filterBy || card.dataset.filterValue === filterBy || card.classList.contains(filterBy);
+
+        if (matchesSearch && matchesFilter) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+
+    // Update count display if exists
+    const countElement = document.querySelector('.data-count');
+    if (countElement) {
+        countElement.textContent = `Showing ${visibleCount} items`;
+    }
+}
+
+// Tab switching
+function switchTab(tabName) {
+    // Hide all tab contents
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.style.display = 'none';
+    });
+
+    // Remove active class from all tabs
+    document.querySelectorAll('.nav-tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+
+    // Show selected tab content
+    const targetContent = document.getElementById(tabName);
+    if (targetContent) {
+        targetContent.style.display = 'block';
+    }
+
+    // Add active class to clicked tab
+    event.target.classList.add('active');
+}
+
+// Form validation
+function validateForm(formElement) {
+    const requiredFields = formElement.querySelectorAll('[required]');
+    let isValid = true;
+
+    requiredFields.forEach(field => {
+        if (!field.value.trim()) {
+            field.classList.add('error');
+            isValid = false;
+        } else {
+            field.classList.remove('error');
+        }
+    });
+
+    return isValid;
+}
+
+// API calls (similar to React's fetch)
+async function apiRequest(url, options = {}) {
+    try {
+        const response = await fetch(url, {
+            headers: {
+                'Content-Type': 'application/json',
+                ...options.headers
+            },
+            ...options
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        return await response.json();
+    } catch (error) {
+        console.error('API request failed:', error);
+        showAlert('API request failed: ' + error.message, 'error');
+        throw error;
+    }
+}
+
+// Fetch a list API (e.g. '/api/trainees?user_role=admin') in the compact
+// columnar format, optionally projected to a few fields, and return row objects
+async function apiList(url, key, fields = null) {
+    const params = new URLSearchParams({ format: 'columnar' });
+    if (fields) {
+        params.set('fields', fields.join(','));
+    }
+    const response = await apiRequest(`${url}${url.includes('?') ? '&' : '?'}${params}`);
+    return decodeColumnar(response[key]);
+}
+
+// {columns, values, count} -> [{column: value, ...}, ...]
+function decodeColumnar(table) {
+    const rows = new Array(table.count);
+    for (let i = 0; i < table.count; i++) {
+        const row = {};
+        for (let c = 0; c < table.columns.length; c++) {
+            row[table.columns[c]] = table.values[c][i];
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
+
+// Poll a background delete job until it finishes
+async function waitForDeleteJob(jobId, intervalMs = 2000) {
+    while (true) {
+        const response = await apiRequest(`/api/jobs/delete/${jobId}`);
+        const job = response.data;
+        if (job.status === 'completed') {
+            return job;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Delete job failed');
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+// Start a bulk certificate job, wait for it, then download the zip
+async function generateCertificates(options = {}) {
+    showAlert('Generating certificates...', 'info');
+    try {
+        const started = await apiRequest('/api/certificates/jobs', {
+            method: 'POST',
+            body: JSON.stringify(options)
+        });
+        while (true) {
+            const response = await apiRequest(`/api/certificates/jobs/${started.job_id}`);
+            const job = response.data;
+            if (job.status === 'completed') {
+                if (!job.total) {
+                    showAlert('No trainees have completed this training yet', 'info');
+                    return;
+                }
+                showAlert(`${job.total} certificates ready`, 'success');
+                window.location.href = `/api/certificates/jobs/${job.id}/download`;
+                return;
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Certificate job failed');
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    } catch (error) {
+        showAlert('Certificate generation failed: ' + error.message, 'error');
+    }
+}
+
+// Show alerts (similar to React's toast notifications)
+function showAlert(message, type = 'info') {
+    const alertHTML = `
+        <div class="alert alert-${type}" style="position: fixed; top: 20px; right: 20px; z-index: 9999; min-width: 300px;">
+            <div class="alert-content">
+                <span class="alert-message">${message}</span>
+            </div>
+            <button class="alert-close" onclick="this.parentElement.remove()">&times;</button>
+        </div>
+    `;
+
+    document.body.insertAdjacentHTML('beforeend', alertHTML);
+
+    // Auto remove after 5 seconds
+    setTimeout(() => {
+        const alert = document.querySelector('.alert:last-of-type');
+        if (alert) alert.remove();
+    }, 5000);
+}
+
+// Confirm delete (similar to React's confirm dialog)
+function confirmDelete(message = 'Are you sure you want to delete this item?') {
+    return confirm(message);
+}
+
+// Initialize page
+document.addEventListener('DOMContentLoaded', function() {
+    // Auto-hide alerts after 5 seconds
+    document.querySelectorAll('.alert').forEach(alert => {
+        setTimeout(() => {
+            alert.style.opacity = '0';
+            setTimeout(() => alert.remove(), 300);
+        }, 5000);
+    });
+
+    // Initialize all modals
+    document.querySelectorAll('.modal-overlay').forEach(modal => {
+        modal.addEventListener('click', closeModal);
+    });
+
+    // Form validation on submit
+    document.querySelectorAll('form').forEach(form => {
+        form.addEventListener('submit', function(e) {
+            if (!validateForm(this)) {
+                e.preventDefault();
+                showAlert('Please fill in all required fields', 'error');
+            }
+        });
+    });
+});
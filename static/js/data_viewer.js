@@ -0,0 +1,357 @@
+// Add User
+async function handleAddUser(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    
+    const data = {
+        name: formData.get('name'),
+        username: formData.get('username'),
+        password: formData.get('password'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        role: formData.get('role'),
+        department: formData.get('department'),
+        designation: formData.get('designation')
+    };
+    
+    try {
+        const response = await apiRequest('/api/users', {
+            method: 'POST',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('User added successfully!', 'success');
+            hideModal('addUserModal');
+            form.reset();
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error adding user:', error);
+    }
+}
+
+// Edit Functions
+async function editUser(id) {
+    try {
+        const response = await apiRequest(`/api/users/${id}`);
+        if (response.success) {
+            const user = response.data;
+            
+            // Populate form fields
+            document.getElementById('editUserId').value = user.id;
+            document.getElementById('editUserName').value = user.name || '';
+            document.getElementById('editUserUsername').value = user.username || '';
+            document.getElementById('editUserMobile').value = user.mobile_number || '';
+            document.getElementById('editUserRole').value = user.role || '';
+            document.getElementById('editUserGender').value = user.gender || '';
+            document.getElementById('editUserAge').value = user.age || '';
+            document.getElementById('editUserDepartment').value = user.department || '';
+            document.getElementById('editUserDesignation').value = user.designation || '';
+            document.getElementById('editUserPassword').value = '';
+            
+            showModal('editUserModal');
+        }
+    } catch (error) {
+        console.error('Error fetching user:', error);
+        showAlert('Error loading user data', 'error');
+    }
+}
+
+async function handleEditUser(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const id = formData.get('id');
+    
+    const data = {
+        name: formData.get('name'),
+        username: formData.get('username'),
+        mobile_number: formData.get('mobile_number'),
+        role: formData.get('role'),
+        gender: formData.get('gender'),
+        age: formData.get('age') ? parseInt(formData.get('age')) : null,
+        department: formData.get('department'),
+        designation: formData.get('designation')
+    };
+    
+    // Only include password if it's provided
+    const password = formData.get('password');
+    if (password && password.trim()) {
+        data.password = password;
+    }
+    
+    try {
+        const response = await apiRequest(`/api/users/${id}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('User updated successfully!', 'success');
+            hideModal('editUserModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating user:', error);
+        showAlert('Error updating user', 'error');
+    }
+}
+
+async function editTrainee(id) {
+    try {
+        const response = await apiRequest(`/api/trainees/${id}`);
+        if (response.success) {
+            const trainee = response.data;
+            
+            // Populate form fields
+            document.getElementById('editTraineeId').value = trainee.id;
+            document.getElementById('editTraineeName').value = trainee.name || '';
+            document.getElementById('editTraineeMobile').value = trainee.mobile_number || '';
+            document.getElementById('editTraineeGender').value = trainee.gender || '';
+            document.getElementById('editTraineeAge').value = trainee.age || '';
+            document.getElementById('editTraineeDepartment').value = trainee.department || '';
+            document.getElementById('editTraineeDesignation').value = trainee.designation || '';
+            document.getElementById('editTraineeAddress').value = trainee.address || '';
+            document.getElementById('editTraineeBlock').value = trainee.block || '';
+            document.getElementById('editTraineeTrainingDate').value = trainee.training_date || '';
+            document.getElementById('editTraineeCPR').checked = trainee.cpr_training || false;
+            document.getElementById('editTraineeFirstAid').checked = trainee.first_aid_kit_given || false;
+            document.getElementById('editTraineeLifeSaving').checked = trainee.life_saving_skills || false;
+            
+            showModal('editTraineeModal');
+        }
+    } catch (error) {
+        console.error('Error fetching trainee:', error);
+        showAlert('Error loading trainee data', 'error');
+    }
+}
+
+async function handleEditTrainee(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const id = formData.get('id');
+    
+    const data = {
+        name: formData.get('name'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        cpr_training: form.querySelector('input[name="cpr_training"]').checked,
+        first_aid_kit_given: form.querySelector('input[name="first_aid_kit_given"]').checked,
+        life_saving_skills: form.querySelector('input[name="life_saving_skills"]').checked
+    };
+    
+    try {
+        const response = await apiRequest(`/api/trainees/${id}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Trainee updated successfully!', 'success');
+            hideModal('editTraineeModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating trainee:', error);
+        showAlert('Error updating trainee', 'error');
+    }
+}
+
+async function editTraining(id) {
+    try {
+        const response = await apiRequest(`/api/trainings/${id}`);
+        if (response.success) {
+            const training = response.data;
+            
+            // Populate form fields
+            document.getElementById('editTrainingId').value = training.id;
+            document.getElementById('editTrainingTitle').value = training.title || '';
+            document.getElementById('editTrainingTopic').value = training.training_topic || '';
+            document.getElementById('editTrainingDescription').value = training.description || '';
+            document.getElementById('editTrainingAddress').value = training.address || '';
+            document.getElementById('editTrainingBlock').value = training.block || '';
+            document.getElementById('editTrainingDate').value = training.training_date || '';
+            document.getElementById('editTrainingTime').value = training.training_time || '';
+            document.getElementById('editTrainingDuration').value = training.duration_hours || '';
+            document.getElementById('editTrainingTrainees').value = training.trainees || '';
+            document.getElementById('editTrainingConductedBy').value = training.conducted_by || '';
+            
+            showModal('editTrainingModal');
+        }
+    } catch (error) {
+        console.error('Error fetching training:', error);
+        showAlert('Error loading training data', 'error');
+    }
+}
+
+async function handleEditTraining(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const id = formData.get('id');
+    
+    const data = {
+        title: formData.get('title'),
+        training_topic: formData.get('training_topic'),
+        description: formData.get('description'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        training_time: formData.get('training_time'),
+        duration_hours: parseFloat(formData.get('duration_hours')),
+        trainees: parseInt(formData.get('trainees')),
+        conducted_by: parseInt(formData.get('conducted_by'))
+    };
+    
+    try {
+        const response = await apiRequest(`/api/trainings/${id}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Training updated successfully!', 'success');
+            hideModal('editTrainingModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating training:', error);
+        showAlert('Error updating training', 'error');
+    }
+}
+
+// Delete Functions
+async function deleteUser(id) {
+    if (confirmDelete('Are you sure you want to delete this user?')) {
+        try {
+            const response = await apiRequest(`/api/users/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success && response.job_id) {
+                showAlert('User has many records; deleting in the background...', 'info');
+                await waitForDeleteJob(response.job_id);
+            }
+            if (response.success) {
+                showAlert('User deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting user:', error);
+        }
+    }
+}
+
+async function deleteTrainee(id) {
+    if (confirmDelete('Are you sure you want to delete this trainee?')) {
+        try {
+            const response = await apiRequest(`/api/trainees/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Trainee deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting trainee:', error);
+        }
+    }
+}
+
+async function deleteTraining(id) {
+    if (confirmDelete('Are you sure you want to delete this training?')) {
+        try {
+            const response = await apiRequest(`/api/trainings/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Training deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting training:', error);
+        }
+    }
+}
+
+// Export functions
+function exportToExcel(tableName) {
+    showAlert('Preparing Excel export...', 'info');
+    window.location.href = `/export/excel/${tableName}`;
+}
+
+function exportToPDF(tableName) {
+    showAlert('Preparing PDF export...', 'info');
+    window.location.href = `/export/pdf/${tableName}`;
+}
+
+// Delete Functions
+async function deleteUser(id) {
+    if (confirmDelete('Are you sure you want to delete this user?')) {
+        try {
+            const response = await apiRequest(`/api/users/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success && response.job_id) {
+                showAlert('User has many records; deleting in the background...', 'info');
+                await waitForDeleteJob(response.job_id);
+            }
+            if (response.success) {
+                showAlert('User deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting user:', error);
+            showAlert('Error deleting user', 'error');
+        }
+    }
+}
+
+async function deleteTrainee(id) {
+    if (confirmDelete('Are you sure you want to delete this trainee?')) {
+        try {
+            const response = await apiRequest(`/api/trainees/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Trainee deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting trainee:', error);
+            showAlert('Error deleting trainee', 'error');
+        }
+    }
+}
+
+async function deleteTraining(id) {
+    if (confirmDelete('Are you sure you want to delete this training?')) {
+        try {
+            const response = await apiRequest(`/api/trainings/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Training deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting training:', error);
+            showAlert('Error deleting training', 'error');
+        }
+    }
+}
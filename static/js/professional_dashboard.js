@@ -0,0 +1,531 @@
+// Tab switching function
+function switchTab(tabName) {
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.style.display = 'none';
+    });
+    
+    document.querySelectorAll('.nav-tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    
+    document.getElementById(tabName).style.display = 'block';
+    document.querySelector(`[data-tab="${tabName}"]`).classList.add('active');
+}
+
+// Filter functions
+function filterTrainees() {
+    const searchTerm = document.getElementById('traineeSearch').value.toLowerCase();
+    const deptFilter = document.getElementById('traineeDeptFilter').value.toLowerCase();
+    const statusFilter = document.getElementById('traineeStatusFilter').value.toLowerCase();
+    
+    const cards = document.querySelectorAll('.trainee-card');
+    let visibleCount = 0;
+    
+    cards.forEach(card => {
+        const name = card.dataset.name;
+        const department = card.dataset.department;
+        const status = card.dataset.status;
+        
+        const matchesSearch = !searchTerm || name.includes(searchTerm);
+        const matchesDept = !deptFilter || department.includes(deptFilter);
+        const matchesStatus = !statusFilter || status.includes(statusFilter);
+        
+        if (matchesSearch && matchesDept && matchesStatus) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+}
+
+function filterTrainings() {
+    const searchTerm = document.getElementById('trainingSearch').value.toLowerCase();
+    const statusFilter = document.getElementById('trainingStatusFilter').value.toLowerCase();
+    
+    const cards = document.querySelectorAll('.training-card');
+    let visibleCount = 0;
+    
+    cards.forEach(card => {
+        const title = card.dataset.title;
+        const topic = card.dataset.topic;
+        const status = card.dataset.status;
+        
+        const matchesSearch = !searchTerm || title.includes(searchTerm) || topic.includes(searchTerm);
+        const matchesStatus = !statusFilter || status.includes(statusFilter);
+        
+        if (matchesSearch && matchesStatus) {
+            card.style.display = 'block';
+            visibleCount++;
+        } else {
+            card.style.display = 'none';
+        }
+    });
+}
+
+// Offline capture: registrations are queued in localStorage with a
+// client-generated key and uploaded in batches; the server ignores keys it
+// has already stored, so retrying a batch never creates duplicates.
+const PENDING_TRAINEES_KEY = `suraksha.pendingTrainees.${currentUserId}`;
+const SYNC_BATCH_SIZE = 500;
+let syncInProgress = false;
+
+function loadPendingTrainees() {
+    try {
+        return JSON.parse(localStorage.getItem(PENDING_TRAINEES_KEY)) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function savePendingTrainees(entries) {
+    localStorage.setItem(PENDING_TRAINEES_KEY, JSON.stringify(entries));
+    updatePendingBadge(entries.length);
+}
+
+function updatePendingBadge(count) {
+    const badge = document.getElementById('pendingSyncBadge');
+    if (!badge) return;
+    badge.textContent = `${count} waiting to sync`;
+    badge.style.display = count ? 'inline-block' : 'none';
+}
+
+function newClientKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, c => {
+        const r = Math.random() * 16 | 0;
+        return (c === 'x' ? r : (r & 0x3 | 0x8)).toString(16);
+    });
+}
+
+async function compressBody(text) {
+    if (!window.CompressionStream) {
+        return { body: text, headers: {} };
+    }
+    const stream = new Blob([text]).stream().pipeThrough(new CompressionStream('gzip'));
+    return { body: await new Response(stream).blob(), headers: { 'Content-Encoding': 'gzip' } };
+}
+
+// Upload queued registrations; returns the number newly stored on the server
+async function syncPendingTrainees() {
+    if (syncInProgress || !navigator.onLine) return 0;
+    syncInProgress = true;
+    let created = 0;
+    
+    try {
+        while (true) {
+            const batch = loadPendingTrainees().slice(0, SYNC_BATCH_SIZE);
+            if (!batch.length) break;
+            
+            const { body, headers } = await compressBody(JSON.stringify({ entries: batch }));
+            const response = await fetch('/api/trainees/batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', ...headers },
+                body
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const result = await response.json();
+            
+            // Drop acknowledged entries; invalid ones can never succeed
+            const done = new Set(result.results.map(r => r.client_key));
+            result.results
+                .filter(r => r.status === 'invalid')
+                .forEach(r => showAlert(`Could not register an entry: ${r.error}`, 'error'));
+            // Re-read: entries may have been queued while the request was in flight
+            savePendingTrainees(loadPendingTrainees().filter(entry => !done.has(entry.client_key)));
+            created += result.created;
+            if (!done.size) break;
+        }
+    } catch (error) {
+        console.warn('Trainee sync deferred:', error);
+    } finally {
+        syncInProgress = false;
+    }
+    return created;
+}
+
+// CRUD operations for Trainees
+async function handleAddTrainee(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    
+    const data = {
+        client_key: newClientKey(),
+        name: formData.get('name'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        cpr_training: formData.has('cpr_training'),
+        first_aid_kit_given: formData.has('first_aid_kit_given'),
+        life_saving_skills: formData.has('life_saving_skills')
+    };
+    
+    const pending = loadPendingTrainees();
+    pending.push(data);
+    savePendingTrainees(pending);
+    hideModal('addTraineeModal');
+    form.reset();
+    
+    const created = await syncPendingTrainees();
+    if (created) {
+        showAlert('Trainee added successfully!', 'success');
+        setTimeout(() => location.reload(), 1000);
+    } else {
+        showAlert('Saved offline; it will upload when the connection returns', 'info');
+    }
+}
+
+window.addEventListener('online', async () => {
+    if (await syncPendingTrainees()) {
+        showAlert('Offline registrations uploaded', 'success');
+        setTimeout(() => location.reload(), 1000);
+    }
+});
+
+document.addEventListener('DOMContentLoaded', () => {
+    updatePendingBadge(loadPendingTrainees().length);
+    syncPendingTrainees().then(created => {
+        if (created) {
+            showAlert(`${created} offline registrations uploaded`, 'success');
+            setTimeout(() => location.reload(), 1000);
+        }
+    });
+});
+
+// Connectivity in the field is patchy and 'online' is not always reliable
+setInterval(syncPendingTrainees, 60000);
+
+// CRUD operations for Trainings
+async function handleAddTraining(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    
+    const data = {
+        title: formData.get('title'),
+        training_topic: formData.get('training_topic'),
+        description: formData.get('description'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        training_time: formData.get('training_time'),
+        duration_hours: parseFloat(formData.get('duration_hours')),
+        max_trainees: parseInt(formData.get('max_trainees')),
+        conducted_by: currentUserId
+    };
+    
+    try {
+        const response = await apiRequest('/api/trainings', {
+            method: 'POST',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Training scheduled successfully!', 'success');
+            hideModal('addTrainingModal');
+            form.reset();
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error scheduling training:', error);
+    }
+}
+
+// View, Edit, Delete functions
+function viewTraineeDetails(id) {
+    const trainee = traineesData.find(t => t.id === id);
+    if (trainee) {
+        alert(`Trainee Details:\n\nName: ${trainee.name}\nMobile: ${trainee.mobile_number}\nGender: ${trainee.gender}\nAge: ${trainee.age}\nDepartment: ${trainee.department}\nBlock: ${trainee.block}\nTraining Date: ${trainee.training_date}\n\nTraining Status:\n- CPR Training: ${trainee.cpr_training ? 'Completed' : 'Pending'}\n- First Aid Kit: ${trainee.first_aid_kit_given ? 'Given' : 'Not Given'}\n- Life Saving Skills: ${trainee.life_saving_skills ? 'Trained' : 'Not Trained'}`);
+    }
+}
+
+function editTraineeRecord(id) {
+    showAlert('Edit functionality would open edit modal with pre-filled data', 'info');
+}
+
+async function deleteTraineeRecord(id) {
+    if (confirmDelete('Are you sure you want to delete this trainee?')) {
+        try {
+            const response = await apiRequest(`/api/trainees/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Trainee deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting trainee:', error);
+        }
+    }
+}
+
+function viewTrainingDetails(id) {
+    const training = trainingsData.find(t => t.id === id);
+    if (training) {
+        alert(`Training Details:\n\nTitle: ${training.title}\nTopic: ${training.training_topic}\nDescription: ${training.description || 'Not provided'}\nDate: ${training.training_date}\nTime: ${training.training_time}\nDuration: ${training.duration_hours} hours\nLocation: ${training.address}, ${training.block}\nMax Trainees: ${training.max_trainees}\nStatus: ${training.status}`);
+    }
+}
+
+function editTrainingRecord(id) {
+    showAlert('Edit functionality would open edit modal with pre-filled data', 'info');
+}
+
+async function deleteTrainingRecord(id) {
+    if (confirmDelete('Are you sure you want to delete this training?')) {
+        try {
+            const response = await apiRequest(`/api/trainings/${id}`, {
+                method: 'DELETE'
+            });
+            
+            if (response.success) {
+                showAlert('Training deleted successfully!', 'success');
+                setTimeout(() => location.reload(), 1000);
+            }
+        } catch (error) {
+            console.error('Error deleting training:', error);
+        }
+    }
+}
+
+// Enhanced functions for Professional Dashboard
+function viewTraineeDetails(id) {
+    const trainee = traineesData.find(t => t.id === id);
+    if (trainee) {
+        const detailsHtml = `
+            <div class="details-grid">
+                <div class="detail-item">
+                    <label>Name:</label>
+                    <span>${trainee.name}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Mobile:</label>
+                    <span>${trainee.mobile_number || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Gender:</label>
+                    <span>${trainee.gender}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Age:</label>
+                    <span>${trainee.age}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Department:</label>
+                    <span>${trainee.department}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Designation:</label>
+                    <span>${trainee.designation || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Address:</label>
+                    <span>${trainee.address}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Block:</label>
+                    <span>${trainee.block}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Training Date:</label>
+                    <span>${trainee.training_date}</span>
+                </div>
+                <div class="detail-item">
+                    <label>CPR Training:</label>
+                    <span class="badge ${trainee.cpr_training ? 'badge-success' : 'badge-error'}">
+                        ${trainee.cpr_training ? 'Completed' : 'Pending'}
+                    </span>
+                </div>
+                <div class="detail-item">
+                    <label>First Aid Kit:</label>
+                    <span class="badge ${trainee.first_aid_kit_given ? 'badge-success' : 'badge-error'}">
+                        ${trainee.first_aid_kit_given ? 'Given' : 'Not Given'}
+                    </span>
+                </div>
+                <div class="detail-item">
+                    <label>Life Saving Skills:</label>
+                    <span class="badge ${trainee.life_saving_skills ? 'badge-success' : 'badge-error'}">
+                        ${trainee.life_saving_skills ? 'Trained' : 'Not Trained'}
+                    </span>
+                </div>
+            </div>
+        `;
+        document.getElementById('traineeDetails').innerHTML = detailsHtml;
+        showModal('viewTraineeModal');
+    }
+}
+
+function editTraineeRecord(id) {
+    const trainee = traineesData.find(t => t.id === id);
+    if (trainee) {
+        document.getElementById('editTraineeId').value = trainee.id;
+        document.getElementById('editTraineeName').value = trainee.name;
+        document.getElementById('editTraineeMobile').value = trainee.mobile_number || '';
+        document.getElementById('editTraineeGender').value = trainee.gender;
+        document.getElementById('editTraineeAge').value = trainee.age;
+        document.getElementById('editTraineeDepartment').value = trainee.department;
+        document.getElementById('editTraineeDesignation').value = trainee.designation || '';
+        document.getElementById('editTraineeAddress').value = trainee.address;
+        document.getElementById('editTraineeBlock').value = trainee.block;
+        document.getElementById('editTraineeTrainingDate').value = trainee.training_date;
+        document.getElementById('editTraineeCpr').checked = trainee.cpr_training || false;
+        document.getElementById('editTraineeFirstAid').checked = trainee.first_aid_kit_given || false;
+        document.getElementById('editTraineeLifeSaving').checked = trainee.life_saving_skills || false;
+        showModal('editTraineeModal');
+    }
+}
+
+function viewTrainingDetails(id) {
+    const training = trainingsData.find(t => t.id === id);
+    if (training) {
+        const detailsHtml = `
+            <div class="details-grid">
+                <div class="detail-item">
+                    <label>Title:</label>
+                    <span>${training.title}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Topic:</label>
+                    <span>${training.training_topic}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Description:</label>
+                    <span>${training.description || 'N/A'}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Address:</label>
+                    <span>${training.address}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Block:</label>
+                    <span>${training.block}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Date:</label>
+                    <span>${training.training_date}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Time:</label>
+                    <span>${training.training_time}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Duration:</label>
+                    <span>${training.duration_hours} hours</span>
+                </div>
+                <div class="detail-item">
+                    <label>Max Trainees:</label>
+                    <span>${training.max_trainees}</span>
+                </div>
+                <div class="detail-item">
+                    <label>Status:</label>
+                    <span class="badge ${training.status === 'Completed' ? 'badge-success' : training.status === 'Ongoing' ? 'badge-warning' : 'badge-info'}">
+                        ${training.status}
+                    </span>
+                </div>
+            </div>
+        `;
+        document.getElementById('trainingDetails').innerHTML = detailsHtml;
+        showModal('viewTrainingModal');
+    }
+}
+
+function editTrainingRecord(id) {
+    const training = trainingsData.find(t => t.id === id);
+    if (training) {
+        document.getElementById('editTrainingId').value = training.id;
+        document.getElementById('editTrainingTitle').value = training.title;
+        document.getElementById('editTrainingTopic').value = training.training_topic;
+        document.getElementById('editTrainingDescription').value = training.description || '';
+        document.getElementById('editTrainingAddress').value = training.address;
+        document.getElementById('editTrainingBlock').value = training.block;
+        document.getElementById('editTrainingDate').value = training.training_date;
+        document.getElementById('editTrainingTime').value = training.training_time;
+        document.getElementById('editTrainingDuration').value = training.duration_hours;
+        document.getElementById('editTrainingMaxTrainees').value = training.max_trainees;
+        document.getElementById('editTrainingStatus').value = training.status || 'Planned';
+        showModal('editTrainingModal');
+    }
+}
+
+// Edit Form Handlers
+async function handleEditTrainee(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const traineeId = formData.get('trainee_id');
+    
+    const data = {
+        name: formData.get('name'),
+        mobile_number: formData.get('mobile_number'),
+        gender: formData.get('gender'),
+        age: parseInt(formData.get('age')),
+        department: formData.get('department'),
+        designation: formData.get('designation'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        cpr_training: formData.has('cpr_training'),
+        first_aid_kit_given: formData.has('first_aid_kit_given'),
+        life_saving_skills: formData.has('life_saving_skills')
+    };
+    
+    try {
+        const response = await apiRequest(`/api/trainees/${traineeId}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Trainee updated successfully!', 'success');
+            hideModal('editTraineeModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating trainee:', error);
+    }
+}
+
+async function handleEditTraining(event) {
+    event.preventDefault();
+    const form = event.target;
+    const formData = new FormData(form);
+    const trainingId = formData.get('training_id');
+    
+    const data = {
+        title: formData.get('title'),
+        training_topic: formData.get('training_topic'),
+        description: formData.get('description'),
+        address: formData.get('address'),
+        block: formData.get('block'),
+        training_date: formData.get('training_date'),
+        training_time: formData.get('training_time'),
+        duration_hours: parseFloat(formData.get('duration_hours')),
+        max_trainees: parseInt(formData.get('max_trainees')),
+        status: formData.get('status')
+    };
+    
+    try {
+        const response = await apiRequest(`/api/trainings/${trainingId}`, {
+            method: 'PUT',
+            body: JSON.stringify(data)
+        });
+        
+        if (response.success) {
+            showAlert('Training updated successfully!', 'success');
+            hideModal('editTrainingModal');
+            setTimeout(() => location.reload(), 1000);
+        }
+    } catch (error) {
+        console.error('Error updating training:', error);
+    }
+}
@@ -0,0 +1,94 @@
+"""Shared fixtures: an in-memory stand-in for MySQL connections.
+
+The app modules import mysql.connector and flask at import time, so test
+modules skip themselves (pytest.importorskip) where those are missing.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def normalize(query):
+    return ' '.join(query.split())
+
+
+class FakeCursor:
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.description = None
+        self.column_names = ()
+        self.with_rows = False
+        self.rowcount = -1
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, query, params=()):
+        query = normalize(query)
+        params = tuple(params or ())
+        self.connection.executed.append((query, params))
+        columns, rows, rowcount = self.connection.respond(query, params)
+        self.column_names = tuple(columns)
+        self.description = [(name,) for name in columns] or None
+        self.with_rows = bool(columns)
+        if self.dictionary:
+            rows = [dict(zip(columns, row)) for row in rows]
+        self._rows = list(rows)
+        self.rowcount = len(self._rows) if columns else rowcount
+
+    def executemany(self, query, seq_params):
+        for params in seq_params:
+            self.execute(query, params)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """A connection answering each statement through respond(query, params).
+
+    respond gets the query with its whitespace collapsed and returns
+    (columns, rows, rowcount); rows are tuples in column order.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.executed = []
+        self.in_transaction = False
+        self.closed = False
+        self.connection_id = id(self)
+
+    def cursor(self, dictionary=False, prepared=False, buffered=False):
+        return FakeCursor(self, dictionary=dictionary)
+
+    def start_transaction(self):
+        self.in_transaction = True
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_connection():
+    return FakeConnection
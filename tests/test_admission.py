@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+pytest.importorskip('fcntl')
+
+import admission  # noqa: E402
+
+
+@pytest.fixture
+def slots(tmp_path):
+    return admission._FileSlots(str(tmp_path), 'dashboard', 1)
+
+
+def test_in_use_counts_held_slots(slots):
+    assert slots.in_use() == 0
+    fd = slots.try_acquire()
+    assert slots.in_use() == 1
+    slots.release(fd)
+    assert slots.in_use() == 0
+
+
+def test_slot_left_by_a_dead_process_is_free(slots):
+    with open(slots.paths[0], 'w') as f:
+        f.write(str(2 ** 22 + 1))  # above Linux's pid_max, so never a live process
+    assert slots.in_use() == 0
+    assert slots.try_acquire() is not None
+
+
+def test_in_use_never_takes_a_free_slot(slots):
+    stop = threading.Event()
+
+    def poll_stats():
+        while not stop.is_set():
+            slots.in_use()
+
+    poller = threading.Thread(target=poll_stats)
+    poller.start()
+    try:
+        misses = 0
+        for _ in range(2000):
+            fd = slots.try_acquire()
+            if fd is None:
+                misses += 1
+            else:
+                slots.release(fd)
+    finally:
+        stop.set()
+        poller.join()
+
+    assert misses == 0
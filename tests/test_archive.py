@@ -0,0 +1,35 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+
+import archive  # noqa: E402
+
+CUTOFF = date(2024, 1, 1)
+
+
+@pytest.mark.parametrize('date_from, expected', [
+    (None, True),
+    ('', True),
+    ('2023-06-01', True),
+    (date(2023, 12, 31), True),
+    ('2024-01-01', False),
+    ('2024-03-01', False),
+    ('not a date', True),
+])
+def test_reaches_cutoff(date_from, expected):
+    assert archive.reaches_cutoff(CUTOFF, date_from) is expected
+
+
+def test_nothing_archived_reads_hot_table_only():
+    assert archive.reaches_cutoff(None, None) is False
+
+
+def test_unbounded_range_query_includes_archive(fake_connection):
+    connection = fake_connection(lambda query, params: (('archived_before',), [(CUTOFF,)], 0))
+    query, params = archive.range_query(connection, 'trainees', 'id, name', order_by='name')
+
+    assert 'UNION ALL SELECT * FROM trainees_archive' in query
+    assert params == []
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+
+import assets  # noqa: E402
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'site.css').write_text('body { color: red; }')
+    return tmp_path
+
+
+def builds(static_dir):
+    return sorted(path.name for path in static_dir.glob(assets.BUILD_PREFIX + '*'))
+
+
+def test_build_swaps_in_a_complete_tree(static_dir):
+    dist_dir = static_dir / 'dist'
+    manifest = assets.build(str(static_dir), str(dist_dir))
+
+    assert dist_dir.is_symlink()
+    assert json.loads((dist_dir / 'manifest.json').read_text()) == manifest
+    assert (dist_dir / manifest['css/site.css']).is_file()
+
+
+def test_rebuild_keeps_only_the_previous_build(static_dir):
+    dist_dir = static_dir / 'dist'
+    assets.build(str(static_dir), str(dist_dir))
+    first = dist_dir.resolve()
+    assets.build(str(static_dir), str(dist_dir))
+    second = dist_dir.resolve()
+    assets.build(str(static_dir), str(dist_dir))
+
+    assert not first.exists()
+    assert second.exists()
+    assert len(builds(static_dir)) == 2
+
+
+def test_build_replaces_a_plain_dist_directory(static_dir):
+    dist_dir = static_dir / 'dist'
+    dist_dir.mkdir()
+    (dist_dir / 'manifest.json').write_text('{}')
+
+    manifest = assets.build(str(static_dir), str(dist_dir))
+
+    assert dist_dir.is_symlink()
+    assert json.loads((dist_dir / 'manifest.json').read_text()) == manifest
+    assert len(builds(static_dir)) == 2
@@ -0,0 +1,115 @@
+import re
+
+import pytest
+
+pytest.importorskip('flask')
+mysql_connector = pytest.importorskip('mysql.connector')
+
+import cascade_delete  # noqa: E402
+import migrate  # noqa: E402
+import shards  # noqa: E402
+
+OWNER = 7
+
+
+def column_definition(table, column):
+    """The column's definition once schema.sql and every migration are applied"""
+    with open(shards.SCHEMA_FILE) as f:
+        statements = migrate.split_statements(f.read())
+    for _, _, path in migrate.discover():
+        with open(path) as f:
+            statements += migrate.split_statements(f.read())
+
+    definitions = {}
+    for statement in statements:
+        like = re.match(r'CREATE TABLE IF NOT EXISTS (\w+) LIKE (\w+)$', statement)
+        if like:
+            definitions[like.group(1)] = dict(definitions.get(like.group(2), {}))
+            continue
+        create = re.match(r'CREATE TABLE IF NOT EXISTS (\w+) \((.*)\)$', statement, re.S)
+        if create:
+            definitions[create.group(1)] = {
+                line.split()[0]: ' '.join(line.split()[1:])
+                for line in create.group(2).split(',\n') if line.strip()
+            }
+            continue
+        alter = re.match(r'ALTER TABLE (\w+)\s+(.*)$', statement, re.S)
+        if alter:
+            for name, definition in re.findall(r'MODIFY (\w+) ([^,]+)', alter.group(2)):
+                definitions.setdefault(alter.group(1), {})[name] = definition.strip()
+    return definitions[table][column]
+
+
+@pytest.fixture
+def owner_database(monkeypatch, fake_connection):
+    """One shard holding an owner with trainings and trainees, enforcing NOT NULL like strict mode"""
+    state = {
+        'users': {OWNER},
+        'trainings': {1: OWNER, 2: OWNER, 3: OWNER, 4: 99},
+        'trainings_archive': {5: OWNER},
+        'trainees': {10: OWNER, 11: OWNER, 12: OWNER, 13: 99},
+        'trainees_archive': {14: OWNER},
+        'job': {'id': 1, 'user_id': OWNER, 'role': 'professional', 'status': 'pending'},
+    }
+    not_null = {table: 'NOT NULL' in column_definition(table, 'registered_by')
+                for table in ('trainees', 'trainees_archive')}
+
+    def take(table, owner, limit):
+        ids = sorted(record for record, record_owner in state[table].items() if record_owner == owner)
+        return ids[:limit]
+
+    def respond(query, params):
+        match = re.match(r'DELETE FROM (trainings\w*) WHERE conducted_by = %s ORDER BY id LIMIT %s', query)
+        if match:
+            ids = take(match.group(1), *params)
+            for record in ids:
+                del state[match.group(1)][record]
+            return (), [], len(ids)
+        match = re.match(r'UPDATE (trainees\w*) SET registered_by = NULL WHERE registered_by = %s', query)
+        if match:
+            ids = take(match.group(1), *params)
+            if ids and not_null[match.group(1)]:
+                raise mysql_connector.errors.IntegrityError(
+                    msg="Column 'registered_by' cannot be null", errno=1048)
+            for record in ids:
+                state[match.group(1)][record] = None
+            return (), [], len(ids)
+        if query.startswith("UPDATE delete_jobs SET status = 'running'"):
+            state['job']['status'] = 'running'
+            return (), [], 1
+        if query.startswith('SELECT * FROM delete_jobs WHERE id = %s'):
+            return tuple(state['job']), [tuple(state['job'].values())], 0
+        if query.startswith('UPDATE delete_jobs SET status = '):
+            state['job']['status'] = re.match(r"UPDATE delete_jobs SET status = '(\w+)'", query).group(1)
+            return (), [], 1
+        if query.startswith('UPDATE delete_jobs SET'):
+            return (), [], 1
+        if query.startswith('DELETE FROM users WHERE id = %s'):
+            state['users'].discard(params[0])
+            return (), [], 1
+        if query.startswith('INSERT INTO table_versions'):
+            return (), [], 1
+        raise AssertionError(f"Unexpected query: {query}")
+
+    monkeypatch.setattr(shards, 'SHARD_INDEXES', {0: shards.DEFAULT_SHARD})
+    monkeypatch.setattr(cascade_delete, 'get_db_connection', lambda **kwargs: fake_connection(respond))
+    monkeypatch.setattr(cascade_delete.config, 'CASCADE_BATCH_SIZE', 2)
+    monkeypatch.setattr(cascade_delete.config, 'CASCADE_BATCH_PAUSE', 0)
+    return state
+
+
+def test_trainee_owner_is_nullable_after_migrations():
+    for table in ('trainees', 'trainees_archive'):
+        assert 'NOT NULL' not in column_definition(table, 'registered_by')
+
+
+def test_delete_owner_with_trainees(owner_database):
+    assert cascade_delete.run_job(1)
+
+    assert owner_database['job']['status'] == 'completed'
+    assert OWNER not in owner_database['users']
+    # Trainings go with their owner; trainees stay, detached
+    assert owner_database['trainings'] == {4: 99}
+    assert owner_database['trainings_archive'] == {}
+    assert owner_database['trainees'] == {10: None, 11: None, 12: None, 13: 99}
+    assert owner_database['trainees_archive'] == {14: None}
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+
+import app as app_module  # noqa: E402
+import checkins  # noqa: E402
+import shards  # noqa: E402
+
+OWNER = 7
+TRAININGS = {1: OWNER, 2: 99}
+TRAINEES = {10, 11}
+
+
+@pytest.fixture
+def attendance(monkeypatch, fake_connection):
+    """One shard holding TRAININGS and TRAINEES; returns the stored (training, trainee) pairs"""
+    stored = set()
+
+    def respond(query, params):
+        if query.startswith("SELECT 'training', id, conducted_by FROM trainings"):
+            training_count = re.search(r'FROM trainings WHERE id IN \(([^)]*)\)', query).group(1).count('%s')
+            rows = [('training', record, TRAININGS[record]) for record in params[:training_count]
+                    if record in TRAININGS]
+            rows += [('trainee', record, None) for record in params[training_count:] if record in TRAINEES]
+            return ('kind', 'id', 'conducted_by'), rows, 0
+        if query.startswith('INSERT IGNORE INTO attendance'):
+            stored.add(params[:2])
+            return (), [], 1
+        raise AssertionError(f"Unexpected query: {query}")
+
+    monkeypatch.setattr(shards, 'SHARD_INDEXES', {0: shards.DEFAULT_SHARD})
+    monkeypatch.setattr(checkins, 'get_db_connection', lambda **kwargs: fake_connection(respond))
+    return stored
+
+
+def rows(*pairs):
+    return [checkins.parse_event({'training_id': training, 'trainee_id': trainee})[0]
+            for training, trainee in pairs]
+
+
+def test_unknown_trainings_and_trainees_are_not_stored(attendance):
+    queue = checkins.CheckinQueue(flush_interval=0)
+    errors = queue.submit(rows((1, 10), (3, 10), (1, 12)), OWNER)
+
+    assert errors == [None, 'Unknown training', 'Unknown trainee']
+    assert attendance == {(1, 10)}
+    assert queue.stats()['invalid'] == 2
+
+
+def test_professionals_check_in_only_to_their_trainings(attendance):
+    queue = checkins.CheckinQueue(flush_interval=0)
+
+    assert queue.submit(rows((1, 10), (2, 11)), OWNER, conducted_by=OWNER) == [None, 'Not your training']
+    # Admins record for any training
+    assert queue.submit(rows((2, 11)), 1) == [None]
+    assert attendance == {(1, 10), (2, 11)}
+
+
+def test_route_reports_refused_check_ins(attendance, monkeypatch):
+    monkeypatch.setattr(app_module, 'checkin_queue', checkins.CheckinQueue(flush_interval=0))
+    body = {'checkins': [{'training_id': 1, 'trainee_id': 10}, {'training_id': 2, 'trainee_id': 10}]}
+    with app_module.app.test_request_context('/api/checkins', method='POST', json=body,
+                                             base_url='http://localhost'):
+        app_module.session['user_id'] = OWNER
+        app_module.session['role'] = 'professional'
+        response = app_module.app.make_response(app_module.record_checkins())
+
+    assert response.get_json()['stored'] == 1
+    assert [result['status'] for result in response.get_json()['results']] == ['stored', 'invalid']
@@ -0,0 +1,66 @@
+import zlib
+
+import pytest
+
+pytest.importorskip('werkzeug')
+
+from compression import CompressionMiddleware  # noqa: E402
+
+ROW = b'trainee,district,block,2024-01-01\n'
+
+
+def call(middleware, accept_encoding='gzip', method='GET'):
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = status
+        response['headers'] = dict(headers)
+
+    environ = {'REQUEST_METHOD': method, 'HTTP_ACCEPT_ENCODING': accept_encoding}
+    response['chunks'] = list(middleware(environ, start_response))
+    return response
+
+
+def streaming_app(chunks, content_type='text/csv'):
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', content_type)])
+        return iter(chunks)
+    return app
+
+
+def test_chunks_are_not_flushed_one_by_one():
+    middleware = CompressionMiddleware(streaming_app([ROW] * 500), min_size=64)
+    response = call(middleware)
+    body = b''.join(response['chunks'])
+
+    assert response['headers']['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(body, 31) == ROW * 500
+    assert len(response['chunks']) < 10
+    assert len(body) < len(zlib.compress(ROW * 500, 6)) + 64
+
+
+def test_empty_chunk_flushes_what_came_before():
+    middleware = CompressionMiddleware(streaming_app([ROW * 4, ROW, b'', ROW]), min_size=64)
+    chunks = call(middleware)['chunks']
+
+    decompressor = zlib.decompressobj(31)
+    sent = b''.join(decompressor.decompress(chunk) for chunk in chunks[:-1])
+    assert sent == ROW * 5
+
+
+@pytest.mark.parametrize('accept_encoding, method, chunks', [
+    ('', 'GET', [ROW * 100]),
+    ('gzip', 'HEAD', [ROW * 100]),
+    ('gzip', 'GET', [ROW]),
+])
+def test_skipped_responses_still_vary_on_encoding(accept_encoding, method, chunks):
+    middleware = CompressionMiddleware(streaming_app(chunks), min_size=1024)
+    response = call(middleware, accept_encoding, method)
+
+    assert 'Content-Encoding' not in response['headers']
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+
+
+def test_ineligible_responses_do_not_vary():
+    middleware = CompressionMiddleware(streaming_app([b'%PDF' * 1000], 'application/pdf'))
+    assert 'Vary' not in call(middleware)['headers']
@@ -0,0 +1,89 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+pytest.importorskip('reportlab')
+
+import app as app_module  # noqa: E402
+import exports  # noqa: E402
+import shards  # noqa: E402
+from singleflight import SingleFlight  # noqa: E402
+
+TRAINEE = {
+    'name': 'Asha', 'mobile_number': '9999999999', 'gender': 'Female', 'age': 30,
+    'department': 'Health', 'address': 'Ward 4', 'block': 'Tilda', 'training_date': date(2024, 1, 5),
+    'cpr_training': 1, 'first_aid_kit_given': 0,
+}
+
+
+@pytest.fixture
+def single_shard(monkeypatch, fake_connection):
+    """Every connection (primary, replica, shard) answered from one trainee row"""
+    connections = []
+
+    def respond(query, params):
+        if query.startswith('SELECT table_name, version FROM table_versions'):
+            return ('table_name', 'version'), [(table, 3) for table in params], 0
+        if query.startswith('SELECT archived_before FROM archive_state'):
+            return ('archived_before',), [], 0
+        if 'FROM trainees' in query:
+            # Only the selected columns come back, like MySQL
+            selected = [name.strip() for name in query[len('SELECT '):query.index(' FROM ')].split(',')]
+            return tuple(selected), [tuple(TRAINEE[name] for name in selected)], 0
+        raise AssertionError(f"Unexpected query: {query}")
+
+    def connect(read_only=False, shard=None):
+        connection = fake_connection(respond)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(shards, 'SHARD_INDEXES', {0: shards.DEFAULT_SHARD})
+    monkeypatch.setattr(shards, 'get_db_connection', connect)
+    monkeypatch.setattr(app_module, 'get_db_connection', connect)
+    monkeypatch.setattr(app_module, 'flights', SingleFlight())
+    return connections
+
+
+def test_export_pdf_trainees_single_shard(single_shard):
+    with app_module.app.test_request_context('/export/pdf/trainees', base_url='http://localhost'):
+        app_module.session['user_id'] = 1
+        app_module.session['role'] = 'admin'
+        response = app_module.app.make_response(app_module.export_pdf('trainees'))
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    response.direct_passthrough = False
+    assert response.get_data().startswith(b'%PDF')
+    assert all(connection.closed for connection in single_shard)
+
+
+def test_build_pdf_releases_finished_pages(monkeypatch):
+    # build_pdf frees pages through reportlab internals; this fails if an
+    # upgrade moves them (requirements.txt pins the version for this)
+    from reportlab.pdfbase.pdfdoc import PDFStream
+    from reportlab.pdfgen import canvas
+
+    unreleased = []
+    canvases = []
+
+    class RecordingCanvas(canvas.Canvas):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            canvases.append(self)
+
+        def showPage(self):
+            # Every page finished before this one must hold only its compressed contents
+            unreleased.append(sum(1 for page in self._doc.Pages.pages
+                                  if page.stream or not isinstance(getattr(page, 'Contents', None), PDFStream)))
+            super().showPage()
+
+    monkeypatch.setattr(canvas, 'Canvas', RecordingCanvas)
+    rows = ([row_id] + list(TRAINEE.values())[1:] for row_id in range(10000))
+    output = exports.build_pdf('trainees', list(TRAINEE), rows)
+
+    assert output.getvalue().startswith(b'%PDF')
+    assert len(unreleased) > 100
+    assert not any(unreleased)
+    assert all(page.stream is None for page in canvases[0]._doc.Pages.pages)
@@ -0,0 +1,16 @@
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+
+from conftest import ROOT  # noqa: E402
+
+
+def test_app_import_leaves_export_libraries_unloaded():
+    # pandas and reportlab load on the first export, not at worker start
+    script = "import sys, app; print(sorted(m for m in ('pandas', 'reportlab') if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+
+import app as app_module  # noqa: E402
+import passwords  # noqa: E402
+
+PASSWORDS = {'alice': 'alice-secret', 'bob': 'bob-secret'}
+
+
+@pytest.fixture
+def users(monkeypatch, fake_connection):
+    monkeypatch.setattr(passwords.config, 'PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    passwords.current_method.cache_clear()
+    hashes = {username: passwords.hash_password(password) for username, password in PASSWORDS.items()}
+    columns = ('id', 'username', 'password', 'role', 'name', 'district')
+
+    def respond(query, params):
+        username, role = params
+        rows = [(index, username, hashes[username], role, username.title(), None)
+                for index, name in enumerate(hashes, 1) if name == username]
+        return columns, rows, 0
+
+    monkeypatch.setattr(app_module, 'get_db_connection', lambda **kwargs: fake_connection(respond))
+    monkeypatch.setattr(app_module, 'login_throttle', passwords.LoginThrottle(max_failures=3))
+    yield
+    passwords.current_method.cache_clear()
+
+
+def log_in(username, password):
+    form = {'username': username, 'password': password, 'role': 'professional'}
+    with app_module.app.test_request_context('/login', method='POST', data=form, base_url='http://localhost'):
+        return app_module.app.make_response(app_module.login())
+
+
+def test_failures_on_one_account_do_not_block_another(users):
+    for _ in range(3):
+        assert log_in('alice', 'wrong').status_code == 200
+    assert log_in('alice', PASSWORDS['alice']).status_code == 429
+
+    assert log_in('bob', PASSWORDS['bob']).status_code == 302
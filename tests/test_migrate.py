@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+pytest.importorskip('numpy')
+
+import api_queries  # noqa: E402
+import migrate  # noqa: E402
+from conftest import normalize  # noqa: E402
+
+
+def plan_row(table, scan_type, possible_keys=None, key=None):
+    return {'table': table, 'type': scan_type, 'possible_keys': possible_keys, 'key': key}
+
+
+def test_full_scan_fails_even_with_candidate_keys():
+    plan = [plan_row('trainees', 'ALL', possible_keys='idx_trainees_registered_by_name')]
+    assert migrate.scan_failures('trainees by owner', plan, False) == ['trainees by owner: full scan of trainees']
+
+
+def test_full_scan_allowed_for_whole_table_listings():
+    assert migrate.scan_failures('trainees list', [plan_row('trainees', 'ALL')], True) == []
+
+
+def test_index_lookups_and_derived_results_pass():
+    plan = [
+        plan_row('<derived2>', 'ALL'),
+        plan_row('trainees', 'ref', 'idx_trainees_registered_by_name', 'idx_trainees_registered_by_name'),
+        plan_row('trainees_archive', 'range', 'idx_trainees_training_date', 'idx_trainees_training_date'),
+        plan_row(None, None),
+    ]
+    assert migrate.scan_failures('trainees by owner with archive', plan, False) == []
+
+
+def test_plan_checks_use_the_app_statements():
+    statements = {sql for _, sql, _, _ in migrate.plan_checks()}
+    assert api_queries.LOGIN_QUERY in statements
+    assert api_queries.user_list_query('professionals') in statements
+    # Shards have no users of their own to check
+    assert api_queries.LOGIN_QUERY not in {sql for _, sql, _, _ in migrate.plan_checks('east')}
+
+
+def test_check_plans_explains_every_statement(monkeypatch, fake_connection):
+    explained = []
+
+    def respond(query, params):
+        assert query.startswith('EXPLAIN ')
+        explained.append(query[len('EXPLAIN '):])
+        return ('table', 'type', 'possible_keys', 'key'), [('trainees', 'ref', 'idx', 'idx')], 0
+
+    monkeypatch.setattr(migrate, 'get_db_connection', lambda shard=None: fake_connection(respond))
+    assert migrate.check_plans() == []
+    assert explained == [normalize(sql) for _, sql, _, _ in migrate.plan_checks()]
+
+
+@pytest.fixture
+def database():
+    """The configured database (.env), or skip; point it at production-sized data"""
+    connection = migrate.get_db_connection()
+    if not connection:
+        pytest.skip('No database reachable')
+    connection.close()
+
+
+def test_app_queries_avoid_full_scans(database):
+    migrate.migrate()
+    assert migrate.check_plans() == []
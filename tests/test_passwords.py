@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('flask')
+werkzeug_security = pytest.importorskip('werkzeug.security')
+
+import passwords  # noqa: E402
+
+
+@pytest.fixture
+def hash_method(monkeypatch):
+    def use(method):
+        monkeypatch.setattr(passwords.config, 'PASSWORD_HASH_METHOD', method)
+        passwords.current_method.cache_clear()
+    yield use
+    passwords.current_method.cache_clear()
+
+
+@pytest.mark.parametrize('method', ['pbkdf2', 'pbkdf2:sha256:1000', 'scrypt'])
+def test_current_hash_is_not_rehashed(hash_method, method):
+    hash_method(method)
+    assert not passwords.needs_rehash(passwords.hash_password('secret'))
+
+
+def test_plaintext_and_other_methods_are_rehashed(hash_method):
+    hash_method('pbkdf2:sha256:1000')
+    assert passwords.needs_rehash('admin123')
+    assert passwords.needs_rehash(werkzeug_security.generate_password_hash('secret', method='pbkdf2:sha256:2000'))
+
+
+def test_verify_returns_new_hash_only_when_outdated(hash_method):
+    hash_method('pbkdf2:sha256:1000')
+    current = passwords.hash_password('secret')
+    assert passwords.verify(current, 'secret') == (True, None)
+    valid, new_hash = passwords.verify('secret', 'secret')
+    assert valid and new_hash.startswith('pbkdf2:sha256:1000$')
+    assert passwords.verify(current, 'wrong') == (False, None)
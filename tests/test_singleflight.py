@@ -0,0 +1,41 @@
+import os
+import time
+
+import pytest
+
+fcntl = pytest.importorskip('fcntl')
+
+from singleflight import SingleFlight  # noqa: E402
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_sweep_removes_idle_lock_files(tmp_path):
+    flights = SingleFlight(shared_dir=str(tmp_path), wait_timeout=1)
+    assert flights.do(('report', 1), lambda: 'first') == 'first'
+    [lock_path] = tmp_path.glob('*.lock')
+    age(lock_path, 120)
+
+    flights.do(('report', 2), lambda: 'second')
+
+    assert not lock_path.exists()
+    assert len(list(tmp_path.glob('*.lock'))) == 1
+
+
+def test_sweep_keeps_held_lock_files(tmp_path):
+    flights = SingleFlight(shared_dir=str(tmp_path), wait_timeout=1)
+    flights.do(('report', 1), lambda: 'first')
+    [lock_path] = tmp_path.glob('*.lock')
+    age(lock_path, 120)
+
+    fd = os.open(lock_path, os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        flights.do(('report', 2), lambda: 'second')
+    finally:
+        os.close(fd)
+
+    assert lock_path.exists()
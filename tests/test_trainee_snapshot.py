@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('mysql.connector')
+pytest.importorskip('numpy')
+
+import trainee_snapshot  # noqa: E402
+from conftest import normalize  # noqa: E402
+
+
+def trainee(trainee_id, training_date):
+    return (trainee_id, 30, training_date, 'Tilda', 'raipur', 'Female', 'Health', 7, 1, 0, 0)
+
+
+@pytest.fixture
+def tables(monkeypatch, fake_connection):
+    """trainees, trainees_archive and the change log of one shard"""
+    state = {
+        'trainees': {1: trainee(1, date(2024, 6, 1)), 2: trainee(2, date(2023, 1, 1))},
+        'trainees_archive': {3: trainee(3, date(2020, 1, 1))},
+        'changes': [],
+    }
+
+    def respond(query, params):
+        if query == 'SELECT COALESCE(MAX(seq), 0) FROM trainee_changes':
+            return ('seq',), [(len(state['changes']),)], 0
+        if query.startswith('SELECT seq FROM trainee_changes WHERE seq > %s'):
+            return ('seq',), [(seq,) for seq in range(params[0] + 1, len(state['changes']) + 1)], 0
+        if query.startswith('SELECT seq, trainee_id FROM trainee_changes WHERE seq > %s'):
+            return ('seq', 'trainee_id'), list(enumerate(state['changes'], 1))[params[0]:], 0
+        if query == normalize(trainee_snapshot.LOAD_QUERY):
+            return ('id',), list(state['trainees'].values()) + list(state['trainees_archive'].values()), 0
+        for table in ('trainees_archive', 'trainees'):
+            if f'FROM {table} WHERE id IN' in query:
+                return ('id',), [state[table][record] for record in params if record in state[table]], 0
+        raise AssertionError(f"Unexpected query: {query}")
+
+    monkeypatch.setattr(trainee_snapshot, 'get_db_connection', lambda **kwargs: fake_connection(respond))
+    return state
+
+
+def test_archived_trainees_are_counted(tables):
+    snapshot = trainee_snapshot.TraineeSnapshot(refresh_interval=0)
+    assert snapshot.query()['total'] == 3
+    assert snapshot.query({'date_from': '2019-01-01', 'date_to': '2021-01-01'})['total'] == 1
+
+    # An archive run moves trainee 2; trainee 1 is deleted
+    tables['trainees_archive'][2] = tables['trainees'].pop(2)
+    tables['trainees'].pop(1)
+    tables['changes'] += [2, 1]
+
+    assert snapshot.query()['total'] == 2
+    assert snapshot.query({'date_to': '2023-12-31'})['total'] == 2
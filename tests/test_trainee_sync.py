@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+
+pytest.importorskip('flask')
+mysql_connector = pytest.importorskip('mysql.connector')
+
+import trainee_sync  # noqa: E402
+
+BLOCKS = {'raipur': ['Tilda']}
+
+
+def entry(**fields):
+    values = {
+        'client_key': str(uuid.uuid4()), 'name': 'Asha', 'mobile_number': '9999999999', 'gender': 'Female',
+        'age': 30, 'department': 'Health', 'address': 'Ward 4', 'block': 'Tilda', 'district': 'raipur',
+        'training_date': '2024-01-05',
+    }
+    values.update(fields)
+    return values
+
+
+@pytest.fixture
+def trainees_table(fake_connection):
+    """A shard's trainees, rejecting values wider than their column like strict mode"""
+    rows = {}
+
+    def respond(query, params):
+        if query.startswith('SELECT client_key, id FROM trainees'):
+            return ('client_key', 'id'), [(key, rows[key]) for key in params if key in rows], 0
+        if query.startswith('INSERT INTO trainees'):
+            name, mobile_number = params[:2]
+            if len(mobile_number) > 15 or len(name) > 100:
+                raise mysql_connector.errors.DataError(msg='Data too long', errno=1406)
+            rows[params[-1]] = len(rows) + 1
+            return (), [], 1
+        raise AssertionError(f"Unexpected query: {query}")
+
+    return fake_connection(respond), rows
+
+
+@pytest.mark.parametrize('fields', [
+    {'mobile_number': '9' * 16},
+    {'name': 'A' * 101},
+    {'department': 'D' * 101},
+    {'age': 2 ** 31},
+])
+def test_out_of_range_entry_is_invalid(fields):
+    assert trainee_sync.validate_entry(entry(**fields), BLOCKS) is not None
+
+
+def test_bad_entry_does_not_hold_back_the_batch(trainees_table):
+    connection, rows = trainees_table
+    entries = [entry(), entry(mobile_number='+91 99999 99999 ext 12'), entry()]
+
+    results, created = trainee_sync.sync_trainees(connection, entries, 7, BLOCKS)
+
+    assert [result['status'] for result in results] == ['created', 'invalid', 'created']
+    assert created == 2
+    assert len(rows) == 2
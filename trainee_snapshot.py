@@ -0,0 +1,566 @@
+"""In-process columnar snapshot of trainees for ad hoc analytics.
+
+Each worker keeps the analytics columns of every trainee, live and archived
+(trainees and trainees_archive), as numpy arrays: gender as uint8 codes
+into its ENUM values, block, district and department as codes into
+dictionaries built while loading, the date as days since the epoch and the
+three training flags as booleans, plus an id -> row position array: under
+35 bytes per trainee. Filters and group-bys run as
+vectorised scans over those arrays.
+
+The snapshot is loaded on first use and then kept current from the
+trainee_changes log (migration 0007): every query first applies changes
+newer than the last seen seq, at most every TRAINEE_SNAPSHOT_REFRESH_SECONDS,
+by re-reading only the rows they name. Sequence numbers can commit out of
+order, so a seq skipped over is re-checked until it shows up or is older
+than GAP_TIMEOUT (a rolled-back insert never will). The snapshot is rebuilt
+from scratch every TRAINEE_SNAPSHOT_MAX_AGE seconds, which also bounds how
+long the change log must be retained.
+
+Archived rows are loaded along with the live ones, so counts cover all of
+history like every other read. archive.py moves a row by deleting it from
+trainees, which the change log records; a changed id that is gone from
+trainees is looked up in trainees_archive before it is dropped from the
+snapshot. The archive has no triggers, so an archived row's owner cleared by
+a cascade delete shows at the next rebuild.
+
+Every district shard has its own trainees and change log, so each gets its
+own TraineeSnapshot; ShardedSnapshot queries them all and adds the results
+up.
+
+Purge old change log entries (on every shard) from cron:  python trainee_snapshot.py --purge
+"""
+import argparse
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+import shards
+from archive import ARCHIVE_TABLES
+from config import Config
+from db import get_db_connection
+
+config = Config()
+
+GENDERS = ('Male', 'Female', 'Other')
+FLAGS = ('cpr_training', 'first_aid_kit_given', 'life_saving_skills')
+# Text columns coded through a dictionary of the values seen while loading
+CODED = ('block', 'district', 'department')
+
+SNAPSHOT_COLUMNS = """
+    id, age, training_date, block, district, gender, department, registered_by,
+    cpr_training, first_aid_kit_given, life_saving_skills"""
+
+# Every trainee, live and archived; one statement, so a row moved to the
+# archive mid-load is read exactly once
+LOAD_QUERY = (f"SELECT {SNAPSHOT_COLUMNS} FROM trainees "
+              f"UNION ALL SELECT {SNAPSHOT_COLUMNS} FROM {ARCHIVE_TABLES['trainees']}")
+
+# Change log entries after a position, and the purge of old ones
+CHANGES_QUERY = "SELECT seq, trainee_id FROM trainee_changes WHERE seq > %s ORDER BY seq LIMIT %s"
+PURGE_CHANGES_QUERY = "DELETE FROM trainee_changes WHERE changed_at < %s LIMIT %s"
+
+# Rows per round trip while loading, changes per poll, ids per IN (...)
+FETCH_SIZE = 5000
+CHANGE_BATCH = 10000
+ID_BATCH = 1000
+
+# Seconds a skipped change seq is re-checked before it is given up on
+GAP_TIMEOUT = 300
+# Seqs below the newest one checked for gaps after a full load
+GAP_WINDOW = 1000
+
+GROUP_DIMENSIONS = ('block', 'district', 'gender', 'department', 'registered_by', 'age_band',
+                    'training_year', 'training_month') + FLAGS
+
+# Group keys spanning at most this many values are bincounted directly;
+# capping the dimensions keeps the folded key inside int64
+BINCOUNT_LIMIT = 1 << 22
+MAX_GROUP_BY = 4
+
+
+def _days(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return (value - date(1970, 1, 1)).days
+
+
+class TraineeSnapshot:
+    """Snapshot of one shard's trainees; ids there start at id_base"""
+
+    def __init__(self, refresh_interval=5, max_age=6 * 3600, shard=None, id_base=0):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.shard = shard
+        self.id_base = id_base
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self._size = 0
+        self._capacity = 0
+        self._columns = {}
+        # Row position by trainee id - id_base (-1 for none); ids are
+        # auto-increment, so a dense array is far smaller than a dict
+        self._positions = None
+        self._rows = 0
+        self._dead = 0
+        self.labels = {name: [] for name in CODED}
+        self._codes = {name: {} for name in CODED}
+        self.last_seq = 0
+        self._gaps = {}
+        self.loaded_at = None
+        self.refreshed_at = None
+        self.changes_applied = 0
+
+    # -- storage --------------------------------------------------------
+
+    def _allocate(self, capacity):
+        import numpy as np
+        dtypes = {
+            'id': np.int32, 'age': np.int16, 'training_date': np.int32,
+            'block': np.uint16, 'district': np.uint16, 'gender': np.uint8, 'department': np.int32,
+            'registered_by': np.int32, 'live': np.bool_,
+        }
+        dtypes.update((flag, np.bool_) for flag in FLAGS)
+        columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        for name, column in self._columns.items():
+            columns[name][:self._size] = column[:self._size]
+        self._columns = columns
+        self._capacity = capacity
+
+    def _position(self, trainee_id):
+        trainee_id -= self.id_base
+        if self._positions is None or not 0 <= trainee_id < len(self._positions):
+            return -1
+        return int(self._positions[trainee_id])
+
+    def _set_positions(self, ids, positions):
+        import numpy as np
+        if not len(ids):
+            return
+        ids = ids - self.id_base
+        top = int(ids.max()) + 1
+        if self._positions is None or top > len(self._positions):
+            grown = np.full(max(top, len(self._positions) * 2 if self._positions is not None else top), -1,
+                            dtype=np.int32)
+            if self._positions is not None:
+                grown[:len(self._positions)] = self._positions
+            self._positions = grown
+        self._positions[ids] = positions
+
+    def _code(self, column, value):
+        codes = self._codes[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.labels[column])
+            self.labels[column].append(value)
+        return code
+
+    def _encode(self, rows):
+        """Column-wise arrays for a list of SNAPSHOT_COLUMNS tuples"""
+        import numpy as np
+        ids, ages, dates, blocks, districts, genders, departments, owners, cpr, kit, skills = zip(*rows)
+        gender_codes = {name: code for code, name in enumerate(GENDERS)}
+        return {
+            'id': np.array(ids, dtype=np.int32),
+            'age': np.array(ages, dtype=np.int16),
+            'training_date': np.array(dates, dtype='datetime64[D]').astype(np.int32),
+            'block': np.array([self._code('block', value) for value in blocks], dtype=np.uint16),
+            'district': np.array([self._code('district', value) for value in districts], dtype=np.uint16),
+            'gender': np.array([gender_codes[value] for value in genders], dtype=np.uint8),
+            'department': np.array([self._code('department', value) for value in departments], dtype=np.int32),
+            'registered_by': np.array([owner or 0 for owner in owners], dtype=np.int32),
+            'cpr_training': np.array(cpr, dtype=np.bool_),
+            'first_aid_kit_given': np.array(kit, dtype=np.bool_),
+            'life_saving_skills': np.array(skills, dtype=np.bool_),
+            'live': np.ones(len(ids), dtype=np.bool_),
+        }
+
+    def _append(self, rows):
+        import numpy as np
+        if not rows:
+            return
+        encoded = self._encode(rows)
+        count = len(rows)
+        if self._size + count > self._capacity:
+            self._allocate(max(self._size + count, self._capacity * 2, 1024))
+        start = self._size
+        for name, values in encoded.items():
+            self._columns[name][start:start + count] = values
+        self._set_positions(encoded['id'], np.arange(start, start + count, dtype=np.int32))
+        self._size += count
+        self._rows += count
+
+    def _upsert(self, rows):
+        new_rows = []
+        for row in rows:
+            position = self._position(row[0])
+            if position < 0:
+                new_rows.append(row)
+                continue
+            for name, values in self._encode([row]).items():
+                self._columns[name][position] = values[0]
+        self._append(new_rows)
+
+    def _remove(self, trainee_ids):
+        for trainee_id in trainee_ids:
+            position = self._position(trainee_id)
+            if position >= 0:
+                self._positions[trainee_id - self.id_base] = -1
+                self._columns['live'][position] = False
+                self._dead += 1
+                self._rows -= 1
+        if self._dead > 1000 and self._dead > self._size // 4:
+            self._compact()
+
+    def _compact(self):
+        import numpy as np
+        live = self._columns['live'][:self._size].copy()
+        count = int(live.sum())
+        for column in self._columns.values():
+            column[:count] = column[:self._size][live]
+        self._size = count
+        self._dead = 0
+        self._positions[:] = -1
+        self._set_positions(self._columns['id'][:count], np.arange(count, dtype=np.int32))
+
+    # -- loading --------------------------------------------------------
+
+    def _load(self, connection):
+        self._reset()
+        cursor = connection.cursor()
+        try:
+            # Read the change position first: anything committed during the
+            # scan is applied again by the next refresh
+            cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM trainee_changes")
+            self.last_seq = cursor.fetchone()[0]
+            cursor.execute("SELECT seq FROM trainee_changes WHERE seq > %s",
+                           (max(self.last_seq - GAP_WINDOW, 0),))
+            seen = {seq for seq, in cursor.fetchall()}
+            now = time.time()
+            self._gaps = {seq: now for seq in range(max(self.last_seq - GAP_WINDOW, 0) + 1, self.last_seq)
+                          if seq not in seen}
+
+            cursor.execute(LOAD_QUERY)
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                self._append(rows)
+        finally:
+            cursor.close()
+        self.loaded_at = self.refreshed_at = time.time()
+        self._loaded = True
+
+    def _apply_changes(self, connection):
+        cursor = connection.cursor()
+        try:
+            touched = set()
+            now = time.time()
+            if self._gaps:
+                gaps = list(self._gaps)
+                for start in range(0, len(gaps), ID_BATCH):
+                    batch = gaps[start:start + ID_BATCH]
+                    placeholders = ', '.join(['%s'] * len(batch))
+                    cursor.execute(
+                        f"SELECT seq, trainee_id FROM trainee_changes WHERE seq IN ({placeholders})", batch
+                    )
+                    for seq, trainee_id in cursor.fetchall():
+                        del self._gaps[seq]
+                        touched.add(trainee_id)
+                self._gaps = {seq: seen for seq, seen in self._gaps.items() if now - seen < GAP_TIMEOUT}
+
+            while True:
+                cursor.execute(CHANGES_QUERY, (self.last_seq, CHANGE_BATCH))
+                changes = cursor.fetchall()
+                for seq, trainee_id in changes:
+                    for missing in range(self.last_seq + 1, seq):
+                        self._gaps[missing] = now
+                    self.last_seq = seq
+                    touched.add(trainee_id)
+                if len(changes) < CHANGE_BATCH:
+                    break
+
+            touched = list(touched)
+            for start in range(0, len(touched), ID_BATCH):
+                batch = touched[start:start + ID_BATCH]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f"SELECT {SNAPSHOT_COLUMNS} FROM trainees WHERE id IN ({placeholders})", batch)
+                rows = cursor.fetchall()
+                gone = list(set(batch) - {row[0] for row in rows})
+                if gone:
+                    # Deleted, or moved to the archive
+                    placeholders = ', '.join(['%s'] * len(gone))
+                    cursor.execute(f"SELECT {SNAPSHOT_COLUMNS} FROM {ARCHIVE_TABLES['trainees']} "
+                                   f"WHERE id IN ({placeholders})", gone)
+                    rows += cursor.fetchall()
+                self._upsert(rows)
+                self._remove(set(batch) - {row[0] for row in rows})
+            self.changes_applied += len(touched)
+        finally:
+            cursor.close()
+        self.refreshed_at = time.time()
+
+    def refresh(self, force=False):
+        """Bring the snapshot up to date if it is older than refresh_interval"""
+        with self._lock:
+            now = time.time()
+            if not force and self._loaded and now - self.refreshed_at < self.refresh_interval:
+                return
+            connection = get_db_connection(read_only=True, shard=self.shard)
+            if not connection:
+                if self._loaded:
+                    # Serve the slightly stale snapshot; freshness says how stale
+                    return
+                raise mysql.connector.errors.InterfaceError("Database connection failed")
+            try:
+                if not self._loaded or now - self.loaded_at >= self.max_age:
+                    self._load(connection)
+                else:
+                    self._apply_changes(connection)
+            finally:
+                connection.close()
+
+    # -- queries --------------------------------------------------------
+
+    def _mask(self, filters):
+        import numpy as np
+        size = self._size
+        columns = self._columns
+        mask = columns['live'][:size].copy()
+
+        def codes(values, names):
+            lookup = {name.lower(): code for code, name in enumerate(names)}
+            return [lookup[value.lower()] for value in values if value.lower() in lookup]
+
+        def member(column, wanted):
+            # A few equality tests beat np.isin, which sorts, on short lists
+            if len(wanted) > 8:
+                return np.isin(column, wanted)
+            matches = np.zeros(len(column), dtype=np.bool_)
+            for value in wanted:
+                matches |= column == value
+            return matches
+
+        if filters.get('gender'):
+            mask &= member(columns['gender'][:size], codes(filters['gender'], GENDERS))
+        for name in CODED:
+            if filters.get(name):
+                mask &= member(columns[name][:size], codes(filters[name], self.labels[name]))
+        if filters.get('registered_by'):
+            mask &= member(columns['registered_by'][:size], [int(value) for value in filters['registered_by']])
+        if filters.get('age_min') is not None:
+            mask &= columns['age'][:size] >= int(filters['age_min'])
+        if filters.get('age_max') is not None:
+            mask &= columns['age'][:size] <= int(filters['age_max'])
+        if filters.get('date_from'):
+            mask &= columns['training_date'][:size] >= _days(filters['date_from'])
+        if filters.get('date_to'):
+            mask &= columns['training_date'][:size] <= _days(filters['date_to'])
+        for flag in FLAGS:
+            if filters.get(flag) is not None:
+                mask &= columns[flag][:size] == bool(filters[flag])
+        return mask
+
+    def _dimension(self, name, rows):
+        """(codes, lowest code, code count, label for a code) of a group-by dimension.
+
+        rows selects the row positions to read; None reads every row.
+        """
+        import numpy as np
+        column = self._columns['age' if name == 'age_band' else
+                               'training_date' if name.startswith('training_') else name][:self._size]
+        if rows is not None:
+            column = column[rows]
+        if name == 'gender':
+            return column, 0, len(GENDERS), lambda code: GENDERS[code]
+        if name in CODED:
+            labels = self.labels[name]
+            return column, 0, max(len(labels), 1), lambda code: labels[code]
+        if name in FLAGS:
+            return column, 0, 2, bool
+        if name == 'registered_by':
+            codes, label = column, int
+        elif name == 'age_band':
+            codes, label = column // 10, lambda code: f"{code * 10}-{code * 10 + 9}"
+        else:
+            unit = 'Y' if name == 'training_year' else 'M'
+            codes = column.astype('datetime64[D]').astype(f'datetime64[{unit}]').astype(np.int64)
+            label = lambda code: str(np.datetime64(code, unit))  # noqa: E731
+        if not len(codes):
+            return codes, 0, 1, label
+        low = int(codes.min())
+        return codes, low, int(codes.max()) - low + 1, label
+
+    def _group(self, mask, selected, group_by):
+        """Per-group counts and flag totals for the rows in mask"""
+        import numpy as np
+        # A selective filter gathers its rows first; otherwise the whole
+        # columns are scanned and filtered-out rows land in a spare bucket,
+        # which is cheaper than compacting every column through the mask
+        rows = np.flatnonzero(mask) if selected < self._size // 4 else None
+        dimensions = [self._dimension(name, rows) for name in group_by]
+        length = self._size if rows is None else len(rows)
+
+        width = 1 << len(FLAGS)
+        span = int(np.prod([base for _, _, base, _ in dimensions], dtype=np.float64))
+        key = np.zeros(length, dtype=np.int32 if (span + 1) * width < 2 ** 31 else np.int64)
+        for codes, low, base, _ in dimensions:
+            key *= base
+            key += codes
+            key -= low
+        if rows is None:
+            key = np.where(mask, key, key.dtype.type(span))
+
+        # The three flags ride along as the low bits of the key, so one
+        # bincount yields the count and flag totals of every group
+        key <<= len(FLAGS)
+        for bit, flag in enumerate(reversed(FLAGS)):
+            flag_column = self._columns[flag][:self._size]
+            key |= (flag_column if rows is None else flag_column[rows]).astype(key.dtype) << bit
+
+        if span * width <= BINCOUNT_LIMIT:
+            table = np.bincount(key, minlength=(span + 1) * width)[:span * width].reshape(span, width)
+            counts = table.sum(axis=1)
+            keys = np.nonzero(counts)[0]
+            table = table[keys]
+        else:
+            if rows is None:
+                key = key[mask]
+            groups, inverse = np.unique(key >> len(FLAGS), return_inverse=True)
+            table = np.bincount(inverse * width + (key & (width - 1)),
+                                minlength=len(groups) * width).reshape(len(groups), width)
+            keys = groups
+
+        bits = np.arange(width)
+        totals = {flag: table[:, (bits >> bit) & 1 == 1].sum(axis=1)
+                  for bit, flag in enumerate(reversed(FLAGS)) if flag not in group_by}
+        counts = table.sum(axis=1)
+
+        groups = []
+        for position, group_key in enumerate(keys.tolist()):
+            labels = []
+            for _, low, base, label in reversed(dimensions):
+                group_key, code = divmod(group_key, base)
+                labels.append(label(code + low))
+            group = dict(zip(group_by, reversed(labels)))
+            group['count'] = int(counts[position])
+            group.update((flag, int(values[position])) for flag, values in totals.items())
+            groups.append(group)
+        return groups
+
+    def query(self, filters=None, group_by=()):
+        """Count trainees matching filters, optionally grouped.
+
+        filters: block, district, gender, department, registered_by (lists of values),
+        age_min, age_max, date_from, date_to and the three training flags
+        (True/False). group_by: names from GROUP_DIMENSIONS. Every group
+        reports its count and how many of its trainees have each flag not
+        grouped by.
+        """
+        import numpy as np
+        unknown = [name for name in group_by if name not in GROUP_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown group_by: {', '.join(unknown)}")
+        if len(group_by) > MAX_GROUP_BY:
+            raise ValueError(f"At most {MAX_GROUP_BY} group_by dimensions")
+
+        self.refresh()
+        started = time.perf_counter()
+        with self._lock:
+            mask = self._mask(filters or {})
+            result = {'total': int(np.count_nonzero(mask))}
+            for flag in FLAGS:
+                result[flag] = int(np.count_nonzero(mask & self._columns[flag][:self._size]))
+            if group_by:
+                result['groups'] = self._group(mask, result['total'], group_by)
+            result['query_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            result['freshness'] = self.freshness()
+        return result
+
+    def freshness(self):
+        now = time.time()
+        return {
+            'loaded_at': datetime.fromtimestamp(self.loaded_at).isoformat() if self.loaded_at else None,
+            'refreshed_at': datetime.fromtimestamp(self.refreshed_at).isoformat() if self.refreshed_at else None,
+            'age_seconds': round(now - self.refreshed_at, 3) if self.refreshed_at else None,
+            'change_seq': self.last_seq,
+            'pending_gaps': len(self._gaps),
+            'rows': self._rows,
+            'departments': len(self.labels['department']),
+        }
+
+
+class ShardedSnapshot:
+    """One TraineeSnapshot per district shard, queried together"""
+
+    def __init__(self, refresh_interval=5, max_age=6 * 3600):
+        self.snapshots = [
+            TraineeSnapshot(refresh_interval, max_age, shard=shard,
+                            id_base=shards.shard_index(shard) * shards.SHARD_ID_SPAN)
+            for shard in shards.shard_names()
+        ]
+
+    def query(self, filters=None, group_by=()):
+        """TraineeSnapshot.query() over every shard, with counts added up per group"""
+        merged = {'total': 0, **{flag: 0 for flag in FLAGS}}
+        groups = {}
+        query_ms = 0.0
+        for snapshot in self.snapshots:
+            result = snapshot.query(filters, group_by)
+            for name in ('total',) + FLAGS:
+                merged[name] += result[name]
+            for group in result.get('groups', ()):
+                key = tuple(group[name] for name in group_by)
+                if key not in groups:
+                    groups[key] = group
+                    continue
+                for name, value in group.items():
+                    if name not in group_by:
+                        groups[key][name] += value
+            query_ms += result['query_ms']
+        if group_by:
+            merged['groups'] = list(groups.values())
+        merged['query_ms'] = round(query_ms, 3)
+        merged['freshness'] = {snapshot.shard: snapshot.freshness() for snapshot in self.snapshots}
+        return merged
+
+
+def purge_changes(days=None, batch_size=CHANGE_BATCH, shard=None):
+    """Delete change log entries older than TRAINEE_CHANGES_RETAIN_DAYS; returns the number removed"""
+    days = config.TRAINEE_CHANGES_RETAIN_DAYS if days is None else days
+    cutoff = datetime.now() - timedelta(days=days)
+    connection = get_db_connection(shard=shard)
+    if not connection:
+        raise SystemExit(f"Database connection failed ({shard or shards.DEFAULT_SHARD})")
+    cursor = connection.cursor()
+    removed = 0
+    try:
+        while True:
+            cursor.execute(PURGE_CHANGES_QUERY, (cutoff, batch_size))
+            connection.commit()
+            removed += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return removed
+    finally:
+        cursor.close()
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trainee analytics snapshot maintenance')
+    parser.add_argument('--purge', action='store_true', help='delete old trainee_changes entries')
+    parser.add_argument('--days', type=int, help='keep this many days of changes (with --purge)')
+    args = parser.parse_args()
+    if args.purge:
+        for shard in shards.shard_names():
+            print(f"{shard}/trainee_changes: purged {purge_changes(days=args.days, shard=shard)} entries")
+    else:
+        snapshot = ShardedSnapshot()
+        print(snapshot.query()['freshness'])
@@ -0,0 +1,172 @@
+"""Batched, idempotent upload of trainees captured offline.
+
+The professional dashboard queues registrations in the browser, each with a
+client-generated UUID (client_key), and uploads the queue in one request,
+gzip-compressed when the browser supports it. trainees.client_key is
+unique, so replaying a batch (after a dropped response or a retry from
+another tab) inserts nothing twice. Every entry gets its own result, so the
+client can drop acknowledged entries and keep the rest.
+
+Each entry belongs to a district (the caller fills it in) and its block must
+be one of that district's blocks. The caller splits a batch by district
+shard and syncs each part on its shard; client_key is unique per shard.
+"""
+import re
+import zlib
+from datetime import date
+
+import mysql.connector
+
+from config import Config
+
+config = Config()
+
+CLIENT_KEY = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+GENDERS = ('Male', 'Female', 'Other')
+REQUIRED = ('name', 'gender', 'age', 'department', 'address', 'block', 'training_date')
+# Column widths of trainees (schema.sql, migration 0008); strict mode rejects
+# longer values and that would roll back the whole batch
+MAX_LENGTHS = {
+    'name': 100,
+    'mobile_number': 15,
+    'department': 100,
+    'designation': 100,
+    'address': 200,
+    'block': 64,
+    'district': 32,
+}
+MAX_INT = 2 ** 31 - 1
+
+# zlib wbits for each accepted Content-Encoding
+DECODERS = {'gzip': 31, 'deflate': 15}
+
+
+class BodyTooLarge(ValueError):
+    pass
+
+
+def decode_body(raw, encoding):
+    """Decompress a request body, refusing to inflate past SYNC_MAX_BODY_BYTES"""
+    encoding = (encoding or '').strip().lower()
+    if not encoding or encoding == 'identity':
+        if len(raw) > config.SYNC_MAX_BODY_BYTES:
+            raise BodyTooLarge('Request body too large')
+        return raw
+    if encoding not in DECODERS:
+        raise ValueError(f'Unsupported Content-Encoding: {encoding}')
+    decompressor = zlib.decompressobj(DECODERS[encoding])
+    body = decompressor.decompress(raw, config.SYNC_MAX_BODY_BYTES)
+    if decompressor.unconsumed_tail:
+        raise BodyTooLarge('Request body too large')
+    return body + decompressor.flush()
+
+
+def validate_entry(entry, district_blocks):
+    """Return an error message for an unusable entry, or None.
+
+    district_blocks maps each district code to its blocks.
+    """
+    if not isinstance(entry, dict):
+        return 'Entry must be an object'
+    if not CLIENT_KEY.match(str(entry.get('client_key', ''))):
+        return 'Missing or invalid client_key'
+    missing = [field for field in REQUIRED if entry.get(field) in (None, '')]
+    if missing:
+        return f"Missing fields: {', '.join(missing)}"
+    too_long = [field for field, length in MAX_LENGTHS.items()
+                if entry.get(field) is not None and len(str(entry[field])) > length]
+    if too_long:
+        return f"Too long: {', '.join(too_long)}"
+    if entry['gender'] not in GENDERS:
+        return 'Invalid gender'
+    district = entry.get('district', config.DEFAULT_DISTRICT)
+    if district not in district_blocks:
+        return 'Unknown district'
+    if entry['block'] not in district_blocks[district]:
+        return 'Invalid block'
+    try:
+        if not 0 < int(entry['age']) <= MAX_INT:
+            return 'Invalid age'
+        date.fromisoformat(str(entry['training_date']))
+    except (TypeError, ValueError):
+        return 'Invalid age or training_date'
+    return None
+
+
+def existing_keys(cursor, keys):
+    if not keys:
+        return {}
+    placeholders = ', '.join(['%s'] * len(keys))
+    cursor.execute(f"SELECT client_key, id FROM trainees WHERE client_key IN ({placeholders})", list(keys))
+    return dict(cursor.fetchall())
+
+
+def sync_trainees(connection, entries, registered_by, district_blocks, allow_owner_override=False):
+    """Insert new entries and acknowledge duplicates in one transaction.
+
+    Returns (results, created) where results holds one
+    {client_key, status, id|error} per entry, status being 'created',
+    'duplicate' or 'invalid'.
+    """
+    results = {}
+    valid = {}
+    for index, entry in enumerate(entries):
+        error = validate_entry(entry, district_blocks)
+        key = entry.get('client_key') if isinstance(entry, dict) else None
+        if error:
+            results[index] = {'client_key': key, 'status': 'invalid', 'error': error}
+        else:
+            # A key repeated inside one batch is stored once
+            valid.setdefault(entry['client_key'].lower(), (index, entry))
+
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        known = existing_keys(cursor, list(valid))
+        pending = [(key, index, entry) for key, (index, entry) in valid.items() if key not in known]
+        if pending:
+            cursor.executemany("""
+                INSERT INTO trainees (name, mobile_number, gender, age, department, designation,
+                                      address, block, district, training_date, cpr_training,
+                                      first_aid_kit_given, life_saving_skills, registered_by, client_key)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE client_key = client_key
+            """, [(
+                entry['name'],
+                entry.get('mobile_number', ''),
+                entry['gender'],
+                int(entry['age']),
+                entry['department'],
+                entry.get('designation', ''),
+                entry['address'],
+                entry['block'],
+                entry.get('district', config.DEFAULT_DISTRICT),
+                entry['training_date'],
+                bool(entry.get('cpr_training', False)),
+                bool(entry.get('first_aid_kit_given', False)),
+                bool(entry.get('life_saving_skills', False)),
+                entry.get('registered_by', registered_by) if allow_owner_override else registered_by,
+                key,
+            ) for key, index, entry in pending])
+        inserted = existing_keys(cursor, [key for key, _, _ in pending])
+        connection.commit()
+    except mysql.connector.Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    for key, (index, entry) in valid.items():
+        if key in known:
+            results[index] = {'client_key': entry['client_key'], 'status': 'duplicate', 'id': known[key]}
+        else:
+            results[index] = {'client_key': entry['client_key'], 'status': 'created', 'id': inserted.get(key)}
+    for index, entry in enumerate(entries):
+        if index not in results:
+            # Same key earlier in this batch
+            key = entry['client_key'].lower()
+            results[index] = {'client_key': entry['client_key'], 'status': 'duplicate',
+                              'id': known.get(key, inserted.get(key))}
+
+    created = sum(1 for result in results.values() if result['status'] == 'created')
+    return [results[index] for index in range(len(entries))], created